@@ -1,17 +1,19 @@
 # StudentAdvisingSystem/backend/app.py
 import os
+import time
+_IMPORT_STARTED = time.perf_counter() # Startup measurement (see startup.py)
 import traceback
 import random
 import string
 from datetime import datetime, timedelta
 
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, send_file, stream_with_context
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 from flask_jwt_extended import (
     create_access_token, jwt_required, get_jwt_identity, get_jwt
 )
-from flask_mail import Message
 
 # Import extensions
 from extensions import db, migrate, jwt, mail, cors # Keep these imports as they are used for init_app later
@@ -25,87 +27,65 @@ from models.advising_resource import AdvisingResource
 from models.note import AdvisingNote
 from models.enrollment import Enrollment
 from models.result import Result
+from models.semester_gpa import StudentSemesterGpa
+from models.outbound_email import OutboundEmail
+from models.guardian_broadcast import GuardianBroadcast
+from models.course_grade_summary import CourseGradeSummary
+from models.grade_scale import GradeScale, GradeScaleEntry
+from models.data_version import DataVersion
+from models.firestore_outbox import FirestoreOutbox
+from models.document_job import DocumentJob
+from models.background_job import BackgroundJob
 # --- End Model Imports ---
 
+from resource_cache import get_cached_resources_etag, get_cached_resources_response
+from data_versions import Validators
+from pagination import InvalidPageRequest, get_page_args, decode_cursor, split_page
+from gpa_engine import apply_result_to_gpa
+from grade_scale import UnknownGradeError, grade_points
+from grade_upload import GradeUploadError, parse_grade_upload, process_grade_upload
+import mail_queue
+import firestore_cdc
+import metrics
+import profiler
+from mail_queue import enqueue_email, notify_mail_dispatcher
+from course_analytics import apply_results_to_analytics, get_summaries, serialize_summary
+from credentials import authenticate
+from identity import get_identity, get_request_identity
+from repositories import get_repository
+import jobs # Queue gauges for /metrics; tasks are loaded when a job is queued (see jobs.registered_tasks)
+from startup import LazyAppGroup, record_startup
+from guardian_broadcast import BroadcastError, parse_broadcast_filters, create_guardian_broadcast, get_broadcast_progress
+
 # Import CORS directly for explicit configuration
 from flask_cors import CORS # ADDED THIS LINE
 
 load_dotenv()
-# --- ADDED THIS LINE AS REQUESTED ---
-print("✅ DATABASE_URL =", os.getenv("DATABASE_URL"))
-# --- END ADDED LINE ---
-app = Flask(__name__)
-
-ENVIRONMENT = os.getenv('FLASK_ENV', 'development')
-
-
-# --- App Configurations ---
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///site.db')
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'fallback-super-secret-key-change-in-env')
-app.config['JWT_TOKEN_LOCATION'] = ['headers']
-app.config['JWT_HEADER_NAME'] = 'Authorization'
-app.config['JWT_HEADER_TYPE'] = 'Bearer'
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES_HOURS', 1)))
-
-app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.example.com')
-app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
-app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() in ['true', '1', 't']
-app.config['MAIL_USE_SSL'] = os.getenv('MAIL_USE_SSL', 'False').lower() in ['true', '1', 't']
-app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME', 'your-email@example.com')
-app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD', 'your-email-password')
-app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER', ('Crawford Advising Portal', 'noreply@crawforduniversity.edu.ng'))
-
-db.init_app(app)
-migrate.init_app(app, db)
-jwt.init_app(app)
-mail.init_app(app)
-
-# REFINED CORS INITIALIZATION:
-# This ensures CORS headers are applied directly to the app for /api/* routes.
-# It explicitly allows requests from your frontend's origin (http://127.0.0.1:5500)
-# and enables support for credentials (like JWT tokens).
-CORS(app, resources={r"/api/*": {"origins": "http://127.0.0.1:5500", "supports_credentials": True}})
-
-# The existing cors.init_app from extensions.py is still present,
-# but the direct CORS(app, ...) call above is more robust for /api/* routes.
-# The allowed_origins in the development block below is also corrected to 5500.
-if ENVIRONMENT == 'development':
-    allowed_origins = ["http://localhost:5500", "http://127.0.0.1:5500", "null"] # Corrected to 5500
-    # The cors.init_app from extensions is still called, but the direct CORS(app, ...)
-    # above will take precedence for the /api/* routes concerning the origin.
-    cors.init_app(app, origins=allowed_origins, methods=["GET", "HEAD", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"], allow_headers=["Content-Type", "Authorization", "X-Requested-With"], supports_credentials=True, expose_headers=["Content-Type", "Authorization"])
-    app.logger.info(f"CORS configured for development with origins: {allowed_origins} for all routes via extensions.")
-else:
-    allowed_origins = [os.getenv("FRONTEND_URL", "https://your-production-domain.com")]
-    cors.init_app(app, origins=allowed_origins, methods=["GET", "HEAD", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"], allow_headers=["Content-Type", "Authorization", "X-Requested-With"], supports_credentials=True, expose_headers=["Content-Type", "Authorization"])
-    app.logger.info(f"CORS configured for production with origins: {allowed_origins} for all routes via extensions.")
+
+# Routes live on this blueprint (no URL prefix, so paths and /metrics route labels are unchanged);
+# create_app() below builds the app. Serve it with wsgi.py, or `flask --app app ...` for the CLI.
+api = Blueprint('api', __name__)
 
 
 def generate_random_numeric_password(length=8):
     return ''.join(random.choices(string.digits, k=length))
 
 def get_typed_user_from_jwt_v2():
+    """(identity, user_type) from the token; see identity.py. The Student/Lecturer row is loaded only if a handler needs it."""
     try:
-        user_id_str = get_jwt_identity()
-        claims = get_jwt()
-        user_type = claims.get("user_type")
-        if not user_id_str or not user_type:
-            app.logger.warning("Token missing identity or user_type claim.")
-            return None, None
-        user_id = int(user_id_str)
-        if user_type == "student": return db.session.get(Student, user_id), user_type
-        elif user_type == "lecturer": return db.session.get(Lecturer, user_id), user_type
-        else: app.logger.warning(f"Unknown user type in token: {user_type}"); return None, None
+        return get_request_identity()
     except Exception as e:
-        app.logger.error(f"Error getting user from JWT: {str(e)}", exc_info=True); return None, None
+        current_app.logger.error(f"Error getting user from JWT: {str(e)}", exc_info=True); return None, None
+
+def get_validators(repository, scopes, *extra):
+    """ETag validators for a read, or None when it is served from a replica the SQL data_versions don't describe."""
+    return Validators(scopes, *extra) if repository.reads_sql else None
 
-@app.route('/')
+@api.route('/')
 def index(): return jsonify({"message": "Welcome to Student Advising System API"})
 
 # --- Authentication APIs ---
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
     if not data: return jsonify({"success": False, "message": "Request body must be JSON."}), 400
@@ -114,30 +94,23 @@ def login():
     if not username_or_email or not password: return jsonify({"success": False, "message": "Username/Email and password are required."}), 400
 
     try: # ADDED TRY-EXCEPT BLOCK FOR LOGIN LOGIC
-        user, user_type, user_name = None, None, None
-        potential_student = Student.query.filter((Student.matric_number == username_or_email) | (Student.email == username_or_email)).first()
-        if potential_student and potential_student.check_password(password):
-            user, user_type, user_name = potential_student, "student", f"{potential_student.first_name} {potential_student.last_name}"
-        else:
-            potential_lecturer = Lecturer.query.filter_by(email=username_or_email).first()
-            if potential_lecturer and potential_lecturer.check_password(password):
-                user, user_type, user_name = potential_lecturer, "lecturer", f"{potential_lecturer.first_name} {potential_lecturer.last_name}"
-
-        if user and user_type:
+        account = authenticate(username_or_email, password)
+        if account:
+            user_type, user_name = account.user_type, f"{account.first_name} {account.last_name}"
             additional_claims = {"user_type": user_type, "user_name": user_name}
-            access_token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
-            app.logger.info(f"Login successful for {user_type}: {username_or_email} (ID: {user.id})")
-            return jsonify(success=True, access_token=access_token, user_type=user_type, user_name=user_name, user_id=user.id), 200
+            access_token = create_access_token(identity=str(account.id), additional_claims=additional_claims)
+            current_app.logger.info(f"Login successful for {user_type}: {username_or_email} (ID: {account.id})")
+            return jsonify(success=True, access_token=access_token, user_type=user_type, user_name=user_name, user_id=account.id), 200
         else:
-            app.logger.warn(f"Login failed for: {username_or_email}")
+            current_app.logger.warn(f"Login failed for: {username_or_email}")
             return jsonify({"success": False, "message": "Invalid credentials or user not found."}), 401
     except Exception as e:
         # Log the actual error that's causing the 500
-        app.logger.error(f"An unexpected error occurred during login for {username_or_email}: {str(e)}", exc_info=True)
+        current_app.logger.error(f"An unexpected error occurred during login for {username_or_email}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An internal server error occurred during login. Please try again later."}), 500
 
 
-@app.route('/api/students/forgot-password', methods=['POST'])
+@api.route('/api/students/forgot-password', methods=['POST'])
 def student_forgot_password():
     data = request.get_json()
     if not data: return jsonify({"success": False, "message": "Request body must be JSON."}), 400
@@ -145,27 +118,27 @@ def student_forgot_password():
     if not matric_number: return jsonify({"success": False, "message": "Matriculation number is required."}), 400
     student = Student.query.filter_by(matric_number=matric_number).first()
     if not student:
-        app.logger.info(f"Forgot password attempt for non-existent matric_number: {matric_number}")
+        current_app.logger.info(f"Forgot password attempt for non-existent matric_number: {matric_number}")
         return jsonify({"success": True, "message": "If an account with that matriculation number exists, password reset instructions have been sent to the registered email address."}), 200
     if not student.email:
-        app.logger.error(f"Student {matric_number} (ID: {student.id}) has no email address for password reset.")
+        current_app.logger.error(f"Student {matric_number} (ID: {student.id}) has no email address for password reset.")
         return jsonify({"success": True, "message": "If an account with that matriculation number exists and has a registered email, password reset instructions have been sent."}), 200
     try:
         temp_password = generate_random_numeric_password(8)
         student.set_password(temp_password)
-        db.session.commit()
         subject = "Your Password Reset for Crawford Advising Portal"
-        sender_email = app.config.get('MAIL_DEFAULT_SENDER', 'noreply@yourdomain.com')
+        sender_email = current_app.config.get('MAIL_DEFAULT_SENDER', 'noreply@yourdomain.com')
         email_body = f"Hello {student.first_name},\n\nYour password for the Crawford University Academic Advising Portal has been temporarily reset.\n\nYour temporary password is: {temp_password}\n\nPlease log in using this temporary password and change it immediately via your profile settings.\n\nIf you did not request this password reset, please contact support.\n\nRegards,\nCrawford University Advising Team"
-        msg = Message(subject, sender=sender_email, recipients=[student.email], body=email_body)
-        mail.send(msg)
-        app.logger.info(f"Password reset email sent to student: {student.email} for matric_number: {matric_number}")
+        enqueue_email(subject, [student.email], body=email_body, sender=sender_email)
+        db.session.commit() # New password and queued email are committed together
+        notify_mail_dispatcher()
+        current_app.logger.info(f"Password reset email queued for student: {student.email} for matric_number: {matric_number}")
         return jsonify({"success": True, "message": "Password reset instructions have been sent to your registered email address."}), 200
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error during password reset for matric_number {matric_number}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error during password reset for matric_number {matric_number}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while attempting to reset your password. Please try again later."}), 500
 
-@app.route('/api/me/change-password', methods=['POST']) # <<<--- IMPLEMENTED THIS ENDPOINT
+@api.route('/api/me/change-password', methods=['POST']) # <<<--- IMPLEMENTED THIS ENDPOINT
 @jwt_required()
 def change_my_password():
     user, user_type = get_typed_user_from_jwt_v2()
@@ -185,7 +158,7 @@ def change_my_password():
         return jsonify({"success": False, "message": "Current password, new password, and confirmation are required."}), 400
 
     if not user.check_password(current_password):
-        app.logger.warn(f"Failed password change attempt for {user_type} ID {user.id}: Incorrect current password.")
+        current_app.logger.warn(f"Failed password change attempt for {user_type} ID {user.id}: Incorrect current password.")
         return jsonify({"success": False, "message": "Incorrect current password."}), 400
 
     if new_password != confirm_password:
@@ -200,97 +173,128 @@ def change_my_password():
     try:
         user.set_password(new_password)
         db.session.commit()
-        app.logger.info(f"Password changed successfully for {user_type} ID {user.id}.")
+        current_app.logger.info(f"Password changed successfully for {user_type} ID {user.id}.")
         return jsonify({"success": True, "message": "Password changed successfully. Please log in again with your new password for security."}), 200
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error changing password for {user_type} ID {user.id}: {str(e)}", exc_info=True)
+        current_app.logger.error(f"Error changing password for {user_type} ID {user.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while changing your password."}), 500
 
 # --- Student APIs ---
-@app.route('/api/student/data', methods=['GET'])
+@api.route('/api/student/data', methods=['GET'])
 @jwt_required()
 def get_student_dashboard_data():
     user, user_type = get_typed_user_from_jwt_v2()
     if not user or user_type != 'student': return jsonify({"success": False, "message": "Authentication failed or not a student."}), 401
-    degree_data = {"name": "N/A", "faculty": "N/A"}
-    if hasattr(user, 'degree') and user.degree:
-        degree_data["name"] = user.degree.name
-        if hasattr(user.degree, 'faculty') and user.degree.faculty: degree_data["faculty"] = user.degree.faculty
-    student_info = {"id": user.id, "name": f"{user.first_name} {user.last_name}", "matric": user.matric_number, "email": user.email, "gpa": user.gpa, "degree": degree_data}
-    advisor_info = None
-    if hasattr(user, 'advisor') and user.advisor:
-        advisor_info = {"name": f"{user.advisor.first_name} {user.advisor.last_name}", "email": user.advisor.email, "department": user.advisor.department, "office": user.advisor.office_location}
+    repository = get_repository()
     try:
-        resources_query = AdvisingResource.query.order_by(AdvisingResource.title).all()
-        resources = [{"id": res.id, "title": res.title, "description": res.description, "url": res.url, "category": res.category} for res in resources_query]
+        validators = get_validators(repository, [f'student:{user.id}', f'results:{user.id}', 'lecturers', 'degrees'], get_cached_resources_etag('title'))
+        if validators and validators.not_modified(): return validators.not_modified_response()
     except Exception as e:
-        app.logger.error(f"Error fetching advising resources: {str(e)}", exc_info=True); resources = []
+        db.session.rollback(); current_app.logger.error(f"Error checking dashboard version for S_ID {user.id}: {str(e)}", exc_info=True); validators = None
+    try:
+        student = repository.get_student(user.id)
+        advisor = repository.get_lecturer(student['advisor_id']) if student and student['advisor_id'] else None
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error fetching dashboard data for S_ID {user.id}: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while fetching dashboard data."}), 500
+    if not student: return jsonify({"success": False, "message": "Student not found."}), 404
+    degree = student['degree'] or {}
+    degree_data = {"name": degree.get('name') or "N/A", "faculty": degree.get('faculty') or "N/A"}
+    student_info = {"id": student['id'], "name": student['name'], "matric": student['matric_number'], "email": student['email'], "gpa": student['gpa'], "degree": degree_data}
+    advisor_info = {"name": advisor['name'], "email": advisor['email'], "department": advisor['department'], "office": advisor['office_location']} if advisor else None
+    try:
+        resources = repository.get_resources('title')
+    except Exception as e:
+        current_app.logger.error(f"Error fetching advising resources: {str(e)}", exc_info=True); resources = []
     current_courses_placeholder = [{"code": "INFO101", "title": "Intro to University Life", "units": 1, "status": "Required"}]
-    return jsonify(success=True, student_info=student_info, advisor_info=advisor_info, courses=current_courses_placeholder, resources=resources), 200
+    try:
+        semester_gpas = repository.get_semester_gpas(user.id)
+    except Exception as e:
+        current_app.logger.error(f"Error fetching semester GPAs: {str(e)}", exc_info=True); semester_gpas = []
+    response = jsonify(success=True, student_info=student_info, advisor_info=advisor_info, courses=current_courses_placeholder, resources=resources, semester_gpas=semester_gpas)
+    return (validators.apply(response) if validators else response), 200
 
-@app.route('/api/student/results', methods=['GET'])
+@api.route('/api/student/results', methods=['GET'])
 @jwt_required()
 def student_official_results():
     user, user_type = get_typed_user_from_jwt_v2()
     if not user or user_type != 'student': return jsonify({"success": False, "message": "Authentication failed or not a student."}), 401
-    app.logger.info(f"Fetching official results for student ID: {user.id}")
     try:
-        student_results_query = db.session.query(Result.grade, Result.semester, Result.gpa.label('grade_points'), Course.code.label('course_code'), Course.title.label('course_title'), Course.units.label('course_units')).join(Course, Result.course_id == Course.id).filter(Result.student_id == user.id).order_by(Result.semester.desc(), Course.code.asc()).all()
-        results_data = [{"grade": res.grade, "semester": res.semester, "grade_points": res.grade_points, "course_code": res.course_code, "course_title": res.course_title, "course_units": res.course_units} for res in student_results_query]
-        return jsonify({"success": True, "results": results_data}), 200
+        paginate, limit, cursor = get_page_args()
+        after_semester, after_code = decode_cursor(cursor, 2) if cursor else (None, None)
+    except InvalidPageRequest as e: return jsonify({"success": False, "message": str(e)}), 400
+    current_app.logger.info(f"Fetching official results for student ID: {user.id}")
+    try:
+        repository = get_repository()
+        validators = get_validators(repository, [f'results:{user.id}', 'courses'], request.query_string)
+        if validators and validators.not_modified(): return validators.not_modified_response()
+        after = (after_semester, after_code) if cursor else None
+        if not paginate:
+            results_data, next_cursor = repository.get_results(user.id, after), None
+        else:
+            results_data, next_cursor = split_page(repository.get_results(user.id, after, limit + 1), limit, lambda res: (res['semester'], res['course_code']))
+        response = jsonify({"success": True, "results": results_data}) if not paginate else jsonify({"success": True, "results": results_data, "next_cursor": next_cursor, "limit": limit})
+        return (validators.apply(response) if validators else response), 200
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error fetching results for student ID {user.id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error fetching results for student ID {user.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while fetching results."}), 500
 
 # --- Lecturer APIs ---
-@app.route('/api/lecturer/data', methods=['GET'])
+@api.route('/api/lecturer/data', methods=['GET'])
 @jwt_required()
 def get_lecturer_dashboard_data():
     user, user_type = get_typed_user_from_jwt_v2()
     if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
-    app.logger.info(f"Fetching dashboard data for lecturer ID: {user.id}")
     try:
+        paginate, limit, cursor = get_page_args()
+        after_id = int(decode_cursor(cursor, 1)[0]) if cursor else None
+    except (InvalidPageRequest, TypeError, ValueError) as e: return jsonify({"success": False, "message": str(e) if isinstance(e, InvalidPageRequest) else "Invalid pagination cursor."}), 400
+    current_app.logger.info(f"Fetching dashboard data for lecturer ID: {user.id}")
+    try:
+        repository = get_repository()
+        validators = get_validators(repository, [f'advisees:{user.id}', 'lecturers', 'degrees'], user.id, request.query_string, get_cached_resources_etag('title'))
+        if validators and validators.not_modified(): return validators.not_modified_response()
         lecturer_info = {"id": user.id, "name": f"{user.first_name} {user.last_name}", "email": user.email, "department": user.department, "office_location": user.office_location}
-        advisees_data = []
-        if hasattr(user, 'advisees') and user.advisees:
-            for student_advisee in user.advisees:
-                degree_name = student_advisee.degree.name if student_advisee.degree else "N/A"
-                advisees_data.append({
-                    "id": student_advisee.id, "name": f"{student_advisee.first_name} {student_advisee.last_name}",
-                    "matric_number": student_advisee.matric_number, "email": student_advisee.email,
-                    "degree": degree_name, "gpa": student_advisee.gpa if student_advisee.gpa is not None else "N/A",
-                    "guardian_name": student_advisee.guardian_name, "guardian_email": student_advisee.guardian_email,
-                    "guardian_phone": student_advisee.guardian_phone, "guardian_relationship": student_advisee.guardian_relationship
-                })
-        resources_query = AdvisingResource.query.order_by(AdvisingResource.title).all()
-        resources = [{"id": res.id, "title": res.title, "description": res.description, "url": res.url, "category": res.category} for res in resources_query]
-        return jsonify(success=True, lecturer_info=lecturer_info, advisees=advisees_data, resources=resources), 200
+        if not paginate:
+            advisees_rows, next_cursor = repository.get_advisees(user.id, after_id), None
+        else:
+            advisees_rows, next_cursor = split_page(repository.get_advisees(user.id, after_id, limit + 1), limit, lambda adv: (adv['id'],))
+        advisees_data = [{
+            "id": adv['id'], "name": adv['name'],
+            "matric_number": adv['matric_number'], "email": adv['email'],
+            "degree": adv['degree_name'] or "N/A", "gpa": adv['gpa'] if adv['gpa'] is not None else "N/A",
+            "guardian_name": adv['guardian_name'], "guardian_email": adv['guardian_email'],
+            "guardian_phone": adv['guardian_phone'], "guardian_relationship": adv['guardian_relationship']
+        } for adv in advisees_rows]
+        resources = repository.get_resources('title')
+        response = jsonify(success=True, lecturer_info=lecturer_info, advisees=advisees_data, resources=resources, next_cursor=next_cursor, limit=limit) if paginate else jsonify(success=True, lecturer_info=lecturer_info, advisees=advisees_data, resources=resources)
+        return (validators.apply(response) if validators else response), 200
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error fetching data for L.ID {user.id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error fetching data for L.ID {user.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while fetching lecturer data."}), 500
 
-@app.route('/api/lecturer/advisees/<int:advisee_id>/results', methods=['GET'])
+@api.route('/api/lecturer/advisees/<int:advisee_id>/results', methods=['GET'])
 @jwt_required()
 def get_advisee_results_for_lecturer(advisee_id):
     lecturer, user_type = get_typed_user_from_jwt_v2()
     if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
-    advisee = db.session.get(Student, advisee_id)
+    repository = get_repository()
+    advisee = repository.get_student(advisee_id)
     if not advisee: return jsonify({"success": False, "message": "Advisee (student) not found."}), 404
-    if advisee.advisor_id != lecturer.id:
-        app.logger.warn(f"Lecturer {lecturer.id} access attempt for non-advisee {advisee_id} results.")
+    if advisee['advisor_id'] != lecturer.id:
+        current_app.logger.warn(f"Lecturer {lecturer.id} access attempt for non-advisee {advisee_id} results.")
         return jsonify({"success": False, "message": "You can only view results for your own advisees."}), 403
-    app.logger.info(f"Lecturer ID: {lecturer.id} fetching results for advisee ID: {advisee_id}")
+    current_app.logger.info(f"Lecturer ID: {lecturer.id} fetching results for advisee ID: {advisee_id}")
     try:
-        student_results_query = db.session.query(Result.grade, Result.semester, Result.gpa.label('grade_points'), Course.code.label('course_code'), Course.title.label('course_title'), Course.units.label('course_units')).join(Course, Result.course_id == Course.id).filter(Result.student_id == advisee_id).order_by(Result.semester.desc(), Course.code.asc()).all()
-        results_data = [{"grade": res.grade, "semester": res.semester, "grade_points": res.grade_points, "course_code": res.course_code, "course_title": res.course_title, "course_units": res.course_units} for res in student_results_query]
-        student_name = f"{advisee.first_name} {advisee.last_name} ({advisee.matric_number})"
+        results_data = repository.get_results(advisee_id)
+        student_name = f"{advisee['name']} ({advisee['matric_number']})"
         return jsonify({"success": True, "student_name": student_name, "results": results_data}), 200
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error fetching results for advisee {advisee_id} by L.{lecturer.id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error fetching results for advisee {advisee_id} by L.{lecturer.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while fetching advisee results."}), 500
 
-@app.route('/api/lecturer/submit-grade', methods=['POST'])
+@api.route('/api/lecturer/submit-grade', methods=['POST'])
 @jwt_required()
 def submit_grade():
     user, user_type = get_typed_user_from_jwt_v2()
@@ -301,26 +305,52 @@ def submit_grade():
         missing = [k for k in required_fields if k not in data]; return jsonify({"success": False, "message": f"Missing required fields: {', '.join(missing)}."}), 400
     try:
         student_id, course_id = int(data['student_id']), int(data['course_id'])
-        grade, semester_str, gpa_points = data['grade'], data['semester'], data.get('gpa')
+        grade, semester_str = str(data['grade']).strip().upper(), data['semester']
         target_student, target_course = db.session.get(Student, student_id), db.session.get(Course, course_id)
         if not target_student: return jsonify({"success": False, "message": f"Student with ID {student_id} not found."}), 404
         if not target_course: return jsonify({"success": False, "message": f"Course with ID {course_id} not found."}), 404
+        # Grade points always come from the grade-scale registry; a client-supplied 'gpa' is ignored
+        try: gpa_points = grade_points(grade, target_student.degree_id, semester_str)
+        except UnknownGradeError as e: return jsonify({"success": False, "message": str(e)}), 400
         existing_result = Result.query.filter_by(student_id=student_id, course_id=course_id, semester=semester_str).first()
         if existing_result:
-            app.logger.warn(f"Attempt to submit duplicate result for S_ID:{student_id}, C_ID:{course_id}, Sem:{semester_str}")
+            current_app.logger.warn(f"Attempt to submit duplicate result for S_ID:{student_id}, C_ID:{course_id}, Sem:{semester_str}")
             return jsonify({"success": False, "message": f"A result for course {target_course.code} in semester {semester_str} already exists for student {target_student.matric_number}."}), 409
-        new_result = Result(student_id=student_id, course_id=course_id, grade=grade, semester=semester_str, gpa=float(gpa_points) if gpa_points is not None else None)
-        db.session.add(new_result); db.session.commit()
-        app.logger.info(f"Lecturer ID {user.id} submitted grade '{grade}' for S_ID:{student_id}, C_ID:{course_id}, Sem:'{semester_str}'")
+        new_result = Result(student_id=student_id, course_id=course_id, grade=grade, semester=semester_str, gpa=gpa_points)
+        db.session.add(new_result)
+        apply_result_to_gpa(target_student, new_result, target_course.units) # Same transaction as the result insert
+        apply_results_to_analytics([(course_id, semester_str, grade, new_result.gpa)])
+        db.session.commit()
+        current_app.logger.info(f"Lecturer ID {user.id} submitted grade '{grade}' for S_ID:{student_id}, C_ID:{course_id}, Sem:'{semester_str}'")
         return jsonify({"success": True, "message": "Grade submitted successfully."}), 201
     except ValueError:
-        db.session.rollback(); app.logger.error(f"ValueError grade submission by L.{user.id}. Data: {data}", exc_info=True)
-        return jsonify({"success": False, "message": "Invalid data format for student_id, course_id, or gpa."}), 400
+        db.session.rollback(); current_app.logger.error(f"ValueError grade submission by L.{user.id}. Data: {data}", exc_info=True)
+        return jsonify({"success": False, "message": "Invalid data format for student_id or course_id."}), 400
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error submitting grade by L.{user.id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error submitting grade by L.{user.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "Failed to submit grade due to a server error."}), 500
 
-@app.route('/api/advisees/<int:advisee_id>/contact-guardian', methods=['POST'])
+@api.route('/api/lecturer/submit-grades', methods=['POST'])
+@jwt_required()
+def submit_grades_batch():
+    user, user_type = get_typed_user_from_jwt_v2()
+    if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Only lecturers can submit grades."}), 403
+    try:
+        rows = parse_grade_upload(request)
+    except GradeUploadError as e: return jsonify({"success": False, "message": str(e)}), 400
+    try:
+        inserted, errors = process_grade_upload(rows)
+        if not inserted:
+            db.session.rollback()
+            return jsonify({"success": False, "message": "No grades were submitted.", "inserted": 0, "errors": errors}), 400
+        db.session.commit()
+        current_app.logger.info(f"Lecturer ID {user.id} batch-submitted {inserted} grade(s); {len(errors)} row(s) rejected.")
+        return jsonify({"success": True, "message": f"{inserted} grade(s) submitted successfully.", "inserted": inserted, "errors": errors}), 201
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error in batch grade submission by L.{user.id}: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "Failed to submit grades due to a server error."}), 500
+
+@api.route('/api/advisees/<int:advisee_id>/contact-guardian', methods=['POST'])
 @jwt_required()
 def contact_guardian(advisee_id):
     lecturer, user_type = get_typed_user_from_jwt_v2()
@@ -328,10 +358,10 @@ def contact_guardian(advisee_id):
     advisee = db.session.get(Student, advisee_id)
     if not advisee: return jsonify({"success": False, "message": "Advisee (student) not found."}), 404
     if advisee.advisor_id != lecturer.id:
-        app.logger.warn(f"Lecturer {lecturer.id} attempt to contact guardian for non-advisee student {advisee_id}")
+        current_app.logger.warn(f"Lecturer {lecturer.id} attempt to contact guardian for non-advisee student {advisee_id}")
         return jsonify({"success": False, "message": "You are not authorized to contact the guardian for this student."}), 403
     if not advisee.guardian_email:
-        app.logger.info(f"Attempt to contact guardian for student {advisee_id}, but no guardian email is registered.")
+        current_app.logger.info(f"Attempt to contact guardian for student {advisee_id}, but no guardian email is registered.")
         return jsonify({"success": False, "message": f"No guardian email registered for {advisee.first_name} {advisee.last_name}."}), 400
     data = request.get_json()
     if not data: return jsonify({"success": False, "message": "Request body must be JSON."}), 400
@@ -341,97 +371,505 @@ def contact_guardian(advisee_id):
     if not message_body_from_lecturer or not message_body_from_lecturer.strip():
         return jsonify({"success": False, "message": "Message body cannot be empty."}), 400
     try:
-        sender_email = app.config.get('MAIL_DEFAULT_SENDER', ('Crawford Advising', 'noreply@yourdomain.com'))
+        sender_email = current_app.config.get('MAIL_DEFAULT_SENDER', ('Crawford Advising', 'noreply@yourdomain.com'))
         subject_line = "URGENT: " + email_subject_from_lecturer if is_urgent else email_subject_from_lecturer
         email_html_body = f"""<p>Dear {advisee.guardian_name or 'Guardian'},</p><p>This message is from {lecturer.first_name} {lecturer.last_name}, the academic advisor for your ward, {advisee.first_name} {advisee.last_name} (Matric No: {advisee.matric_number}), at Crawford University.</p><hr><p><strong>Message:</strong></p><p>{message_body_from_lecturer.replace(os.linesep, '<br>')}</p><hr><p>If you have any questions, please feel free to reply to this email or contact the advising office.</p><p>Regards,<br>{lecturer.first_name} {lecturer.last_name}<br>{lecturer.department}<br>Crawford University</p>"""
         email_plain_body = f"Dear {advisee.guardian_name or 'Guardian'},\n\nThis message is from {lecturer.first_name} {lecturer.last_name}, the academic advisor for your ward, {advisee.first_name} {advisee.last_name} (Matric No: {advisee.matric_number}), at Crawford University.\n\nMessage:\n{message_body_from_lecturer}\n\nIf you have any questions, please feel free to reply to this email or contact the advising office.\n\nRegards,\n{lecturer.first_name} {lecturer.last_name}\n{lecturer.department}\nCrawford University"
-        msg = Message(subject=subject_line, sender=sender_email, recipients=[advisee.guardian_email], body=email_plain_body, html=email_html_body)
-        mail.send(msg)
+        enqueue_email(subject_line, [advisee.guardian_email], body=email_plain_body, html=email_html_body, sender=sender_email)
         contact_note_content = f"Contacted guardian ({advisee.guardian_name or 'N/A'}, {advisee.guardian_email}) regarding: {email_subject_from_lecturer}. Message snippet: {message_body_from_lecturer[:100]}..."
         if is_urgent: contact_note_content = "[URGENT] " + contact_note_content
-        new_log_note = AdvisingNote(content=contact_note_content, student_id=advisee_id, lecturer_id=user.id)
+        new_log_note = AdvisingNote(content=contact_note_content, student_id=advisee_id, lecturer_id=lecturer.id)
         db.session.add(new_log_note); db.session.commit()
-        app.logger.info(f"Lecturer {user.id} sent email to guardian of student {advisee_id}. Urgent: {is_urgent}")
-        return jsonify({"success": True, "message": f"Email successfully sent to the guardian of {advisee.first_name} {advisee.last_name}."}), 200
+        notify_mail_dispatcher()
+        current_app.logger.info(f"Lecturer {lecturer.id} queued email to guardian of student {advisee_id}. Urgent: {is_urgent}")
+        return jsonify({"success": True, "message": f"Email to the guardian of {advisee.first_name} {advisee.last_name} has been queued for delivery."}), 200
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error contacting guardian for S_ID {advisee_id} by L.{user.id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error contacting guardian for S_ID {advisee_id} by L.{lecturer.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while attempting to contact the guardian."}), 500
 
+@api.route('/api/lecturer/guardian-broadcasts', methods=['POST'])
+@jwt_required()
+def create_guardian_broadcast_job():
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    data = request.get_json()
+    if not data: return jsonify({"success": False, "message": "Request body must be JSON."}), 400
+    subject, message_body = (data.get('subject') or '').strip(), data.get('message_body')
+    if not subject: return jsonify({"success": False, "message": "Subject is required."}), 400
+    if not message_body or not message_body.strip(): return jsonify({"success": False, "message": "Message body cannot be empty."}), 400
+    try:
+        filters = parse_broadcast_filters(data)
+        sender_email = current_app.config.get('MAIL_DEFAULT_SENDER', ('Crawford Advising', 'noreply@yourdomain.com'))
+        broadcast, skipped = create_guardian_broadcast(lecturer, subject, message_body, filters, is_urgent=bool(data.get('is_urgent', False)), sender=sender_email)
+        db.session.commit()
+        notify_mail_dispatcher()
+        current_app.logger.info(f"Lecturer {lecturer.id} queued guardian broadcast {broadcast.id} to {broadcast.total_recipients} guardian(s). Filter: {filters}")
+        return jsonify({"success": True, "message": f"Queued messages to {broadcast.total_recipients} guardian(s).", "job_id": broadcast.id, "total": broadcast.total_recipients, "skipped_no_guardian_email": skipped}), 202
+    except BroadcastError as e:
+        db.session.rollback(); return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error creating guardian broadcast by L.{lecturer.id}: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while creating the broadcast."}), 500
+
+@api.route('/api/lecturer/guardian-broadcasts/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_guardian_broadcast_job(job_id):
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    broadcast = db.session.get(GuardianBroadcast, job_id)
+    if not broadcast or broadcast.lecturer_id != lecturer.id: return jsonify({"success": False, "message": "Broadcast not found."}), 404
+    return jsonify({"success": True, "job": get_broadcast_progress(broadcast)}), 200
+
 # --- Notes API ---
-@app.route('/api/students/<int:student_id>/notes', methods=['GET'])
+@api.route('/api/students/<int:student_id>/notes', methods=['GET'])
 @jwt_required()
 def get_student_advising_notes(student_id):
     user, user_type = get_typed_user_from_jwt_v2()
     if not user: return jsonify({"success": False, "message": "Authentication required."}), 401
-    target_student = db.session.get(Student, student_id)
+    target_student = get_identity('student', student_id, fresh=True) # Access check: the advisor as of now, not as cached
     if not target_student: return jsonify({"success": False, "message": "Student not found."}), 404
     is_student_self = (user_type == 'student' and user.id == student_id)
     is_lecturer_advisor = (user_type == 'lecturer' and target_student.advisor_id == user.id)
     if not (is_student_self or is_lecturer_advisor):
-        app.logger.warn(f"Unauthorized attempt to access notes. User {user.id} ({user_type}) for student {student_id}.")
+        current_app.logger.warn(f"Unauthorized attempt to access notes. User {user.id} ({user_type}) for student {student_id}.")
         return jsonify({"success": False, "message": "You are not authorized to view these notes."}), 403
-    app.logger.info(f"Fetching notes for S_ID: {student_id} by {user_type} ID: {user.id}")
     try:
-        notes_query = db.session.query(AdvisingNote.id, AdvisingNote.content, AdvisingNote.created_at, AdvisingNote.updated_at, (Lecturer.first_name + " " + Lecturer.last_name).label("author_name")).join(Lecturer, AdvisingNote.lecturer_id == Lecturer.id).filter(AdvisingNote.student_id == student_id).order_by(AdvisingNote.created_at.desc()).all()
-        notes_data = [{"id": note.id, "content": note.content, "created_at": note.created_at.isoformat() if note.created_at else None, "updated_at": note.updated_at.isoformat() if note.updated_at else None, "author_name": note.author_name} for note in notes_query]
-        return jsonify({"success": True, "notes": notes_data}), 200
+        paginate, limit, cursor = get_page_args()
+        if cursor:
+            after_created_at, after_id = decode_cursor(cursor, 2)
+            after_created_at, after_id = datetime.fromisoformat(after_created_at), int(after_id)
+    except (InvalidPageRequest, TypeError, ValueError) as e: return jsonify({"success": False, "message": str(e) if isinstance(e, InvalidPageRequest) else "Invalid pagination cursor."}), 400
+    current_app.logger.info(f"Fetching notes for S_ID: {student_id} by {user_type} ID: {user.id}")
+    try:
+        repository = get_repository()
+        validators = get_validators(repository, [f'notes:{student_id}', 'lecturers'], request.query_string)
+        if validators and validators.not_modified(): return validators.not_modified_response()
+        after = (after_created_at, after_id) if cursor else None
+        if not paginate:
+            rows, next_cursor = repository.get_notes(student_id, after), None
+        else:
+            rows, next_cursor = split_page(repository.get_notes(student_id, after, limit + 1), limit, lambda note: (note['created_at'].replace(tzinfo=None).isoformat(), note['id']))
+        notes_data = [{"id": note['id'], "content": note['content'], "created_at": note['created_at'].replace(tzinfo=None).isoformat() if note['created_at'] else None, "updated_at": note['updated_at'].replace(tzinfo=None).isoformat() if note['updated_at'] else None, "author_name": note['author_name']} for note in rows]
+        response = jsonify({"success": True, "notes": notes_data}) if not paginate else jsonify({"success": True, "notes": notes_data, "next_cursor": next_cursor, "limit": limit})
+        return (validators.apply(response) if validators else response), 200
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error fetching notes for S_ID {student_id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error fetching notes for S_ID {student_id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while fetching advising notes."}), 500
 
-@app.route('/api/students/<int:student_id>/notes', methods=['POST'])
+@api.route('/api/students/<int:student_id>/notes', methods=['POST'])
 @jwt_required()
 def add_advising_note_for_student(student_id):
     user, user_type = get_typed_user_from_jwt_v2()
     if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Only lecturers can add advising notes."}), 403
     data = request.get_json(); content = data.get('content')
     if not content or not content.strip(): return jsonify({"success": False, "message": "Note content is required and cannot be empty."}), 400
-    target_student = db.session.get(Student, student_id)
+    target_student = get_identity('student', student_id, fresh=True)
     if not target_student: return jsonify({"success": False, "message": "Student not found."}), 404
     if target_student.advisor_id != user.id:
-        app.logger.warn(f"Lecturer {user.id} attempt to add note for non-advisee student {student_id}")
+        current_app.logger.warn(f"Lecturer {user.id} attempt to add note for non-advisee student {student_id}")
         return jsonify({"success": False, "message": "You can only add notes for your own advisees."}), 403
     try:
         new_note = AdvisingNote(content=content, student_id=student_id, lecturer_id=user.id)
         db.session.add(new_note); db.session.commit()
         note_data = {"id": new_note.id, "content": new_note.content, "created_at": new_note.created_at.isoformat(), "updated_at": new_note.updated_at.isoformat(), "author_name": f"{user.first_name} {user.last_name}", "student_id": new_note.student_id}
-        app.logger.info(f"Lecturer {user.id} added note for student {student_id}")
+        current_app.logger.info(f"Lecturer {user.id} added note for student {student_id}")
         return jsonify({"success": True, "message": "Note added successfully.", "note": note_data}), 201
     except Exception as e:
-        db.session.rollback(); app.logger.error(f"Error adding note for S_ID {student_id} by L.{user.id}: {str(e)}", exc_info=True)
+        db.session.rollback(); current_app.logger.error(f"Error adding note for S_ID {student_id} by L.{user.id}: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "Failed to add note."}), 500
 
+# --- Analytics API ---
+@api.route('/api/analytics/grade-summaries', methods=['GET'])
+@jwt_required()
+def get_grade_summaries():
+    user, user_type = get_typed_user_from_jwt_v2()
+    if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    level = request.args.get('level', type=int)
+    try:
+        summaries = get_summaries(semester=request.args.get('semester'), code_prefix=request.args.get('prefix'), level=level)
+        return jsonify({"success": True, "summaries": summaries}), 200
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error fetching grade summaries: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while fetching grade analytics."}), 500
+
+@api.route('/api/analytics/courses/<int:course_id>', methods=['GET'])
+@jwt_required()
+def get_course_grade_analytics(course_id):
+    user, user_type = get_typed_user_from_jwt_v2()
+    if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    course = db.session.get(Course, course_id)
+    if not course: return jsonify({"success": False, "message": "Course not found."}), 404
+    try:
+        summaries_query = CourseGradeSummary.query.filter_by(course_id=course_id)
+        if request.args.get('semester'): summaries_query = summaries_query.filter_by(semester=request.args.get('semester'))
+        summaries = [serialize_summary(summary) for summary in summaries_query.order_by(CourseGradeSummary.semester.desc()).all()]
+        return jsonify({"success": True, "course": {"id": course.id, "code": course.code, "title": course.title, "units": course.units, "level": course.level}, "summaries": summaries}), 200
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error fetching analytics for course {course_id}: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while fetching course analytics."}), 500
+
+@api.route('/api/analytics/cohort', methods=['GET'])
+@jwt_required()
+def get_cohort_analytics():
+    user, user_type = get_typed_user_from_jwt_v2()
+    if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    try: import cohort_analytics # Needs NumPy; loaded on first use, not at startup
+    except ImportError: return jsonify({"success": False, "message": "Cohort analytics are unavailable (NumPy is not installed)."}), 503
+    degree_id, faculty = request.args.get('degree_id', type=int), request.args.get('faculty')
+    probation_below = request.args.get('probation_below', cohort_analytics.DEFAULT_PROBATION_BELOW, type=float)
+    include_students = request.args.get('include_students', 'false').lower() in ['true', '1', 't']
+    if degree_id is None and not faculty: return jsonify({"success": False, "message": "Provide degree_id or faculty."}), 400
+    try:
+        arrays = cohort_analytics.load_result_arrays(degree_id=degree_id, faculty=faculty)
+        summary = cohort_analytics.summarize_cohort(cohort_analytics.compute_cohort(arrays, probation_below), arrays, include_students=include_students)
+        return jsonify({"success": True, "probation_below": probation_below, **summary}), 200
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error computing cohort analytics: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while computing cohort analytics."}), 500
+
+# --- Streaming Exports ---
+def foreign_advisor_response(lecturer, filters, action):
+    """Bulk requests from a lecturer cover their own advisees only; a 403 if filters name another advisor."""
+    if filters.get('advisor_id') == lecturer.id: return None
+    current_app.logger.warn(f"Lecturer {lecturer.id} attempt to {action} for advisor {filters.get('advisor_id')}")
+    return jsonify({"success": False, "message": "You can only access your own advisees."}), 403
+
+def stream_export(report, export_format, filters, chunks):
+    """Streams chunks as a download; errors after the first byte can only be logged."""
+    import transcript_export
+    def generate():
+        try:
+            yield from chunks
+        except Exception as e:
+            db.session.rollback(); current_app.logger.error(f"Error streaming {report} export {filters}: {str(e)}", exc_info=True)
+    response = Response(stream_with_context(generate()), status=200, mimetype=transcript_export.MIMETYPES[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{transcript_export.export_filename(report, export_format, filters)}"'
+    response.headers['Cache-Control'] = 'no-store'; response.headers['X-Accel-Buffering'] = 'no' # Don't let a proxy buffer the stream
+    return response
+
+@api.route('/api/exports/transcripts', methods=['GET'])
+@jwt_required()
+def export_transcripts():
+    user, user_type = get_typed_user_from_jwt_v2()
+    if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    import transcript_export
+    try: export_format, filters = transcript_export.parse_export_args(request.args, default_advisor_id=user.id)
+    except transcript_export.ExportError as e: return jsonify({"success": False, "message": str(e)}), 400
+    denied = foreign_advisor_response(user, filters, 'export transcripts')
+    if denied: return denied
+    current_app.logger.info(f"Lecturer ID: {user.id} exporting transcripts {filters} as {export_format}")
+    return stream_export('transcripts', export_format, filters, transcript_export.generate_transcripts(export_format, filters))
+
+@api.route('/api/exports/cohort', methods=['GET'])
+@jwt_required()
+def export_cohort_report():
+    user, user_type = get_typed_user_from_jwt_v2()
+    if not user or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    import transcript_export
+    try: export_format, filters = transcript_export.parse_export_args(request.args, allow_level=False, default_advisor_id=user.id)
+    except transcript_export.ExportError as e: return jsonify({"success": False, "message": str(e)}), 400
+    denied = foreign_advisor_response(user, filters, 'export cohort report')
+    if denied: return denied
+    current_app.logger.info(f"Lecturer ID: {user.id} exporting cohort report {filters} as {export_format}")
+    return stream_export('cohort', export_format, filters, transcript_export.generate_cohort_report(export_format, filters))
+
+# --- Certificates & Transcripts ---
+@api.route('/api/student/documents/<kind>', methods=['GET'])
+@jwt_required()
+def get_my_document(kind):
+    student, user_type = get_typed_user_from_jwt_v2()
+    if not student or user_type != 'student': return jsonify({"success": False, "message": "Authentication failed or not a student."}), 401
+    if kind != 'transcript': return jsonify({"success": False, "message": "Students can download their transcript; certificates are issued by the faculty."}), 404
+    import documents # With document_render; loaded on first use, not at startup
+    try:
+        digest, path, matric_number = documents.get_document(kind, student.id)
+        return send_file(path, mimetype='application/pdf', as_attachment=True, download_name=f"{kind}-{matric_number.replace('/', '-')}.pdf", etag=digest, max_age=0)
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error generating {kind} for S.ID {student.id}: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while generating the document."}), 500
+
+@api.route('/api/documents/jobs', methods=['POST'])
+@jwt_required()
+def create_document_job():
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    import documents
+    try: kind, filters = documents.parse_document_request(request.get_json(silent=True) or {}, default_advisor_id=lecturer.id)
+    except documents.DocumentError as e: return jsonify({"success": False, "message": str(e)}), 400
+    denied = foreign_advisor_response(lecturer, filters, 'print documents')
+    if denied: return denied
+    others = documents.students_not_advised_by(lecturer.id, filters.get('student_ids'))
+    if others:
+        current_app.logger.warn(f"Lecturer {lecturer.id} attempt to print documents for non-advisees {others}")
+        return jsonify({"success": False, "message": "You can only access your own advisees."}), 403
+    try:
+        job = documents.create_document_job(kind, filters, requested_by=lecturer.id)
+        db.session.flush()
+        background_job = documents.queue_document_job(job)
+        db.session.commit()
+        current_app.logger.info(f"Lecturer ID: {lecturer.id} queued document job {job.id} ({kind}, {filters})")
+        return jsonify({"success": True, "job": documents.get_job_progress(job), "background_job_id": background_job.id}), 202
+    except Exception as e:
+        db.session.rollback(); current_app.logger.error(f"Error creating document job for L.ID {lecturer.id}: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "message": "An error occurred while creating the document job."}), 500
+
+@api.route('/api/documents/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_document_job(job_id):
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    job = db.session.get(DocumentJob, job_id)
+    if not job or job.requested_by != lecturer.id: return jsonify({"success": False, "message": "Document job not found."}), 404
+    import documents
+    return jsonify({"success": True, "job": documents.get_job_progress(job, include_documents=True)}), 200
+
+@api.route('/api/documents/<digest>', methods=['GET'])
+@jwt_required()
+def download_document(digest):
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    import documents
+    path = documents.document_path(digest)
+    entry = documents.find_job_document(digest, lecturer.id) if path and os.path.exists(path) else None
+    if entry:
+        advisee = get_identity('student', entry['student_id'], fresh=True)
+        if not advisee or advisee.advisor_id != lecturer.id: entry = None
+    if not entry: return jsonify({"success": False, "message": "Document not found."}), 404 # Same answer as a digest that doesn't exist
+    # Content-addressed: the bytes behind a digest never change, so browsers may keep it; shared caches may not
+    response = send_file(path, mimetype='application/pdf', download_name=f"{digest[:16]}.pdf", etag=digest, max_age=31536000)
+    response.cache_control.public = False; response.cache_control.private = True
+    return response
+
+# --- Background Jobs ---
+@api.route('/api/jobs', methods=['GET'])
+@jwt_required()
+def list_my_jobs():
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    query = BackgroundJob.query.filter(BackgroundJob.requested_by == lecturer.id)
+    if request.args.get('status'): query = query.filter(BackgroundJob.status == request.args.get('status'))
+    limit = min(request.args.get('limit', 25, type=int), 100)
+    return jsonify({"success": True, "jobs": [jobs.serialize_job(job) for job in query.order_by(BackgroundJob.id.desc()).limit(limit)]}), 200
+
+@api.route('/api/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_background_job(job_id):
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    job = db.session.get(BackgroundJob, job_id)
+    if not job or job.requested_by != lecturer.id: return jsonify({"success": False, "message": "Job not found."}), 404
+    return jsonify({"success": True, "job": jobs.serialize_job(job)}), 200
+
+@api.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_background_job(job_id):
+    lecturer, user_type = get_typed_user_from_jwt_v2()
+    if not lecturer or user_type != 'lecturer': return jsonify({"success": False, "message": "Authentication failed or not a lecturer."}), 401
+    job = db.session.get(BackgroundJob, job_id)
+    if not job or job.requested_by != lecturer.id: return jsonify({"success": False, "message": "Job not found."}), 404
+    if not jobs.cancel(job): return jsonify({"success": False, "message": f"Only queued jobs can be cancelled; this one is {job.status}."}), 409
+    db.session.commit()
+    return jsonify({"success": True, "job": jobs.serialize_job(job)}), 200
+
 # --- Resources API ---
-@app.route('/api/resources', methods=['GET'])
+@api.route('/api/resources', methods=['GET'])
 def get_all_advising_resources():
-    app.logger.info("Fetching all advising resources.")
+    current_app.logger.info("Fetching all advising resources.")
     try:
-        resources_query = AdvisingResource.query.order_by(AdvisingResource.category, AdvisingResource.title).all()
-        resources_data = [{"id": resource.id, "title": resource.title, "description": resource.description, "url": resource.url, "category": resource.category} for res in resources_query]
-        return jsonify({"success": True, "resources": resources_data}), 200
+        etag, payload = get_cached_resources_response('category') # Always from SQL (see repositories.py); a 304 costs no query at all
+        if request.if_none_match.contains_weak(etag): response = Response(status=304)
+        else: response = Response(payload, status=200, mimetype='application/json')
+        response.set_etag(etag, weak=True); response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
-        app.logger.error(f"Error fetching all advising resources: {str(e)}", exc_info=True)
+        current_app.logger.error(f"Error fetching all advising resources: {str(e)}", exc_info=True)
         return jsonify({"success": False, "message": "An error occurred while fetching resources."}), 500
 
 # --- CLI Commands ---
-try:
-    from seed import seed_data_command
-    app.cli.add_command(seed_data_command)
-except ImportError: app.logger.info("Skipping seed command registration (seed.py not found or import error)")
+# name -> "module:attribute", imported only when the command runs (see startup.py), so web
+# workers don't load seed/benchmark/snapshot code. Commands whose module can't be imported
+# (e.g. cohort-* without NumPy) still show up, and explain why when run.
+CLI_COMMANDS = {
+    'seed-data': 'seed:seed_data_command',
+    'rebuild-gpa': 'gpa_engine:rebuild_gpa_command',
+    'mail-dispatcher': 'mail_queue:mail_dispatcher_command',
+    'firestore-sync': 'firestore_cdc:firestore_sync_command',
+    'seed-grade-scale': 'grade_scale:seed_grade_scale_command',
+    'rebuild-analytics': 'course_analytics:rebuild_analytics_command',
+    'login-benchmark': 'credentials:login_benchmark_command',
+    'repository-benchmark': 'repositories:repository_benchmark_command',
+    'generate-university': 'benchmark:generate_university_command',
+    'load-test': 'benchmark:load_test_command',
+    'export-snapshot': 'snapshot:export_snapshot_command',
+    'import-snapshot': 'snapshot:import_snapshot_command',
+    'export-transcripts': 'transcript_export:export_transcripts_command',
+    'export-cohort-report': 'transcript_export:export_cohort_report_command',
+    'generate-documents': 'documents:generate_documents_command',
+    'worker': 'jobs:worker_command',
+    'enqueue': 'jobs:enqueue_command',
+    'jobs': 'jobs:jobs_command',
+    'cohort-analytics': 'cohort_analytics:cohort_analytics_command',
+    'cohort-benchmark': 'cohort_analytics:cohort_benchmark_command',
+    'startup-benchmark': 'startup:startup_benchmark_command',
+}
 
 # --- Global Error Handlers ---
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found_error(error): return jsonify({"success": False, "message": "Resource not found."}), 404
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
-    db.session.rollback(); app.logger.error(f"Internal Server Error: {str(error)}", exc_info=True)
+    db.session.rollback(); current_app.logger.error(f"Internal Server Error: {str(error)}", exc_info=True)
     return jsonify({"success": False, "message": "An internal server error occurred."}), 500
-@app.errorhandler(400)
+@api.app_errorhandler(400)
 def bad_request_error(error):
     message = error.description if hasattr(error, 'description') and error.description else "Bad request."
     return jsonify({"success": False, "message": message}), 400
 
+# --- App Factory ---
+PROFILES = ('development', 'production')
+FALLBACK_JWT_SECRET_KEY = 'fallback-super-secret-key-change-in-env'
+
+
+def resolve_profile(profile=None):
+    """'development' or 'production': the argument, else APP_PROFILE, else FLASK_ENV (anything but 'development' is production)."""
+    profile = profile or os.getenv('APP_PROFILE')
+    if profile is None: return 'development' if os.getenv('FLASK_ENV', 'development') == 'development' else 'production'
+    if profile not in PROFILES: raise ValueError(f"Unknown app profile {profile!r}; expected one of: {', '.join(PROFILES)}.")
+    return profile
+
+
+def engine_options(database_uri, profile):
+    """SQLALCHEMY_ENGINE_OPTIONS for a profile. The pool is per process, so size it for the threads in one worker."""
+    if make_url(database_uri).get_backend_name() == 'sqlite': return {} # File/memory database; nothing to pool or ping
+    production = profile == 'production'
+    return {
+        "pool_size": int(os.getenv('DB_POOL_SIZE', 10 if production else 5)), # Connections kept open
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', 10 if production else 5)), # Extra connections under bursts, closed when returned
+        "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', 10 if production else 30)), # Seconds to wait for a free connection
+        "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', 1800)), # Reconnect before server/proxy idle timeouts drop the connection
+        "pool_pre_ping": os.getenv('DB_POOL_PRE_PING', 'True' if production else 'False').lower() in ['true', '1', 't'], # Survive DB restarts/failovers
+    }
+
+
+def _configure(app, profile):
+    app.config['APP_PROFILE'] = profile
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///site.db')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], profile)
+
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', FALLBACK_JWT_SECRET_KEY)
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    app.config['JWT_HEADER_NAME'] = 'Authorization'
+    app.config['JWT_HEADER_TYPE'] = 'Bearer'
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES_HOURS', 1)))
+
+    app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.example.com')
+    app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() in ['true', '1', 't']
+    app.config['MAIL_USE_SSL'] = os.getenv('MAIL_USE_SSL', 'False').lower() in ['true', '1', 't']
+    app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME', 'your-email@example.com')
+    app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD', 'your-email-password')
+    app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER', ('Crawford Advising Portal', 'noreply@crawforduniversity.edu.ng'))
+
+    # Outbound mail queue (see mail_queue.py). Disable the in-process dispatcher when running `flask mail-dispatcher` separately.
+    app.config['MAIL_DISPATCHER_ENABLED'] = os.getenv('MAIL_DISPATCHER_ENABLED', 'True').lower() in ['true', '1', 't']
+    app.config['MAIL_DISPATCH_WORKERS'] = int(os.getenv('MAIL_DISPATCH_WORKERS', 2))
+    app.config['MAIL_DISPATCH_BATCH_SIZE'] = int(os.getenv('MAIL_DISPATCH_BATCH_SIZE', 50))
+    app.config['MAIL_DISPATCH_INTERVAL'] = float(os.getenv('MAIL_DISPATCH_INTERVAL', 5))
+    app.config['MAIL_MAX_ATTEMPTS'] = int(os.getenv('MAIL_MAX_ATTEMPTS', 5))
+    app.config['MAIL_RETRY_BASE_SECONDS'] = int(os.getenv('MAIL_RETRY_BASE_SECONDS', 30))
+    app.config['MAIL_RETRY_MAX_SECONDS'] = int(os.getenv('MAIL_RETRY_MAX_SECONDS', 3600))
+
+    app.config['RESOURCE_CACHE_MAX_AGE'] = int(os.getenv('RESOURCE_CACHE_MAX_AGE', 300)) # Seconds; 0 = only invalidate on change
+    app.config['PAGINATION_DEFAULT_LIMIT'] = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 25))
+    app.config['PAGINATION_MAX_LIMIT'] = int(os.getenv('PAGINATION_MAX_LIMIT', 100))
+    # Werkzeug method string, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'; older hashes are upgraded on login
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    app.config['IDENTITY_CACHE_SIZE'] = int(os.getenv('IDENTITY_CACHE_SIZE', 1024))
+    app.config['IDENTITY_CACHE_TTL'] = int(os.getenv('IDENTITY_CACHE_TTL', 60)) # Seconds a cached name/advisor is trusted
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() in ['true', '1', 't'] # Serves /metrics
+    app.config['SLOW_REQUEST_SECONDS'] = float(os.getenv('SLOW_REQUEST_SECONDS', 0)) # Log slower requests with their SQL; 0 = off
+    # Request profiling (see profiler.py): send "X-Profile: <PROFILER_TOKEN>" or sample a fraction of requests
+    app.config['PROFILER_TOKEN'] = os.getenv('PROFILER_TOKEN') # Unset = header trigger disabled
+    app.config['PROFILER_SAMPLE_RATE'] = float(os.getenv('PROFILER_SAMPLE_RATE', 0)) # 0..1
+    app.config['PROFILER_DIR'] = os.getenv('PROFILER_DIR') # Defaults to <instance>/profiles
+    app.config['PROFILER_MAX_PROFILES'] = int(os.getenv('PROFILER_MAX_PROFILES', 200))
+    app.config['PROFILER_INTERVAL_MS'] = float(os.getenv('PROFILER_INTERVAL_MS', 5)) # Stack sampling interval
+    app.config['GRADE_SCALE_MAX_AGE'] = int(os.getenv('GRADE_SCALE_MAX_AGE', 300)) # Seconds; 0 = only reload on change
+    # Incremental SQL -> Firestore sync (see firestore_cdc.py). Disable the in-process shipper when running `flask firestore-sync` separately.
+    app.config['FIRESTORE_SYNC_ENABLED'] = os.getenv('FIRESTORE_SYNC_ENABLED', 'False').lower() in ['true', '1', 't'] # Record changes in the outbox
+    app.config['FIRESTORE_SHIPPER_ENABLED'] = os.getenv('FIRESTORE_SHIPPER_ENABLED', 'True').lower() in ['true', '1', 't']
+    app.config['FIRESTORE_SYNC_INTERVAL'] = float(os.getenv('FIRESTORE_SYNC_INTERVAL', 2)) # Seconds between idle polls; commits wake it sooner
+    app.config['FIRESTORE_SYNC_BATCH_LIMIT'] = int(os.getenv('FIRESTORE_SYNC_BATCH_LIMIT', 5000)) # Outbox rows claimed per pass
+    app.config['FIRESTORE_SYNC_WORKERS'] = int(os.getenv('FIRESTORE_SYNC_WORKERS', 4)) # Concurrent batch writes
+    app.config['FIRESTORE_SYNC_TARGET'] = os.getenv('FIRESTORE_SYNC_TARGET', 'firestore') # 'memory' = in-memory stand-in, for trying it out
+    app.config['FIRESTORE_CREDENTIALS'] = os.getenv('FIRESTORE_CREDENTIALS') # Service-account key; defaults to backend/firebase-admin.json
+    # Where the read APIs are served from (see repositories.py): 'sql', or 'firestore' (kept current by the sync above; writes always go to SQL)
+    app.config['DATA_BACKEND'] = os.getenv('DATA_BACKEND', 'sql')
+    # Certificates and transcripts (see documents.py)
+    app.config['DOCUMENT_CACHE_DIR'] = os.getenv('DOCUMENT_CACHE_DIR') # Content-addressed PDFs; defaults to <instance>/documents
+    app.config['DOCUMENT_WORKERS'] = int(os.getenv('DOCUMENT_WORKERS', 0)) # Render processes per job; 0 = one per CPU
+    app.config['DOCUMENT_JOB_CHUNK_SIZE'] = int(os.getenv('DOCUMENT_JOB_CHUNK_SIZE', 200)) # Students loaded (and progress saved) per step
+    # Background jobs (see jobs.py), run by `flask worker`
+    app.config['JOB_QUEUES'] = os.getenv('JOB_QUEUES', 'default=4,maintenance=1,documents=1,reports=2') # queue=max jobs running at once, across all workers
+    app.config['JOB_WORKER_PROCESSES'] = int(os.getenv('JOB_WORKER_PROCESSES', 4)) # Jobs one worker runs at once
+    app.config['JOB_POLL_INTERVAL'] = float(os.getenv('JOB_POLL_INTERVAL', 1))
+    app.config['JOB_LEASE_SECONDS'] = int(os.getenv('JOB_LEASE_SECONDS', 300)) # Running jobs without a heartbeat for this long are retried
+    app.config['JOB_RETRY_BASE_SECONDS'] = int(os.getenv('JOB_RETRY_BASE_SECONDS', 30))
+    app.config['JOB_RETRY_MAX_SECONDS'] = int(os.getenv('JOB_RETRY_MAX_SECONDS', 3600))
+    app.config['JOB_OUTPUT_DIR'] = os.getenv('JOB_OUTPUT_DIR') # Files written by report jobs; defaults to <instance>/job-output
+    app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO' if profile == 'production' else None) # Unset = Flask's default (DEBUG under the reloader)
+
+
+def create_app(profile=None):
+    """Builds the app. Used by wsgi.py (production profile) and by `flask --app app ...`."""
+    global _IMPORT_STARTED
+    create_started = time.perf_counter()
+    profile = resolve_profile(profile)
+    app = Flask(__name__)
+    app.cli = LazyAppGroup(app.name, lazy_commands=CLI_COMMANDS)
+    _configure(app, profile)
+    if app.config['LOG_LEVEL']: app.logger.setLevel(app.config['LOG_LEVEL'])
+    if profile == 'production' and app.config['JWT_SECRET_KEY'] == FALLBACK_JWT_SECRET_KEY:
+        app.logger.error("JWT_SECRET_KEY is not set; tokens are signed with the public fallback key.")
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+    jwt.init_app(app)
+    mail.init_app(app)
+    mail_queue.init_app(app)
+    metrics.init_app(app)
+    firestore_cdc.init_app(app)
+    jobs.init_app(app)
+    profiler.init_app(app)
+
+    # REFINED CORS INITIALIZATION:
+    # This ensures CORS headers are applied directly to the app for /api/* routes.
+    # It explicitly allows requests from your frontend's origin (http://127.0.0.1:5500)
+    # and enables support for credentials (like JWT tokens).
+    CORS(app, resources={r"/api/*": {"origins": "http://127.0.0.1:5500", "supports_credentials": True}})
+
+    # The existing cors.init_app from extensions.py is still present,
+    # but the direct CORS(app, ...) call above is more robust for /api/* routes.
+    # The allowed_origins in the development block below is also corrected to 5500.
+    if profile == 'development':
+        allowed_origins = ["http://localhost:5500", "http://127.0.0.1:5500", "null"] # Corrected to 5500
+        # The cors.init_app from extensions is still called, but the direct CORS(app, ...)
+        # above will take precedence for the /api/* routes concerning the origin.
+        cors.init_app(app, origins=allowed_origins, methods=["GET", "HEAD", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"], allow_headers=["Content-Type", "Authorization", "X-Requested-With"], supports_credentials=True, expose_headers=["Content-Type", "Authorization"])
+        app.logger.info(f"CORS configured for development with origins: {allowed_origins} for all routes via extensions.")
+    else:
+        allowed_origins = [os.getenv("FRONTEND_URL", "https://your-production-domain.com")]
+        cors.init_app(app, origins=allowed_origins, methods=["GET", "HEAD", "POST", "OPTIONS", "PUT", "PATCH", "DELETE"], allow_headers=["Content-Type", "Authorization", "X-Requested-With"], supports_credentials=True, expose_headers=["Content-Type", "Authorization"])
+        app.logger.info(f"CORS configured for production with origins: {allowed_origins} for all routes via extensions.")
+
+    app.register_blueprint(api)
+    app.logger.info(f"Database: {make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True)}")
+    record_startup(app, _IMPORT_STARTED, create_started)
+    _IMPORT_STARTED = None # Later apps in this process didn't pay for the imports
+    return app
+
 # --- Main Execution ---
 if __name__ == '__main__':
     print("Starting Flask development server...")
-    app.run(debug=True)
+    create_app('development').run(debug=True)
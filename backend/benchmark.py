@@ -0,0 +1,295 @@
+# backend/benchmark.py
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+
+from extensions import db
+from models.course import Course
+from models.degree import Degree
+from models.enrollment import Enrollment
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.student import Student
+from gpa_engine import rebuild_gpa
+from course_analytics import rebuild_course_analytics
+from grade_scale import get_grade_scales
+from password_policy import hash_password
+
+# Benchmark harness: a synthetic university generator (bulk INSERTs, thousands of rows per
+# statement) and a scripted workload that replays a weighted mix of the API calls the
+# frontend makes, in-process through the Flask test client or over HTTP against a running
+# server, reporting p50/p95/p99 latency and throughput per endpoint.
+#   flask generate-university --students 5000
+#   flask load-test --requests 2000 --concurrency 8 [--url http://127.0.0.1:5000]
+
+INSERT_CHUNK_SIZE = 5000
+SYNTHETIC_PASSWORD = 'password123'
+SEMESTERS = [f"20{20 + i // 2}/20{21 + i // 2} - Semester {i % 2 + 1}" for i in range(8)]
+GRADE_WEIGHTS = {'A': 20, 'B': 25, 'C': 25, 'D': 15, 'E': 7, 'F': 7, 'DEX': 1}
+FIRST_NAMES = ['Ada', 'Chidi', 'Ngozi', 'Emeka', 'Funke', 'Tunde', 'Amaka', 'Bola', 'Ife', 'Kemi', 'Obi', 'Zainab']
+LAST_NAMES = ['Okafor', 'Adeyemi', 'Eze', 'Bello', 'Okonkwo', 'Balogun', 'Nwosu', 'Ibrahim', 'Afolabi', 'Uche']
+
+DEFAULT_MIX = {
+    'login': 5, 'student_dashboard': 20, 'student_results': 25, 'lecturer_dashboard': 15,
+    'advisee_notes': 20, 'add_note': 3, 'submit_grade': 5, 'resources': 7,
+}
+
+
+def _bulk_insert(model, rows):
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(insert(model), rows[i:i + INSERT_CHUNK_SIZE])
+
+
+def generate_university(prefix='SYN', degrees=10, lecturers=100, students=2000, courses=300, results_per_student=30,
+                        enrollments_per_student=6, notes_per_student=3, seed=0):
+    """Bulk-inserts a synthetic university and rebuilds the derived GPA and analytics tables. The caller commits.
+
+    Every generated account uses SYNTHETIC_PASSWORD. Returns the number of rows inserted per table.
+    """
+    if len(prefix) > 5:
+        raise ValueError("The prefix can be at most 5 characters (course codes are limited to 10).")
+    rng = random.Random(seed)
+    scales, now = get_grade_scales(), datetime.utcnow()
+    password_hash = hash_password(SYNTHETIC_PASSWORD) # Hashed once; hashing per row would dominate the run
+    tag = prefix.lower()
+
+    _bulk_insert(Degree, [{"name": f"{prefix} Degree {i}", "faculty": f"{prefix} Faculty {i % 4}"} for i in range(degrees)])
+    degree_ids = [d.id for d in db.session.query(Degree.id).filter(Degree.name.startswith(f"{prefix} Degree "))]
+    _bulk_insert(Lecturer, [{
+        "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES), "email": f"{tag}.lecturer{i}@synthetic.test",
+        "department": f"{prefix} Department {i % max(1, degrees)}", "office_location": f"Room {100 + i}", "password_hash": password_hash
+    } for i in range(lecturers)])
+    lecturer_ids = [l.id for l in db.session.query(Lecturer.id).filter(Lecturer.email.like(f"{tag}.lecturer%@synthetic.test"))]
+    _bulk_insert(Course, [{
+        "code": f"{prefix}{i:05d}", "title": f"Synthetic Course {i}", "units": rng.choice([1, 2, 3, 3, 4, 6]),
+        "status": rng.choice(['Compulsory', 'Elective']), "level": 100 * (1 + i % 5), "semester": 1 + i % 2
+    } for i in range(courses)])
+    course_rows = db.session.query(Course.id, Course.units).filter(Course.code.startswith(prefix)).all()
+    _bulk_insert(Student, [{
+        "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES), "email": f"{tag}.student{i}@synthetic.test",
+        "matric_number": f"{prefix}/{i:06d}", "degree_id": rng.choice(degree_ids), "advisor_id": rng.choice(lecturer_ids),
+        "password_hash": password_hash, "total_units": 0, "total_quality_points": 0.0,
+        "guardian_name": f"Guardian {i}", "guardian_email": f"{tag}.guardian{i}@synthetic.test", "guardian_relationship": 'Parent'
+    } for i in range(students)])
+    student_rows = db.session.query(Student.id, Student.degree_id, Student.advisor_id).filter(Student.matric_number.startswith(f"{prefix}/")).all()
+
+    grades, weights = list(GRADE_WEIGHTS), list(GRADE_WEIGHTS.values())
+    results, enrollments, notes = [], [], []
+    for student in student_rows:
+        taken = rng.sample(course_rows, min(len(course_rows), results_per_student + enrollments_per_student))
+        for course_id, _ in taken[:results_per_student]:
+            grade, semester = rng.choices(grades, weights)[0], rng.choice(SEMESTERS)
+            results.append({"student_id": student.id, "course_id": course_id, "grade": grade, "semester": semester, "gpa": scales.points(grade, student.degree_id, semester)})
+        for course_id, _ in taken[results_per_student:]:
+            enrollments.append({"student_id": student.id, "course_id": course_id, "academic_year": "2024/2025", "semester": rng.choice([1, 2]), "enrolled_at": now, "updated_at": now})
+        for n in range(notes_per_student):
+            created = now - timedelta(days=rng.randint(0, 700), minutes=n)
+            notes.append({"content": f"Synthetic advising note {n} for student {student.id}.", "student_id": student.id, "lecturer_id": student.advisor_id, "created_at": created, "updated_at": created})
+    _bulk_insert(Result, results)
+    _bulk_insert(Enrollment, enrollments)
+    _bulk_insert(AdvisingNote, notes)
+    rebuild_gpa()
+    rebuild_course_analytics()
+    return {"degrees": len(degree_ids), "lecturers": len(lecturer_ids), "courses": len(course_rows), "students": len(student_rows),
+            "results": len(results), "enrollments": len(enrollments), "notes": len(notes)}
+
+
+# --- Workload ---
+class TestClientTransport:
+    """Calls the app in-process."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def client(self):
+        test_client = self.app.test_client()
+
+        def send(method, path, payload=None, headers=None):
+            response = test_client.open(path, method=method, json=payload, headers=headers)
+            return response.status_code, len(response.get_data())
+        return send
+
+
+class HttpTransport:
+    """Calls a running server (e.g. `flask run` or gunicorn) over HTTP."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def client(self):
+        def send(method, path, payload=None, headers=None):
+            body = json.dumps(payload).encode('utf-8') if payload is not None else None
+            request = urllib.request.Request(self.base_url + path, data=body, method=method, headers={**(headers or {}), **({"Content-Type": "application/json"} if body else {})})
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    return response.status, len(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, len(e.read())
+        return send
+
+
+class Workload:
+    """The actors (synthetic students and lecturers with tokens) and the weighted operations they perform."""
+
+    def __init__(self, prefix, users, mix, seed=0):
+        rng = random.Random(seed)
+        students = db.session.query(Student.id, Student.matric_number, Student.first_name, Student.last_name, Student.advisor_id).filter(Student.matric_number.startswith(f"{prefix}/"), Student.advisor_id.isnot(None)).all()
+        if not students:
+            raise click.ClickException(f"No synthetic students with prefix {prefix}; run `flask generate-university` first.")
+        self.students = rng.sample(students, min(users, len(students)))
+        advisees = {}
+        for student in students:
+            advisees.setdefault(student.advisor_id, []).append(student.id)
+        lecturers = db.session.query(Lecturer.id, Lecturer.first_name, Lecturer.last_name).filter(Lecturer.id.in_(list(advisees)[:users * 4])).all()
+        self.lecturers = [(lecturer, advisees[lecturer.id]) for lecturer in rng.sample(lecturers, min(users, len(lecturers)))]
+        self.course_ids = [c.id for c in db.session.query(Course.id).filter(Course.code.startswith(prefix))]
+        # Tokens are minted the way /api/login does; a remote server must share JWT_SECRET_KEY
+        self.student_tokens = {s.id: create_access_token(identity=str(s.id), additional_claims={"user_type": "student", "user_name": f"{s.first_name} {s.last_name}"}) for s in self.students}
+        self.lecturer_tokens = {l.id: create_access_token(identity=str(l.id), additional_claims={"user_type": "lecturer", "user_name": f"{l.first_name} {l.last_name}"}) for l, _ in self.lecturers}
+        self.operations = [name for name in mix if mix[name] > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.run_tag = f"{int(time.time()) % 100000:05d}"
+
+    def next_request(self, rng, sequence):
+        """Picks an operation and returns (name, method, path, payload, headers)."""
+        operation = rng.choices(self.operations, self.weights)[0]
+        student = rng.choice(self.students)
+        lecturer, advisee_ids = rng.choice(self.lecturers)
+        as_student = {"Authorization": f"Bearer {self.student_tokens[student.id]}"}
+        as_lecturer = {"Authorization": f"Bearer {self.lecturer_tokens[lecturer.id]}"}
+        if operation == 'login':
+            return operation, 'POST', '/api/login', {"username": student.matric_number, "password": SYNTHETIC_PASSWORD}, None
+        if operation == 'student_dashboard':
+            return operation, 'GET', '/api/student/data', None, as_student
+        if operation == 'student_results':
+            return operation, 'GET', '/api/student/results', None, as_student
+        if operation == 'lecturer_dashboard':
+            return operation, 'GET', '/api/lecturer/data', None, as_lecturer
+        if operation == 'advisee_notes':
+            return operation, 'GET', f"/api/students/{rng.choice(advisee_ids)}/notes", None, as_lecturer
+        if operation == 'add_note':
+            return operation, 'POST', f"/api/students/{rng.choice(advisee_ids)}/notes", {"content": f"Load-test note {sequence}."}, as_lecturer
+        if operation == 'submit_grade': # A fresh semester label per submission, so it never collides with an existing result
+            return operation, 'POST', '/api/lecturer/submit-grade', {"student_id": rng.choice(advisee_ids), "course_id": rng.choice(self.course_ids), "grade": rng.choice('ABCDEF'), "semester": f"2099/2100 - Load {self.run_tag}-{sequence}"}, as_lecturer
+        return operation, 'GET', '/api/resources', None, None
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))]
+
+
+def run_workload(transport, workload, total_requests=None, duration=None, concurrency=4, seed=0):
+    """Replays the workload from `concurrency` threads. Returns (per-operation samples, wall time)."""
+    samples, lock, counter = {}, threading.Lock(), iter(range(10 ** 12))
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(index):
+        rng, send = random.Random(seed * 1000 + index), transport.client()
+        while True:
+            with lock:
+                sequence = next(counter)
+            if (total_requests is not None and sequence >= total_requests) or (deadline and time.perf_counter() >= deadline):
+                return
+            name, method, path, payload, headers = workload.next_request(rng, sequence)
+            started = time.perf_counter()
+            try:
+                status, size = send(method, path, payload, headers)
+            except Exception:
+                status, size = 599, 0 # Connection failures count as errors
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.setdefault(name, []).append((elapsed, status, size))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize_samples(samples, wall_time):
+    """Per-operation count, error count, latency percentiles (ms), mean payload and throughput."""
+    report = {}
+    for name, entries in sorted(samples.items()):
+        latencies = sorted(elapsed for elapsed, _, _ in entries)
+        report[name] = {
+            "count": len(entries), "errors": sum(1 for _, status, _ in entries if status >= 400),
+            "p50_ms": _percentile(latencies, 0.50) * 1000, "p95_ms": _percentile(latencies, 0.95) * 1000, "p99_ms": _percentile(latencies, 0.99) * 1000,
+            "mean_ms": sum(latencies) / len(latencies) * 1000, "mean_bytes": sum(size for _, _, size in entries) / len(entries),
+            "throughput": len(entries) / wall_time if wall_time else 0.0,
+        }
+    return report
+
+
+def _parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, (text or '').split(',')):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise click.BadParameter(f"Unknown operation '{name}'. Choose from: {', '.join(DEFAULT_MIX)}.")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+@click.command('generate-university')
+@click.option('--prefix', default='SYN', show_default=True, help='Prefix for codes, matric numbers and emails (keep it short).')
+@click.option('--degrees', type=int, default=10, show_default=True)
+@click.option('--lecturers', type=int, default=100, show_default=True)
+@click.option('--students', type=int, default=2000, show_default=True)
+@click.option('--courses', type=int, default=300, show_default=True)
+@click.option('--results-per-student', type=int, default=30, show_default=True)
+@click.option('--enrollments-per-student', type=int, default=6, show_default=True)
+@click.option('--notes-per-student', type=int, default=3, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+@with_appcontext
+def generate_university_command(prefix, degrees, lecturers, students, courses, results_per_student, enrollments_per_student, notes_per_student, seed):
+    """Bulk-generates a synthetic university for benchmarking (all passwords: password123)."""
+    click.echo(f"--- Generating synthetic university '{prefix}' ---")
+    started = time.perf_counter()
+    try:
+        counts = generate_university(prefix, degrees, lecturers, students, courses, results_per_student, enrollments_per_student, notes_per_student, seed)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error generating data (is the prefix already used?): {e}"); return
+    click.echo(', '.join(f"{count} {table}" for table, count in counts.items()) + f" in {time.perf_counter() - started:.1f}s.")
+
+
+@click.command('load-test')
+@click.option('--prefix', default='SYN', show_default=True, help='Prefix used with generate-university.')
+@click.option('--requests', 'total_requests', type=int, default=1000, show_default=True)
+@click.option('--duration', type=float, default=None, help='Run for this many seconds instead of a fixed request count.')
+@click.option('--concurrency', type=int, default=4, show_default=True)
+@click.option('--users', type=int, default=50, show_default=True, help='Distinct students and lecturers to act as.')
+@click.option('--mix', default='', help='Operation weights, e.g. "login=0,submit_grade=10".')
+@click.option('--url', default=None, help='Base URL of a running server; default is the in-process test client.')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('--json-output', type=click.Path(dir_okay=False), default=None, help='Also write the report as JSON.')
+@with_appcontext
+def load_test_command(prefix, total_requests, duration, concurrency, users, mix, url, seed, json_output):
+    """Replays a mix of API calls and reports p50/p95/p99 latency and throughput per endpoint."""
+    workload = Workload(prefix, users, _parse_mix(mix), seed)
+    db.session.remove() # Worker threads use their own sessions
+    transport = HttpTransport(url) if url else TestClientTransport(current_app._get_current_object())
+    click.echo(f"--- Load test: {'%d requests' % total_requests if not duration else '%.0fs' % duration}, {concurrency} thread(s), {url or 'test client'} ---")
+    samples, wall_time = run_workload(transport, workload, None if duration else total_requests, duration, concurrency, seed)
+    report = summarize_samples(samples, wall_time)
+    click.echo(f"{'operation':<20}{'count':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean B':>9}{'req/s':>9}")
+    for name, row in report.items():
+        click.echo(f"{name:<20}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['mean_bytes']:>9.0f}{row['throughput']:>9.1f}")
+    total = sum(row['count'] for row in report.values())
+    click.echo(f"Total: {total} requests in {wall_time:.1f}s ({total / wall_time if wall_time else 0:.1f} req/s), {sum(row['errors'] for row in report.values())} error(s).")
+    if json_output:
+        with open(json_output, 'w') as output:
+            json.dump({"wall_time_s": wall_time, "concurrency": concurrency, "target": url or 'test-client', "operations": report}, output, indent=2)
@@ -0,0 +1,196 @@
+# backend/cohort_analytics.py
+import time
+
+import click
+import numpy as np
+from flask.cli import with_appcontext
+
+from extensions import db
+from models.course import Course
+from models.degree import Degree
+from models.result import Result
+from models.student import Student
+from gpa_engine import DEGREE_CLASS_BANDS, degree_class
+
+# Whole-cohort GPA/CGPA, trend and class-of-degree computation on columnar NumPy arrays.
+# Results are loaded once as parallel arrays (student index, course units, grade points,
+# semester code) and every aggregate is a bincount group-by, so a faculty of tens of
+# thousands of students is a few vector passes instead of a Python loop per student.
+# Grade points come from Result.gpa, the same source gpa_engine uses; results without
+# points (e.g. DEX) carry no weight.
+
+DEFAULT_PROBATION_BELOW = 1.5
+LOAD_CHUNK_SIZE = 10000
+
+
+class ResultArrays:
+    """Columnar view of a set of results. semesters[semester_code] is the Result.semester string."""
+
+    def __init__(self, student_ids, student_index, units, points, semester_code, semesters):
+        self.student_ids = student_ids       # (n_students,) distinct Student.id values
+        self.student_index = student_index   # (n_results,) index into student_ids
+        self.units = units                   # (n_results,) float64
+        self.points = points                 # (n_results,) float64, NaN = no grade points
+        self.semester_code = semester_code   # (n_results,) index into semesters
+        self.semesters = semesters           # sorted list of semester strings (chronological)
+
+    def __len__(self):
+        return len(self.units)
+
+
+def build_result_arrays(raw_student_ids, units, points, semester_labels):
+    """Encodes raw per-result columns into a ResultArrays (factorizes students and semesters)."""
+    student_ids, student_index = np.unique(np.asarray(raw_student_ids, dtype=np.int64), return_inverse=True)
+    semesters, semester_code = np.unique(np.asarray(semester_labels, dtype=object).astype(str), return_inverse=True)
+    return ResultArrays(student_ids, student_index, np.asarray(units, dtype=np.float64), np.asarray(points, dtype=np.float64), semester_code, [str(s) for s in semesters])
+
+
+def load_result_arrays(degree_id=None, faculty=None, student_ids=None):
+    """Streams the matching results from the DB into columnar arrays (server-side chunks of LOAD_CHUNK_SIZE)."""
+    query = db.session.query(Result.student_id, Course.units, Result.gpa, Result.semester).join(Course, Result.course_id == Course.id)
+    if degree_id is not None or faculty:
+        query = query.join(Student, Result.student_id == Student.id)
+        if degree_id is not None: query = query.filter(Student.degree_id == degree_id)
+        if faculty: query = query.join(Degree, Student.degree_id == Degree.id).filter(Degree.faculty == faculty)
+    if student_ids is not None:
+        query = query.filter(Result.student_id.in_(student_ids))
+    raw_ids, units, points, semesters = [], [], [], []
+    for student_id, course_units, grade_points, semester in query.yield_per(LOAD_CHUNK_SIZE):
+        raw_ids.append(student_id); units.append(course_units or 0)
+        points.append(np.nan if grade_points is None else grade_points); semesters.append(semester)
+    return build_result_arrays(raw_ids, units, points, semesters)
+
+
+def classify_cgpa(cgpa):
+    """Vectorized class-of-degree label for each CGPA (None where the CGPA is NaN)."""
+    bounds = np.array([lower for lower, _ in DEGREE_CLASS_BANDS[1:]])
+    labels = np.array([label for _, label in DEGREE_CLASS_BANDS], dtype=object)
+    classes = labels[np.digitize(np.nan_to_num(cgpa, nan=0.0), bounds, right=False)]
+    classes[np.isnan(cgpa)] = None
+    return classes
+
+
+def compute_cohort(arrays, probation_below=DEFAULT_PROBATION_BELOW):
+    """Computes per-student semester GPAs, CGPA, latest trend delta, degree class and probation flag.
+
+    Returns a dict of NumPy arrays aligned with arrays.student_ids, plus the (n_students, n_semesters)
+    semester GPA matrix (NaN where a student has no graded units that semester).
+    """
+    n_students, n_semesters = len(arrays.student_ids), len(arrays.semesters)
+    graded = ~np.isnan(arrays.points) & (arrays.units > 0)
+    idx, sem = arrays.student_index[graded], arrays.semester_code[graded]
+    units, quality_points = arrays.units[graded], arrays.units[graded] * arrays.points[graded]
+
+    total_units = np.bincount(idx, weights=units, minlength=n_students)
+    total_qp = np.bincount(idx, weights=quality_points, minlength=n_students)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cgpa = np.where(total_units > 0, total_qp / total_units, np.nan)
+
+    # Semester GPA matrix via a combined (student, semester) group key
+    cell = idx * n_semesters + sem
+    sem_units = np.bincount(cell, weights=units, minlength=n_students * n_semesters).reshape(n_students, n_semesters)
+    sem_qp = np.bincount(cell, weights=quality_points, minlength=n_students * n_semesters).reshape(n_students, n_semesters)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        semester_gpa = np.where(sem_units > 0, sem_qp / sem_units, np.nan)
+
+    # Trend: latest semester GPA minus the one before it (both among semesters with graded units)
+    has_units = sem_units > 0
+    rows = np.arange(n_students)
+    last = n_semesters - 1 - np.argmax(has_units[:, ::-1], axis=1) if n_semesters else np.zeros(n_students, dtype=int)
+    before_last = has_units.copy()
+    if n_semesters: before_last[rows, last] = False
+    prev = n_semesters - 1 - np.argmax(before_last[:, ::-1], axis=1) if n_semesters else np.zeros(n_students, dtype=int)
+    valid_trend = before_last.any(axis=1) & has_units.any(axis=1) if n_semesters else np.zeros(n_students, dtype=bool)
+    latest_gpa = semester_gpa[rows, last] if n_semesters else np.full(n_students, np.nan)
+    trend = np.where(valid_trend, latest_gpa - (semester_gpa[rows, prev] if n_semesters else np.nan), np.nan)
+
+    return {
+        "student_ids": arrays.student_ids, "total_units": total_units, "cgpa": cgpa, "latest_gpa": latest_gpa,
+        "trend": trend, "degree_class": classify_cgpa(cgpa), "probation": ~np.isnan(cgpa) & (cgpa < probation_below),
+        "semester_gpa": semester_gpa,
+    }
+
+
+def compute_cohort_naive(arrays, probation_below=DEFAULT_PROBATION_BELOW):
+    """Reference per-student Python loop over result rows; used to validate and benchmark compute_cohort."""
+    per_student = {}
+    for i in range(len(arrays)):
+        units, points = float(arrays.units[i]), float(arrays.points[i])
+        if points != points or units <= 0: continue # NaN check
+        sems = per_student.setdefault(int(arrays.student_ids[arrays.student_index[i]]), {})
+        u, q = sems.get(int(arrays.semester_code[i]), (0.0, 0.0))
+        sems[int(arrays.semester_code[i])] = (u + units, q + units * points)
+    output = {}
+    for student_id, sems in per_student.items():
+        total_units = sum(u for u, _ in sems.values())
+        cgpa = sum(q for _, q in sems.values()) / total_units
+        ordered = [q / u for _, (u, q) in sorted(sems.items())]
+        output[student_id] = {"cgpa": cgpa, "trend": ordered[-1] - ordered[-2] if len(ordered) > 1 else None, "degree_class": degree_class(cgpa), "probation": cgpa < probation_below}
+    return output
+
+
+def summarize_cohort(computed, arrays, include_students=False):
+    """JSON-ready summary: class distribution, probation list and (optionally) every student's figures."""
+    cgpa, has_cgpa = computed['cgpa'], ~np.isnan(computed['cgpa'])
+    labels, counts = np.unique(computed['degree_class'][has_cgpa].astype(str), return_counts=True)
+    summary = {
+        "student_count": int(has_cgpa.sum()),
+        "mean_cgpa": round(float(cgpa[has_cgpa].mean()), 2) if has_cgpa.any() else None,
+        "degree_class_counts": {str(label): int(count) for label, count in zip(labels, counts)},
+        "probation_student_ids": [int(sid) for sid in computed['student_ids'][computed['probation']]],
+        "semesters": arrays.semesters,
+    }
+    if include_students:
+        summary["students"] = [{
+            "student_id": int(sid), "cgpa": round(float(c), 2), "total_units": int(u),
+            "latest_gpa": None if np.isnan(l) else round(float(l), 2), "trend": None if np.isnan(t) else round(float(t), 2),
+            "degree_class": dc, "probation": bool(p)
+        } for sid, c, u, l, t, dc, p in zip(computed['student_ids'], cgpa, computed['total_units'], computed['latest_gpa'], computed['trend'], computed['degree_class'], computed['probation']) if not np.isnan(c)]
+    return summary
+
+
+def synthetic_result_arrays(n_students, results_per_student=40, n_semesters=8, seed=0):
+    """Random cohort for benchmarking without a database."""
+    rng = np.random.default_rng(seed)
+    n = n_students * results_per_student
+    points = rng.choice(np.array([5.0, 4.0, 3.0, 2.0, 1.0, 0.0, np.nan]), size=n, p=[0.2, 0.25, 0.25, 0.15, 0.07, 0.07, 0.01])
+    return build_result_arrays(np.repeat(np.arange(1, n_students + 1), results_per_student), rng.choice([1, 2, 3, 4, 6], size=n), points,
+                               np.array([f"20{20 + s // 2}/20{21 + s // 2} - Semester {s % 2 + 1}" for s in range(n_semesters)])[rng.integers(0, n_semesters, size=n)])
+
+
+@click.command('cohort-analytics')
+@click.option('--degree-id', type=int, default=None, help='Only students in this degree.')
+@click.option('--faculty', default=None, help='Only students whose degree belongs to this faculty.')
+@click.option('--probation-below', type=float, default=DEFAULT_PROBATION_BELOW, show_default=True)
+@with_appcontext
+def cohort_analytics_command(degree_id, faculty, probation_below):
+    """Computes CGPAs, degree classes and the probation list for a cohort."""
+    started = time.perf_counter()
+    arrays = load_result_arrays(degree_id=degree_id, faculty=faculty)
+    loaded = time.perf_counter()
+    summary = summarize_cohort(compute_cohort(arrays, probation_below), arrays)
+    click.echo(f"Loaded {len(arrays)} results in {loaded - started:.2f}s, computed in {time.perf_counter() - loaded:.3f}s.")
+    click.echo(f"Students: {summary['student_count']}  Mean CGPA: {summary['mean_cgpa']}")
+    for _, label in reversed(DEGREE_CLASS_BANDS):
+        click.echo(f"  {label:<20} {summary['degree_class_counts'].get(label, 0)}")
+    click.echo(f"On probation (CGPA < {probation_below}): {len(summary['probation_student_ids'])}")
+
+
+@click.command('cohort-benchmark')
+@click.option('--students', type=int, default=20000, show_default=True)
+@click.option('--results-per-student', type=int, default=40, show_default=True)
+def cohort_benchmark_command(students, results_per_student):
+    """Benchmarks the vectorized cohort computation against the naive per-student loop."""
+    arrays = synthetic_result_arrays(students, results_per_student)
+    started = time.perf_counter()
+    computed = compute_cohort(arrays)
+    vectorized = time.perf_counter() - started
+    started = time.perf_counter()
+    naive = compute_cohort_naive(arrays)
+    loop = time.perf_counter() - started
+    sample = [i for i in range(0, len(arrays.student_ids), max(1, len(arrays.student_ids) // 1000))]
+    mismatches = sum(1 for i in sample if abs(naive[int(arrays.student_ids[i])]['cgpa'] - computed['cgpa'][i]) > 1e-9 or naive[int(arrays.student_ids[i])]['degree_class'] != computed['degree_class'][i])
+    click.echo(f"{students} students x {results_per_student} results ({len(arrays)} rows)")
+    click.echo(f"  NumPy group-by : {vectorized * 1000:9.1f} ms")
+    click.echo(f"  Python loop    : {loop * 1000:9.1f} ms  ({loop / vectorized:.1f}x slower)")
+    click.echo(f"  Spot-check mismatches: {mismatches}/{len(sample)}")
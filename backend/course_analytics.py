@@ -0,0 +1,138 @@
+# backend/course_analytics.py
+import json
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from extensions import db
+from models.course import Course
+from models.result import Result
+from models.course_grade_summary import CourseGradeSummary
+
+# Per-course, per-semester grade analytics kept as materialized running aggregates
+# (course_grade_summaries), so department dashboards read one row per course instead of
+# scanning the results table. Updated in the same transaction as every grade insert and
+# rebuildable in bulk with `flask rebuild-analytics`.
+
+FAIL_GRADE_LETTERS = frozenset({'F'}) # With any modifier: F+ (0.3 points on the default scale) and F- fail too
+
+
+def is_fail(grade, grade_points):
+    """A result fails on an F-family grade or zero grade points; results without points (e.g. DEX) neither pass nor fail."""
+    return grade.strip().upper()[:1] in FAIL_GRADE_LETTERS or grade_points == 0
+
+
+def _accumulate(totals, grade, grade_points, count=1, points_sum=None):
+    totals['result_count'] += count
+    totals['histogram'][grade] = totals['histogram'].get(grade, 0) + count
+    if grade_points is None:
+        return
+    totals['graded_count'] += count
+    totals['total_grade_points'] += points_sum if points_sum is not None else grade_points * count
+    if is_fail(grade, grade_points): totals['fail_count'] += count
+    else: totals['pass_count'] += count
+
+
+def _empty_totals():
+    return {"result_count": 0, "graded_count": 0, "total_grade_points": 0.0, "pass_count": 0, "fail_count": 0, "histogram": {}}
+
+
+def apply_results_to_analytics(entries):
+    """Adds newly inserted results, given as (course_id, semester, grade, grade_points), to the summaries.
+
+    One read (FOR UPDATE) of the affected summary rows; the caller commits.
+    """
+    deltas = {}
+    for course_id, semester, grade, grade_points in entries:
+        grade = (grade or '').strip().upper()
+        _accumulate(deltas.setdefault((course_id, semester), _empty_totals()), grade, None if grade_points is None else float(grade_points))
+    if not deltas:
+        return
+    course_ids = {course_id for course_id, _ in deltas}
+    semesters = {semester for _, semester in deltas}
+    existing = CourseGradeSummary.query.filter(CourseGradeSummary.course_id.in_(course_ids), CourseGradeSummary.semester.in_(semesters)).with_for_update().populate_existing().all()
+    summaries = {(row.course_id, row.semester): row for row in existing}
+    for (course_id, semester), delta in deltas.items():
+        row = summaries.get((course_id, semester))
+        if not row:
+            row = CourseGradeSummary(course_id=course_id, semester=semester, result_count=0, graded_count=0, total_grade_points=0.0, pass_count=0, fail_count=0, grade_histogram='{}')
+            db.session.add(row)
+        histogram = row.histogram()
+        for grade, count in delta['histogram'].items():
+            histogram[grade] = histogram.get(grade, 0) + count
+        row.grade_histogram = json.dumps(histogram, sort_keys=True)
+        row.result_count += delta['result_count']
+        row.graded_count += delta['graded_count']
+        row.total_grade_points += delta['total_grade_points']
+        row.pass_count += delta['pass_count']
+        row.fail_count += delta['fail_count']
+
+
+def rebuild_course_analytics(course_ids=None):
+    """Recomputes every summary from one grouped query over results. Returns the number of rows written; the caller commits."""
+    grouped = db.session.query(
+        Result.course_id, Result.semester, func.upper(func.trim(Result.grade)).label('grade'), Result.gpa.isnot(None).label('has_points'),
+        func.count(Result.id).label('count'), func.sum(Result.gpa).label('points'),
+        func.sum(db.case((Result.gpa == 0, 1), else_=0)).label('zero_points')
+    )
+    delete_query = CourseGradeSummary.query
+    if course_ids is not None:
+        grouped = grouped.filter(Result.course_id.in_(course_ids))
+        delete_query = delete_query.filter(CourseGradeSummary.course_id.in_(course_ids))
+    rows = grouped.group_by(Result.course_id, Result.semester, func.upper(func.trim(Result.grade)), Result.gpa.isnot(None)).all()
+
+    totals = {}
+    for row in rows:
+        t = totals.setdefault((row.course_id, row.semester), _empty_totals())
+        if not row.has_points:
+            _accumulate(t, row.grade, None, count=row.count); continue
+        # Within one grade the points are normally uniform; split out zero-point results so pass/fail stays exact
+        zero, nonzero = int(row.zero_points or 0), row.count - int(row.zero_points or 0)
+        if zero: _accumulate(t, row.grade, 0.0, count=zero, points_sum=0.0)
+        if nonzero: _accumulate(t, row.grade, float(row.points or 0) / nonzero, count=nonzero, points_sum=float(row.points or 0))
+
+    delete_query.delete(synchronize_session=False)
+    if totals:
+        db.session.execute(CourseGradeSummary.__table__.insert(), [{
+            "course_id": course_id, "semester": semester, "result_count": t['result_count'], "graded_count": t['graded_count'],
+            "total_grade_points": t['total_grade_points'], "pass_count": t['pass_count'], "fail_count": t['fail_count'],
+            "grade_histogram": json.dumps(t['histogram'], sort_keys=True)
+        } for (course_id, semester), t in totals.items()])
+    db.session.expire_all()
+    return len(totals)
+
+
+def serialize_summary(summary, course=None):
+    data = {
+        "semester": summary.semester, "result_count": summary.result_count, "graded_count": summary.graded_count,
+        "mean_grade_points": summary.mean_grade_points, "pass_count": summary.pass_count, "fail_count": summary.fail_count,
+        "pass_rate": round(summary.pass_count / (summary.pass_count + summary.fail_count), 3) if (summary.pass_count + summary.fail_count) else None,
+        "grade_histogram": summary.histogram()
+    }
+    if course is not None:
+        data.update({"course_id": course.id, "course_code": course.code, "course_title": course.title, "course_level": course.level})
+    return data
+
+
+def get_summaries(semester=None, code_prefix=None, level=None):
+    """Department-level view: one precomputed row per course (and semester), joined with its course."""
+    query = db.session.query(CourseGradeSummary, Course).join(Course, CourseGradeSummary.course_id == Course.id)
+    if semester: query = query.filter(CourseGradeSummary.semester == semester)
+    if code_prefix: query = query.filter(Course.code.startswith(code_prefix.strip().upper()))
+    if level is not None: query = query.filter(Course.level == level)
+    return [serialize_summary(summary, course) for summary, course in query.order_by(CourseGradeSummary.semester.desc(), Course.code).all()]
+
+
+@click.command('rebuild-analytics')
+@click.option('--course-id', 'course_ids', type=int, multiple=True, help='Only rebuild these courses (repeatable).')
+@with_appcontext
+def rebuild_analytics_command(course_ids):
+    """Rebuilds the per-course grade summaries from the results table."""
+    click.echo("--- Rebuilding course grade analytics from results ---")
+    try:
+        count = rebuild_course_analytics(list(course_ids) or None)
+        db.session.commit()
+        click.echo(f"Rebuilt {count} course/semester summaries.")
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error rebuilding analytics: {e}")
@@ -0,0 +1,96 @@
+# backend/credentials.py
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import literal, select, union_all, update
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from extensions import db
+from models.student import Student
+from models.lecturer import Lecturer
+from password_policy import hash_password, verify_password, needs_rehash
+
+# Login credential lookup. The identifier type is detected up front, so a login is one
+# indexed probe: matric numbers hit the unique index on students.matric_number, emails hit
+# the email indexes of both tables in a single UNION ALL statement. Only the columns needed
+# to check the password and issue the token are read; no ORM objects are loaded.
+# Hashes made under an older PASSWORD_HASH_METHOD are upgraded after a successful login.
+
+USER_MODELS = {"student": Student, "lecturer": Lecturer}
+
+
+def is_email(identifier):
+    return '@' in identifier
+
+
+def _credential_select(model, user_type, column, identifier):
+    return select(
+        literal(user_type).label('user_type'), model.id, model.first_name, model.last_name, model.password_hash
+    ).where(column == identifier)
+
+
+def find_credentials(identifier):
+    """Candidate accounts for a login identifier as rows of (user_type, id, first_name, last_name, password_hash).
+
+    Students come before lecturers, matching the order in which logins have always been tried.
+    """
+    identifier = str(identifier)
+    if is_email(identifier):
+        statement = union_all(
+            _credential_select(Student, "student", Student.email, identifier),
+            _credential_select(Lecturer, "lecturer", Lecturer.email, identifier),
+        )
+    else:
+        statement = _credential_select(Student, "student", Student.matric_number, identifier)
+    rows = db.session.execute(statement).all()
+    return sorted(rows, key=lambda row: row.user_type != "student")
+
+
+def authenticate(identifier, password):
+    """Returns the matching credential row, or None. Rehashes (and commits) outdated password hashes."""
+    for row in find_credentials(identifier):
+        if not verify_password(row.password_hash, password):
+            continue
+        if needs_rehash(row.password_hash):
+            model = USER_MODELS[row.user_type]
+            try:
+                db.session.execute(update(model).where(model.id == row.id).values(password_hash=hash_password(password)))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.error(f"Could not upgrade the password hash of {row.user_type} {row.id}.", exc_info=True)
+        return row
+    return None
+
+
+@click.command('login-benchmark')
+@click.option('--username', required=True, help='Matric number or email of an existing account.')
+@click.option('--password', required=True)
+@click.option('--requests', 'request_count', type=int, default=20, show_default=True)
+@click.option('--method', 'methods', multiple=True, help='Hash method to time (repeatable), e.g. pbkdf2:sha256:600000.')
+@with_appcontext
+def login_benchmark_command(username, password, request_count, methods):
+    """Measures login throughput through the API and the cost of each password-hash method."""
+    configured = current_app.config.get('PASSWORD_HASH_METHOD')
+    click.echo(f"--- Password hash cost (configured: {configured}) ---")
+    for method in dict.fromkeys(methods or (configured, 'pbkdf2:sha256', 'scrypt')):
+        password_hash = generate_password_hash(password, method=method)
+        started = time.perf_counter()
+        for _ in range(5):
+            check_password_hash(password_hash, password)
+        click.echo(f"  {method:<28} {(time.perf_counter() - started) / 5 * 1000:8.1f} ms per verify")
+
+    click.echo(f"--- {request_count} logins via POST /api/login ---")
+    client = current_app.test_client()
+    failures, timings = 0, []
+    for _ in range(request_count):
+        started = time.perf_counter()
+        response = client.post('/api/login', json={"username": username, "password": password})
+        timings.append(time.perf_counter() - started)
+        if response.status_code != 200: failures += 1
+    timings.sort()
+    total = sum(timings)
+    click.echo(f"  Throughput: {request_count / total:.1f} logins/s  p50: {timings[len(timings) // 2] * 1000:.1f} ms  "
+               f"max: {timings[-1] * 1000:.1f} ms  failures: {failures}")
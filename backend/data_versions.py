@@ -0,0 +1,124 @@
+# backend/data_versions.py
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, request
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+
+from extensions import db
+from models.data_version import DataVersion
+from models.course import Course
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.semester_gpa import StudentSemesterGpa
+from models.student import Student
+
+# Change counters behind the ETag / Last-Modified headers of the polled read endpoints.
+# ORM changes are mapped to scopes ("results:<student_id>", "notes:<student_id>",
+# "student:<id>", "advisees:<lecturer_id>", "lecturers", "degrees", "courses") during the
+# flush and every touched scope is bumped once, in the same transaction, right before
+# commit. Code that writes with bulk Core statements (which skip mapper events) calls
+# touch() itself. The counters live in the database, so every worker process agrees on them.
+# An endpoint reads its scopes in one small query and answers 304 when the client's
+# validator still matches, before running any of its real queries.
+
+GLOBAL_SCOPE = 'global' # Part of every validator; bumped by bulk rebuilds that touch many rows
+
+
+def touch(*scopes, session=None):
+    """Marks scopes as changed; they are bumped when the session commits."""
+    session = session or db.session()
+    session.info.setdefault('touched_scopes', set()).update(scopes)
+
+
+def _scopes_for(target):
+    if isinstance(target, (Result, StudentSemesterGpa)):
+        return {f'results:{target.student_id}'}
+    if isinstance(target, AdvisingNote):
+        return {f'notes:{target.student_id}'}
+    if isinstance(target, Student):
+        scopes = {f'student:{target.id}'}
+        advisor_history = inspect(target).attrs.advisor_id.history
+        for advisor_id in (*advisor_history.deleted, *advisor_history.unchanged, *advisor_history.added): # Old and new advisor
+            if advisor_id is not None: scopes.add(f'advisees:{advisor_id}')
+        return scopes
+    if isinstance(target, Lecturer):
+        return {'lecturers'}
+    if isinstance(target, Degree):
+        return {'degrees'}
+    if isinstance(target, Course):
+        return {'courses'}
+    return set()
+
+
+def _flag_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        touch(*_scopes_for(target), session=session)
+
+for _model in (Result, StudentSemesterGpa, AdvisingNote, Student, Lecturer, Degree, Course):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _flag_change)
+
+
+def _bump(session, scopes):
+    now = datetime.utcnow()
+    scopes = sorted(scopes) # Consistent lock order between concurrent transactions
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        upsert = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(DataVersion)
+        upsert = upsert.on_conflict_do_update(index_elements=['scope'], set_={"version": DataVersion.version + 1, "updated_at": upsert.excluded.updated_at})
+        session.execute(upsert, [{"scope": scope, "version": 1, "updated_at": now} for scope in scopes])
+        return
+    table = DataVersion.__table__
+    for scope in scopes:
+        updated = session.execute(table.update().where(table.c.scope == scope).values(version=table.c.version + 1, updated_at=now))
+        if not updated.rowcount:
+            session.execute(table.insert().values(scope=scope, version=1, updated_at=now))
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_on_commit(session):
+    session.flush() # Pending ORM changes flag their scopes here
+    scopes = session.info.pop('touched_scopes', None)
+    if scopes:
+        _bump(session, scopes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('touched_scopes', None)
+
+
+# --- Conditional responses ---
+class Validators:
+    """ETag / Last-Modified for a response built from the given scopes (plus anything else it depends on)."""
+
+    def __init__(self, scopes, *extra):
+        scopes = (GLOBAL_SCOPE, *scopes)
+        versions = {row.scope: (row.version, row.updated_at) for row in db.session.query(DataVersion.scope, DataVersion.version, DataVersion.updated_at).filter(DataVersion.scope.in_(scopes))}
+        fingerprint = ';'.join(f"{scope}={versions.get(scope, (0, None))[0]}" for scope in scopes)
+        fingerprint += '|' + '|'.join(str(part) for part in extra)
+        self.etag = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:20]
+        modified = [updated_at for _, updated_at in versions.values()]
+        self.last_modified = max(modified).replace(tzinfo=timezone.utc, microsecond=0) if modified else None
+
+    def not_modified(self):
+        """True when the request's If-None-Match (or, without one, If-Modified-Since) still matches."""
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        since = request.if_modified_since
+        return bool(since and self.last_modified and self.last_modified <= since)
+
+    def apply(self, response, cache_control='private, no-cache'):
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified: response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = cache_control # Clients may keep a copy but must revalidate every time
+        return response
+
+    def not_modified_response(self):
+        return self.apply(current_app.response_class(status=304))
@@ -0,0 +1,254 @@
+# backend/document_render.py
+import hashlib
+import os
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+from string import Template
+
+# PDF certificates and transcripts, rendered without a PDF library.
+# This module has no Flask or DB imports: documents.py loads the data in the parent process
+# and hands plain dicts to render_to_file() in worker processes, where each template is
+# compiled once (lru_cache) and reused for every document that worker renders.
+#
+# Templates are a small line-based layout language:
+#   @size W H                     page size in points (A4 portrait is 595 842)
+#   @body TOP BOTTOM              vertical band the flowing sections are laid out in
+#   [name] height=N               starts a section; [page] is drawn on every page at absolute
+#                                 positions, [first] on the first page only; any other section
+#                                 is a flowing block placed at the cursor (y is relative to it)
+#   text X Y SIZE FONT ALIGN MAXW | content with $placeholders   (FONT: regular/bold,
+#                                 ALIGN: left/center/right, MAXW: truncate width, 0 = none)
+#   line X1 Y1 X2 Y2 WIDTH
+#   rect X Y W H WIDTH
+# $page and $pages are available in every section. Values are substituted with
+# string.Template, so data can't reach attribute lookups.
+
+CERTIFICATE_TEMPLATE = """
+@size 842 595
+[first]
+rect 30 30 782 535 3
+rect 40 40 762 515 1
+text 421 480 30 bold center 0 | Certificate of Academic Record
+text 421 430 14 regular center 0 | This is to certify that
+text 421 390 26 bold center 700 | $student_name
+text 421 362 12 regular center 0 | Matriculation number $matric_number
+text 421 320 14 regular center 0 | has completed the programme of study leading to
+text 421 290 20 bold center 700 | $degree
+text 421 266 12 regular center 700 | $faculty
+text 421 222 14 regular center 0 | with a cumulative grade point average of $cgpa ($degree_class),
+text 421 202 14 regular center 0 | having earned $total_units units across $semester_count semester(s).
+line 120 110 320 110 1
+text 220 96 10 regular center 0 | Registrar
+line 522 110 722 110 1
+text 622 96 10 regular center 0 | Academic Advisor: $advisor
+text 421 60 8 regular center 0 | Record as at $last_semester
+"""
+
+TRANSCRIPT_TEMPLATE = """
+@size 595 842
+@body 700 70
+[page]
+text 50 800 16 bold left 0 | Academic Transcript
+text 545 800 9 regular right 0 | Page $page of $pages
+text 50 780 10 regular left 300 | $student_name ($matric_number)
+text 545 780 10 regular right 240 | $degree
+line 50 770 545 770 1
+text 297 40 8 regular center 0 | This transcript lists every recorded result. Grade points are on the 5.0 scale.
+[first]
+text 50 750 10 regular left 0 | Faculty: $faculty
+text 50 735 10 regular left 0 | Academic advisor: $advisor
+text 545 750 10 regular right 0 | CGPA: $cgpa
+text 545 735 10 regular right 0 | Class: $degree_class
+[semester] height=34
+text 50 -18 11 bold left 0 | $semester
+text 50 -31 8 bold left 0 | CODE
+text 120 -31 8 bold left 0 | COURSE TITLE
+text 420 -31 8 bold right 0 | UNITS
+text 470 -31 8 bold center 0 | GRADE
+text 545 -31 8 bold right 0 | POINTS
+[row] height=14
+text 50 -11 9 regular left 65 | $course_code
+text 120 -11 9 regular left 270 | $course_title
+text 420 -11 9 regular right 0 | $units
+text 470 -11 9 regular center 0 | $grade
+text 545 -11 9 regular right 0 | $grade_points
+[semester_total] height=18
+line 50 -4 545 -4 0.5
+text 545 -14 9 bold right 0 | Units $units    GPA $gpa
+[summary] height=50
+line 50 -14 545 -14 1
+text 50 -30 11 bold left 0 | Total units: $total_units
+text 545 -30 11 bold right 0 | CGPA: $cgpa ($degree_class)
+"""
+
+TEMPLATE_SOURCES = {'certificate': CERTIFICATE_TEMPLATE, 'transcript': TRANSCRIPT_TEMPLATE}
+
+# Advance widths (1/1000 em) of the standard Helvetica fonts for characters 32..126
+_WIDTHS = {
+    'regular': (278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+                556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+                1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+                667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+                333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+                556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584),
+    'bold': (278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+             556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+             975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+             667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+             333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+             611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584),
+}
+_FONT_RESOURCES = {'regular': 'F1', 'bold': 'F2'}
+
+Section = namedtuple('Section', 'height ops')
+CompiledTemplate = namedtuple('CompiledTemplate', 'width height body_top body_bottom sections version')
+
+
+class TemplateError(ValueError):
+    """Raised for a malformed template source."""
+
+
+def _compile_op(line):
+    kind, _, rest = line.partition(' ')
+    if kind == 'text':
+        layout, separator, content = rest.partition('|')
+        parts = layout.split()
+        if not separator or len(parts) != 6 or parts[3] not in _FONT_RESOURCES or parts[4] not in ('left', 'center', 'right'):
+            raise TemplateError(f"Bad text line: {line}")
+        x, y, size = (float(value) for value in parts[:3])
+        return ('text', x, y, size, parts[3], parts[4], float(parts[5]), Template(content.strip()))
+    numbers = tuple(float(value) for value in rest.split())
+    if (kind, len(numbers)) not in (('line', 5), ('rect', 5)):
+        raise TemplateError(f"Bad {kind} line: {line}")
+    return (kind, *numbers)
+
+
+def compile_template(source):
+    """Parses a template source into a CompiledTemplate."""
+    width, height, body_top, body_bottom = 595.0, 842.0, 0.0, 0.0
+    sections, current = {}, None
+    for raw in source.splitlines():
+        line = raw.strip()
+        if not line: continue
+        if line.startswith('@size'): width, height = (float(value) for value in line.split()[1:3])
+        elif line.startswith('@body'): body_top, body_bottom = (float(value) for value in line.split()[1:3])
+        elif line.startswith('['):
+            name, _, options = line[1:].partition(']')
+            section_height = float(options.strip().split('=', 1)[1]) if 'height=' in options else 0.0
+            current = sections[name] = Section(section_height, [])
+        elif current is None: raise TemplateError(f"Drawing outside a section: {line}")
+        else: current.ops.append(_compile_op(line))
+    version = hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+    return CompiledTemplate(width, height, body_top, body_bottom, {name: Section(s.height, tuple(s.ops)) for name, s in sections.items()}, version)
+
+
+@lru_cache(maxsize=None)
+def get_template(kind):
+    """The compiled template for a document kind; compiled once per process."""
+    return compile_template(TEMPLATE_SOURCES[kind])
+
+
+def template_version(kind):
+    return get_template(kind).version
+
+
+def text_width(text, font, size):
+    widths = _WIDTHS[font]
+    return sum(widths[ord(c) - 32] if 32 <= ord(c) <= 126 else 556 for c in text) * size / 1000
+
+
+def _fit(text, font, size, max_width):
+    if not max_width or text_width(text, font, size) <= max_width: return text
+    widths, budget, kept = _WIDTHS[font], max_width * 1000 / size - 3 * _WIDTHS[font][ord('.') - 32], 0
+    for count, c in enumerate(text):
+        budget -= widths[ord(c) - 32] if 32 <= ord(c) <= 126 else 556
+        if budget < 0: break
+        kept = count + 1
+    return text[:kept].rstrip() + '...'
+
+
+def _pdf_string(text):
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _draw(ops, values, offset_y, out):
+    for op in ops:
+        if op[0] == 'text':
+            _, x, y, size, font, align, max_width, template = op
+            text = _fit(template.safe_substitute(values), font, size, max_width)
+            if align != 'left':
+                width = text_width(text, font, size)
+                x -= width / 2 if align == 'center' else width
+            out.append(b'BT /%s %g Tf %.2f %.2f Td %s Tj ET' % (_FONT_RESOURCES[font].encode(), size, x, y + offset_y, _pdf_string(text)))
+        elif op[0] == 'line':
+            _, x1, y1, x2, y2, width = op
+            out.append(b'%g w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1 + offset_y, x2, y2 + offset_y))
+        else:
+            _, x, y, w, h, width = op
+            out.append(b'%g w %.2f %.2f %.2f %.2f re S' % (width, x, y + offset_y, w, h))
+
+
+def layout(template, blocks):
+    """Places flowing blocks [(section, values)] on pages; returns [[(section, values, cursor_y)], ...]."""
+    pages, current, cursor = [], [], template.body_top
+    for name, values in blocks:
+        height = template.sections[name].height
+        if current and cursor - height < template.body_bottom:
+            pages.append(current); current, cursor = [], template.body_top
+        current.append((name, values, cursor))
+        cursor -= height
+    pages.append(current)
+    return pages
+
+
+def render_pdf(kind, context, blocks=()):
+    """Renders one document to PDF bytes. context fills every section; blocks are the flowing sections."""
+    template = get_template(kind)
+    pages = layout(template, blocks)
+    streams = []
+    for number, placed in enumerate(pages, start=1):
+        values = {**context, 'page': number, 'pages': len(pages)}
+        out = []
+        for fixed in ('page', 'first') if number == 1 else ('page',):
+            if fixed in template.sections: _draw(template.sections[fixed].ops, values, 0, out)
+        for name, block_values, cursor in placed:
+            _draw(template.sections[name].ops, {**values, **block_values}, cursor, out)
+        streams.append(zlib.compress(b'\n'.join(out)))
+    return build_pdf(streams, template.width, template.height)
+
+
+def build_pdf(streams, width, height):
+    """Assembles a PDF from Flate-compressed page content streams (Helvetica and Helvetica-Bold)."""
+    page_ids = [5 + 2 * i for i in range(len(streams))]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % pid for pid in page_ids), len(streams)),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    for page_id, stream in zip(page_ids, streams):
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %g %g] /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>' % (width, height, page_id + 1))
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+    out, offsets = [b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'], []
+    position = len(out[0])
+    for number, body in enumerate(objects, start=1):
+        offsets.append(position)
+        chunk = b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        out.append(chunk); position += len(chunk)
+    out.append(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    out.extend(b'%010d 00000 n \n' % offset for offset in offsets)
+    out.append(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n' % (len(objects) + 1, position))
+    return b''.join(out)
+
+
+def render_to_file(kind, context, blocks, path):
+    """Worker entry point: renders a document and atomically writes it to path. Returns the size in bytes."""
+    data = render_pdf(kind, context, blocks)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+    return len(data)
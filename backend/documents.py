@@ -0,0 +1,290 @@
+# backend/documents.py
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from extensions import db
+from models.course import Course
+from models.degree import Degree
+from models.document_job import DocumentJob
+from models.lecturer import Lecturer
+from models.result import Result
+from models.semester_gpa import StudentSemesterGpa
+from models.student import Student
+from gpa_engine import degree_class
+from document_render import render_to_file, template_version
+from jobs import enqueue
+
+# Certificate and transcript generation.
+# Data for a chunk of students is loaded in the parent process with three queries (students,
+# results, semester GPAs) and turned into plain dicts; rendering runs in a ProcessPoolExecutor
+# (document_render.render_to_file), so a graduating class uses every core and no worker ever
+# touches the DB. The next chunk is loaded while the previous one renders.
+#
+# Outputs are content-addressed: the file name is the SHA-256 of the document kind, the
+# template version and the data. A reprint of an unchanged record is a file lookup, and
+# any change to the student's results, names or the template produces a new document.
+# Files live under DOCUMENT_CACHE_DIR/<2 hex>/<digest>.pdf; each job's per-student list is
+# written to DOCUMENT_CACHE_DIR/jobs/<id>.json. Jobs started from the API run in `flask worker`
+# (queue "documents"); `flask generate-documents` runs one in the foreground. A lecturer's
+# jobs cover their own advisees, and GET /api/documents/<digest> only serves a digest listed
+# in one of their completed jobs, for a student they still advise.
+#
+# Config (see app.py): DOCUMENT_CACHE_DIR, DOCUMENT_WORKERS, DOCUMENT_JOB_CHUNK_SIZE.
+
+DOCUMENT_KINDS = ('certificate', 'transcript')
+MAX_JOB_STUDENTS = 20000
+_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class DocumentError(ValueError):
+    """Raised for an invalid document request; endpoints answer it with a 400."""
+
+
+def parse_document_request(data, default_advisor_id=None):
+    """Validates {"kind", "filter": {degree_id, faculty, advisor_id, student_ids, min_units}};
+    default_advisor_id is used when filter.advisor_id is not given."""
+    kind = data.get('kind')
+    if kind not in DOCUMENT_KINDS:
+        raise DocumentError(f"kind must be one of: {', '.join(DOCUMENT_KINDS)}.")
+    filters = data.get('filter') or {}
+    if not isinstance(filters, dict):
+        raise DocumentError("filter must be an object.")
+    parsed = {}
+    try:
+        for name in ('degree_id', 'advisor_id', 'min_units'):
+            if filters.get(name) is not None: parsed[name] = int(filters[name])
+        if filters.get('student_ids') is not None: parsed['student_ids'] = sorted({int(i) for i in filters['student_ids']})
+    except (TypeError, ValueError):
+        raise DocumentError("filter.degree_id, advisor_id and min_units must be integers and student_ids a list of integers.")
+    if filters.get('faculty'): parsed['faculty'] = str(filters['faculty'])
+    if default_advisor_id is not None: parsed.setdefault('advisor_id', default_advisor_id)
+    if not set(parsed) - {'min_units'}:
+        raise DocumentError("Provide filter.degree_id, faculty, advisor_id or student_ids.")
+    return kind, parsed
+
+
+def students_not_advised_by(advisor_id, student_ids):
+    """The student_ids (that exist) whose advisor is someone else, in id order."""
+    if not student_ids: return []
+    statement = select(Student.id).where(Student.id.in_(student_ids), Student.advisor_id.is_distinct_from(advisor_id))
+    return [row[0] for row in db.session.execute(statement.order_by(Student.id))]
+
+
+def select_document_students(filters):
+    """Ids of the students a job covers, in id order. min_units selects e.g. a graduating class."""
+    statement = select(Student.id).outerjoin(Degree, Student.degree_id == Degree.id)
+    if 'degree_id' in filters: statement = statement.where(Student.degree_id == filters['degree_id'])
+    if 'faculty' in filters: statement = statement.where(Degree.faculty == filters['faculty'])
+    if 'advisor_id' in filters: statement = statement.where(Student.advisor_id == filters['advisor_id'])
+    if 'student_ids' in filters: statement = statement.where(Student.id.in_(filters['student_ids']))
+    if 'min_units' in filters: statement = statement.where(Student.total_units >= filters['min_units'])
+    return [row[0] for row in db.session.execute(statement.order_by(Student.id))]
+
+
+def _number(value):
+    return f"{value:.2f}" if value is not None else "N/A"
+
+
+def load_document_data(kind, student_ids):
+    """Returns {student_id: (matric_number, context, blocks)} for render_pdf, in three queries."""
+    students = db.session.execute(
+        select(Student.id, Student.first_name, Student.last_name, Student.matric_number, Student.gpa, Student.total_units,
+               Degree.name, Degree.faculty, (Lecturer.first_name + " " + Lecturer.last_name))
+        .outerjoin(Degree, Student.degree_id == Degree.id).outerjoin(Lecturer, Student.advisor_id == Lecturer.id)
+        .where(Student.id.in_(student_ids))
+    ).all()
+    results = {}
+    for row in db.session.execute(
+        select(Result.student_id, Result.semester, Course.code, Course.title, Course.units, Result.grade, Result.gpa)
+        .join(Course, Result.course_id == Course.id).where(Result.student_id.in_(student_ids))
+        .order_by(Result.student_id, Result.semester, Course.code, Result.id)
+    ):
+        results.setdefault(row[0], []).append(row)
+    semester_totals = {(row.student_id, row.semester): row for row in StudentSemesterGpa.query.filter(StudentSemesterGpa.student_id.in_(student_ids))}
+
+    documents = {}
+    for sid, first_name, last_name, matric_number, cgpa, total_units, degree, faculty, advisor in students:
+        rows = results.get(sid, [])
+        semesters = list(dict.fromkeys(row.semester for row in rows))
+        context = {
+            "student_name": f"{first_name} {last_name}", "matric_number": matric_number, "degree": degree or "Undeclared",
+            "faculty": faculty or "", "advisor": advisor or "Unassigned", "cgpa": _number(cgpa),
+            "degree_class": degree_class(cgpa) or "Not classified", "total_units": total_units or 0,
+            "semester_count": len(semesters), "last_semester": semesters[-1] if semesters else "N/A",
+        }
+        blocks = []
+        if kind == 'transcript':
+            for semester in semesters:
+                blocks.append(('semester', {"semester": semester}))
+                blocks.extend(('row', {"course_code": row.code, "course_title": row.title, "units": row.units, "grade": row.grade, "grade_points": _number(row.gpa)})
+                              for row in rows if row.semester == semester)
+                totals = semester_totals.get((sid, semester))
+                blocks.append(('semester_total', {"units": totals.total_units if totals else 0, "gpa": _number(totals.gpa if totals else None)}))
+            blocks.append(('summary', {}))
+        documents[sid] = (matric_number, context, blocks)
+    return documents
+
+
+def document_digest(kind, context, blocks):
+    payload = json.dumps([kind, template_version(kind), context, blocks], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cache_dir():
+    return current_app.config.get('DOCUMENT_CACHE_DIR') or os.path.join(current_app.instance_path, 'documents')
+
+
+def document_path(digest):
+    """Cache path for a digest, or None for anything that isn't one (it ends up in a file path)."""
+    if not _DIGEST.match(digest or ''): return None
+    return os.path.join(_cache_dir(), digest[:2], f"{digest}.pdf")
+
+
+def get_document(kind, student_id):
+    """Renders (or reuses) one student's document in-process. Returns (digest, path, matric_number) or None."""
+    documents = load_document_data(kind, [student_id])
+    if student_id not in documents: return None
+    matric_number, context, blocks = documents[student_id]
+    digest = document_digest(kind, context, blocks)
+    path = document_path(digest)
+    if not os.path.exists(path): render_to_file(kind, context, blocks, path)
+    return digest, path, matric_number
+
+
+def _manifest_path(job_id):
+    return os.path.join(_cache_dir(), 'jobs', f"{job_id}.json")
+
+
+def find_job_document(digest, requested_by):
+    """The manifest entry for digest in one of requested_by's completed jobs (newest first), or None."""
+    job_ids = db.session.scalars(select(DocumentJob.id).where(DocumentJob.requested_by == requested_by, DocumentJob.status == 'completed').order_by(DocumentJob.id.desc()))
+    for job_id in job_ids:
+        if not os.path.exists(_manifest_path(job_id)): continue
+        with open(_manifest_path(job_id), encoding='utf-8') as handle:
+            entry = next((entry for entry in json.load(handle) if entry['digest'] == digest), None)
+        if entry: return entry
+    return None
+
+
+def create_document_job(kind, filters, requested_by=None):
+    """Adds a pending job to the session; queue_document_job() hands it to a worker. The caller commits."""
+    job = DocumentJob(kind=kind, filters=json.dumps(filters), requested_by=requested_by, status='pending', total=0, rendered=0, reused=0, failed=0)
+    db.session.add(job)
+    return job
+
+
+def _collect(job, futures, manifest):
+    for future in as_completed(futures):
+        student_id, matric_number, digest = futures[future]
+        try:
+            future.result()
+            job.rendered += 1
+            manifest.append({"student_id": student_id, "matric_number": matric_number, "digest": digest})
+        except Exception as e:
+            job.failed += 1; job.last_error = f"Student {student_id}: {e}"[:1000]
+    db.session.commit() # Progress is visible after every chunk
+
+
+def run_document_job(job_id, workers=None, echo=None):
+    """Runs a job to completion in the current app context. Re-running a job re-renders nothing that is cached."""
+    config = current_app.config
+    job = db.session.get(DocumentJob, job_id)
+    if job is None: raise DocumentError(f"Document job {job_id} not found.")
+    job.status, job.started_at, job.finished_at, job.last_error = 'running', datetime.utcnow(), None, None
+    job.rendered = job.reused = job.failed = 0
+    started = time.perf_counter()
+    try:
+        student_ids = select_document_students(json.loads(job.filters or '{}'))
+        if len(student_ids) > MAX_JOB_STUDENTS:
+            raise DocumentError(f"The filter matches {len(student_ids)} students; at most {MAX_JOB_STUDENTS} per job.")
+        job.total = len(student_ids)
+        db.session.commit()
+        chunk_size, manifest, in_flight = config.get('DOCUMENT_JOB_CHUNK_SIZE', 200), [], deque()
+        with ProcessPoolExecutor(max_workers=workers or config.get('DOCUMENT_WORKERS') or None) as pool:
+            for start in range(0, len(student_ids), chunk_size):
+                documents = load_document_data(job.kind, student_ids[start:start + chunk_size])
+                futures = {}
+                for student_id, (matric_number, context, blocks) in documents.items():
+                    digest = document_digest(job.kind, context, blocks)
+                    path = document_path(digest)
+                    if os.path.exists(path):
+                        job.reused += 1
+                        manifest.append({"student_id": student_id, "matric_number": matric_number, "digest": digest})
+                    else:
+                        futures[pool.submit(render_to_file, job.kind, context, blocks, path)] = (student_id, matric_number, digest)
+                in_flight.append(futures)
+                if len(in_flight) > 1: _collect(job, in_flight.popleft(), manifest) # Chunk n renders while chunk n+1 loads
+                if echo: echo(f"  {min(start + chunk_size, len(student_ids))}/{len(student_ids)} students queued")
+            while in_flight: _collect(job, in_flight.popleft(), manifest)
+        manifest_path = _manifest_path(job.id)
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path, 'w', encoding='utf-8') as handle:
+            json.dump(sorted(manifest, key=lambda entry: entry['student_id']), handle)
+        job.status, job.finished_at = 'completed', datetime.utcnow()
+        db.session.commit()
+        current_app.logger.info(f"Document job {job.id}: {job.rendered} rendered, {job.reused} reused, {job.failed} failed in {time.perf_counter() - started:.1f}s.")
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(DocumentJob, job_id)
+        job.status, job.finished_at, job.last_error = 'failed', datetime.utcnow(), str(e)[:1000]
+        db.session.commit()
+        raise
+    return job
+
+
+def queue_document_job(job):
+    """Queues a flushed job for `flask worker` (task documents.generate). The caller commits."""
+    return enqueue('documents.generate', {"document_job_id": job.id}, requested_by=job.requested_by)
+
+
+def get_job_progress(job, include_documents=False):
+    done = job.rendered + job.reused + job.failed
+    progress = {
+        "id": job.id, "kind": job.kind, "status": job.status, "filter": json.loads(job.filters or '{}'),
+        "created_at": job.created_at.isoformat(), "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None, "total": job.total,
+        "rendered": job.rendered, "reused": job.reused, "failed": job.failed, "last_error": job.last_error,
+        "progress": round(done / job.total, 3) if job.total else (1.0 if job.status == 'completed' else 0.0),
+    }
+    manifest_path = _manifest_path(job.id)
+    if include_documents and job.status == 'completed' and os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as handle:
+            progress['documents'] = [{**entry, "url": f"/api/documents/{entry['digest']}"} for entry in json.load(handle)]
+    return progress
+
+
+@click.command('generate-documents')
+@click.argument('kind', type=click.Choice(DOCUMENT_KINDS))
+@click.option('--degree-id', type=int, default=None)
+@click.option('--faculty', default=None)
+@click.option('--advisor-id', type=int, default=None)
+@click.option('--student-id', 'student_ids', type=int, multiple=True, help='Repeatable.')
+@click.option('--min-units', type=int, default=None, help='Only students with at least this many units (e.g. a graduating class).')
+@click.option('--workers', type=int, default=None, help='Render processes (default: DOCUMENT_WORKERS, else one per CPU).')
+@with_appcontext
+def generate_documents_command(kind, degree_id, faculty, advisor_id, student_ids, min_units, workers):
+    """Renders certificates or transcripts for a cohort in the foreground."""
+    try:
+        kind, filters = parse_document_request({"kind": kind, "filter": {"degree_id": degree_id, "faculty": faculty, "advisor_id": advisor_id, "student_ids": list(student_ids) or None, "min_units": min_units}})
+        job = create_document_job(kind, filters)
+        db.session.commit()
+        click.echo(f"--- Document job {job.id}: {kind}s for {filters} ---")
+        started = time.perf_counter()
+        job = run_document_job(job.id, workers=workers, echo=click.echo)
+        click.echo(f"{job.rendered} rendered, {job.reused} reused from the cache, {job.failed} failed in {time.perf_counter() - started:.1f}s.")
+        if job.last_error: click.echo(f"Last error: {job.last_error}")
+    except DocumentError as e:
+        db.session.rollback(); click.echo(f"!!! {e}")
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error generating documents: {e}")
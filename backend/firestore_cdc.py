@@ -0,0 +1,295 @@
+# backend/firestore_cdc.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from sqlalchemy import DateTime, event, func, insert, inspect, literal, select, tuple_
+from sqlalchemy.orm import Session, object_session
+
+import metrics
+from extensions import db
+from firestore_memory import InMemoryFirestore
+from firestore_sync import MAX_BATCH_WRITES, SOURCES, commit_batch, firestore_client
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.degree import Degree
+from models.enrollment import Enrollment
+from models.firestore_outbox import FirestoreOutbox
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.student import Student
+
+# Incremental SQL -> Firestore sync, for running both backends side by side.
+# Inserts, updates and deletes of every migrated table (see firestore_sync.SOURCES) are
+# collected from mapper events during the flush and written to the firestore_outbox table
+# right before commit, so a change is queued exactly when it commits. Documents that copy
+# fields of another row are queued with it (DEPENDENTS): renaming a lecturer re-ships the
+# author_name of their notes, editing a degree re-ships its students. Code that writes with
+# bulk Core statements calls record_changes() itself (with a SELECT of the affected ids);
+# bulk loads (`seed-data --dataset`, `import-snapshot`) are followed by a full
+# migrate_to_firebase.py run instead. Recording is on for apps with FIRESTORE_SYNC_ENABLED
+# (read from the current app's config, so other apps in the process are unaffected).
+# FirestoreShipper drains the outbox from a background thread (or `flask firestore-sync`):
+# it claims pending rows, coalesces them to one write per document, rebuilds each document
+# from the current SQL row with the same builders as migrate_to_firebase.py (a row that is
+# gone becomes a delete), writes batches of up to 500 from a thread pool and then deletes the
+# claimed rows. A failed pass releases its claim and is retried on the next one.
+# /metrics gets firestore_sync_lag_seconds (age of the oldest unshipped change), the pending
+# count and the shipped document counter.
+#
+# Config (see app.py): FIRESTORE_SYNC_ENABLED, FIRESTORE_SHIPPER_ENABLED, FIRESTORE_SYNC_INTERVAL,
+# FIRESTORE_SYNC_BATCH_LIMIT, FIRESTORE_SYNC_WORKERS, FIRESTORE_SYNC_TARGET, FIRESTORE_CREDENTIALS.
+
+TRACKED_MODELS = {Degree: 'degrees', Lecturer: 'lecturers', Student: 'students', Course: 'courses', Enrollment: 'enrollments',
+                  Result: 'results', AdvisingNote: 'advising_notes', AdvisingResource: 'advising_resources'}
+# source -> (attributes copied into other documents, ids -> (dependent source, SELECT of its ids))
+DEPENDENTS = {
+    'lecturers': (('first_name', 'last_name'), lambda ids: ('advising_notes', select(AdvisingNote.id).where(AdvisingNote.lecturer_id.in_(ids)))),
+    'degrees': (('name', 'faculty'), lambda ids: ('students', select(Student.id).where(Student.degree_id.in_(ids)))),
+}
+CLAIM_LEASE = timedelta(minutes=10) # Claims left by a crashed shipper are released after this
+IN_CHUNK_SIZE = 500
+
+_SOURCES = {source.name: source for source in SOURCES}
+
+DOCUMENTS_SHIPPED = metrics.Counter('firestore_sync_documents_total', 'Documents written to Firestore by the CDC shipper.', ('collection', 'operation'))
+
+
+class SyncBacklog:
+    """Outbox gauges, read from the table at scrape time so every worker reports the same backlog."""
+
+    def render(self):
+        if not has_app_context(): return []
+        try:
+            oldest, pending = db.session.query(func.min(FirestoreOutbox.created_at), func.count(FirestoreOutbox.id)).one()
+        except Exception:
+            return []
+        lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+        return ["# HELP firestore_sync_lag_seconds Age of the oldest change not yet shipped to Firestore.", "# TYPE firestore_sync_lag_seconds gauge",
+                f"firestore_sync_lag_seconds {lag:.3f}",
+                "# HELP firestore_sync_pending Outbox rows waiting to be shipped.", "# TYPE firestore_sync_pending gauge",
+                f"firestore_sync_pending {pending}"]
+
+
+def record_changes(source, ids, operation='update', session=None):
+    """Queues rows of a source for shipping in the current transaction.
+
+    ids is a list of primary keys or a SELECT of them (for bulk Core writes, which skip the
+    mapper events). Does nothing unless FIRESTORE_SYNC_ENABLED.
+    """
+    if not sync_enabled(): return
+    session = session or db.session()
+    columns = ['source', 'row_id', 'operation', 'created_at']
+    now = datetime.utcnow()
+    if hasattr(ids, 'subquery'):
+        selected = ids.subquery()
+        session.execute(insert(FirestoreOutbox).from_select(columns, select(literal(source), selected.c[0], literal(operation), literal(now, DateTime))))
+    elif ids:
+        session.execute(insert(FirestoreOutbox), [{"source": source, "row_id": row_id, "operation": operation, "created_at": now} for row_id in ids])
+    session.info['firestore_changes_queued'] = True
+
+
+def sync_enabled():
+    """FIRESTORE_SYNC_ENABLED of the current app; nothing is recorded outside an app context."""
+    return has_app_context() and bool(current_app.config.get('FIRESTORE_SYNC_ENABLED', False))
+
+
+def _flag_change(operation, mapper, connection, target):
+    session = object_session(target)
+    if session is None or not sync_enabled(): return
+    source = TRACKED_MODELS[type(target)]
+    session.info.setdefault('firestore_changes', {})[(source, target.id)] = operation # Last operation per row wins
+    if source in DEPENDENTS and operation == 'update':
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in DEPENDENTS[source][0]):
+            session.info.setdefault('firestore_dependents', {}).setdefault(source, set()).add(target.id)
+
+for _model in TRACKED_MODELS:
+    for _operation in ('insert', 'update', 'delete'):
+        event.listen(_model, f'after_{_operation}', partial(_flag_change, _operation))
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_outbox(session):
+    session.flush() # Pending ORM changes flag their rows here
+    changes = session.info.pop('firestore_changes', None)
+    if changes:
+        now = datetime.utcnow()
+        session.execute(insert(FirestoreOutbox), [{"source": source, "row_id": row_id, "operation": operation, "created_at": now} for (source, row_id), operation in changes.items()])
+        session.info['firestore_changes_queued'] = True
+    for source, row_ids in (session.info.pop('firestore_dependents', None) or {}).items():
+        for chunk in _chunks(sorted(row_ids), IN_CHUNK_SIZE):
+            record_changes(*DEPENDENTS[source][1](chunk), session=session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_shipper(session):
+    if session.info.pop('firestore_changes_queued', False) and has_app_context():
+        shipper = current_app.extensions.get('firestore_shipper')
+        if shipper: shipper.wake()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('firestore_changes', None)
+    session.info.pop('firestore_dependents', None)
+    session.info.pop('firestore_changes_queued', None)
+
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def build_writes(keys):
+    """[(collection, doc id, data or None)] for {(source, row id)}, from the rows as they are now."""
+    writes = []
+    by_source = {}
+    for source_name, row_id in keys:
+        by_source.setdefault(source_name, set()).add(row_id)
+    for source_name, row_ids in by_source.items():
+        source = _SOURCES[source_name]
+        found = set()
+        for chunk in _chunks(sorted(row_ids), IN_CHUNK_SIZE):
+            for row in source.model.query.options(*source.options).filter(source.model.id.in_(chunk)):
+                found.add(row.id)
+                writes.append((source.collection, source.doc_id(row.id), source.to_document(row)))
+        writes.extend((source.collection, source.doc_id(row_id), None) for row_id in sorted(row_ids - found)) # Deleted since
+    return writes
+
+
+class FirestoreShipper:
+    def __init__(self, app, client=None):
+        self.app = app
+        self.client = client
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive(): return
+            self._stop.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self.app.config.get('FIRESTORE_SYNC_WORKERS', 4), thread_name_prefix='firestore-writer')
+            self._thread = threading.Thread(target=self._run, name='firestore-shipper', daemon=True)
+            self._thread.start()
+            self.app.logger.info("Firestore shipper started.")
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        if self._thread: self._thread.join(timeout=10)
+        if self._pool: self._pool.shutdown(wait=True)
+        self._thread, self._pool = None, None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        interval = self.app.config.get('FIRESTORE_SYNC_INTERVAL', 2)
+        while not self._stop.is_set():
+            try:
+                processed = self.ship_once()
+            except Exception as e:
+                processed = 0; self.app.logger.error(f"Firestore shipper pass failed: {str(e)}", exc_info=True)
+            if not processed: # Keep draining while there is work; otherwise sleep until woken or the interval passes
+                self._wake.wait(interval)
+            self._wake.clear()
+
+    def _get_client(self):
+        if self.client is None:
+            if self.app.config.get('FIRESTORE_SYNC_TARGET') == 'memory':
+                self.client = InMemoryFirestore()
+            else:
+                self.client = firestore_client(self.app.config.get('FIRESTORE_CREDENTIALS'))
+        return self.client
+
+    def _claim(self):
+        """Claims up to FIRESTORE_SYNC_BATCH_LIMIT outbox rows; returns (token, rows) or None."""
+        now = datetime.utcnow()
+        FirestoreOutbox.query.filter(FirestoreOutbox.claim_token.isnot(None), FirestoreOutbox.claimed_at < now - CLAIM_LEASE).update({FirestoreOutbox.claim_token: None, FirestoreOutbox.claimed_at: None}, synchronize_session=False)
+        # Rows whose document another pass is writing right now wait for the next pass, so an
+        # older read of a row can never overwrite a newer one in Firestore
+        in_flight = db.session.query(FirestoreOutbox.source, FirestoreOutbox.row_id).filter(FirestoreOutbox.claim_token.isnot(None))
+        due_ids = [row.id for row in db.session.query(FirestoreOutbox.id).filter(
+            FirestoreOutbox.claim_token.is_(None), ~tuple_(FirestoreOutbox.source, FirestoreOutbox.row_id).in_(in_flight)
+        ).order_by(FirestoreOutbox.id).limit(self.app.config.get('FIRESTORE_SYNC_BATCH_LIMIT', 5000))]
+        if not due_ids:
+            db.session.commit(); return None
+        token = uuid.uuid4().hex
+        for chunk in _chunks(due_ids, IN_CHUNK_SIZE): # Conditional UPDATE + token: concurrent shippers never claim the same row
+            FirestoreOutbox.query.filter(FirestoreOutbox.id.in_(chunk), FirestoreOutbox.claim_token.is_(None)).update({FirestoreOutbox.claim_token: token, FirestoreOutbox.claimed_at: now}, synchronize_session=False)
+        db.session.commit()
+        return token, db.session.query(FirestoreOutbox.source, FirestoreOutbox.row_id).filter(FirestoreOutbox.claim_token == token).all()
+
+    def ship_once(self):
+        """Runs one claim-coalesce-write pass and returns the number of outbox rows shipped."""
+        with self.app.app_context():
+            claimed = self._claim()
+            if not claimed: return 0
+            token, rows = claimed
+            try:
+                writes = build_writes({(row.source, row.row_id) for row in rows})
+                client = self._get_client()
+                batches = list(_chunks(writes, MAX_BATCH_WRITES))
+                if self._pool:
+                    list(self._pool.map(partial(commit_batch, client), batches))
+                else:
+                    for batch in batches: commit_batch(client, batch)
+            except Exception as e:
+                db.session.rollback()
+                FirestoreOutbox.query.filter(FirestoreOutbox.claim_token == token).update({FirestoreOutbox.claim_token: None, FirestoreOutbox.claimed_at: None}, synchronize_session=False)
+                db.session.commit()
+                self.app.logger.error(f"Firestore shipper could not write {len(rows)} change(s), will retry: {str(e)}")
+                return 0
+            FirestoreOutbox.query.filter(FirestoreOutbox.claim_token == token).delete(synchronize_session=False)
+            db.session.commit()
+        for collection, _, data in writes:
+            DOCUMENTS_SHIPPED.inc((collection, 'delete' if data is None else 'set'))
+        self.app.logger.info(f"Firestore shipper wrote {len(writes)} document(s) for {len(rows)} change(s).")
+        return len(rows)
+
+
+def init_app(app):
+    """Registers the shipper; with FIRESTORE_SYNC_ENABLED it starts with the first request."""
+    shipper = FirestoreShipper(app)
+    app.extensions['firestore_shipper'] = shipper
+    if not app.config.get('FIRESTORE_SYNC_ENABLED', False): return
+    metrics.register_collector(SyncBacklog())
+    metrics.register_collector(DOCUMENTS_SHIPPED)
+    if not app.config.get('FIRESTORE_SHIPPER_ENABLED', True): return
+
+    @app.before_request
+    def _start_firestore_shipper():
+        if shipper._thread is None: shipper.start()
+
+
+@click.command('firestore-sync')
+@click.option('--once', is_flag=True, help='Ship everything currently in the outbox, then exit.')
+@with_appcontext
+def firestore_sync_command(once):
+    """Runs the Firestore CDC shipper in the foreground."""
+    shipper = current_app.extensions.get('firestore_shipper') or FirestoreShipper(current_app._get_current_object())
+    if once:
+        total, started = 0, time.perf_counter()
+        while True: # A failed pass ships nothing and stops the loop, leaving the rest for the next run
+            shipped = shipper.ship_once()
+            total += shipped
+            if not shipped: break
+        click.echo(f"Shipped {total} change(s) in {time.perf_counter() - started:.1f}s.")
+        return
+    shipper.start()
+    click.echo("Firestore shipper running. Press Ctrl+C to stop.")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        shipper.stop()
@@ -0,0 +1,161 @@
+# backend/firestore_memory.py
+import copy
+import threading
+
+# A small in-memory stand-in for the parts of the Firestore client this backend uses:
+# collection().document().set/get/delete, collection().where(...).stream(), batch() and
+# get_all(). The migration runs against it with --memory, and it lets the Firestore code
+# paths be exercised and timed without the emulator or a project. Like the real service it
+# stores copies of the data, refuses batches of more than MAX_BATCH_WRITES, and counts
+# document reads and writes (what Firestore bills for).
+
+MAX_BATCH_WRITES = 500
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference, self._data = reference, data
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class DocumentReference:
+    def __init__(self, client, collection, doc_id):
+        self._client, self.collection_name, self.id = client, collection, str(doc_id)
+
+    @property
+    def path(self):
+        return f"{self.collection_name}/{self.id}"
+
+    def set(self, data, merge=False):
+        self._client._commit([('set', self, data, merge)])
+
+    def update(self, data):
+        self._client._commit([('update', self, data, True)])
+
+    def delete(self):
+        self._client._commit([('delete', self, None, False)])
+
+    def get(self):
+        with self._client._lock:
+            self._client.reads += 1
+            return DocumentSnapshot(self, copy.deepcopy(self._client._store.get(self.collection_name, {}).get(self.id)))
+
+
+_OPERATORS = {'==': lambda value, operand: value == operand, 'in': lambda value, operand: value in operand}
+
+
+class Query:
+    def __init__(self, collection, filters=()):
+        self._collection, self._filters = collection, filters
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None: # google-cloud-firestore's FieldFilter
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator for the in-memory Firestore: {op_string}")
+        return Query(self._collection, (*self._filters, (field_path, op_string, value)))
+
+    def stream(self):
+        client = self._collection._client
+        with client._lock:
+            stored = client._store.get(self._collection.id, {})
+            equality = next(((field, value) for field, op, value in self._filters if op == '=='), None)
+            candidates = client._index(self._collection.id, *equality) if equality else sorted(stored)
+            documents = [(doc_id, stored[doc_id]) for doc_id in candidates
+                         if all(_OPERATORS[op](stored[doc_id].get(field), value) for field, op, value in self._filters)]
+            client.reads += len(documents)
+            return iter([DocumentSnapshot(self._collection.document(doc_id), copy.deepcopy(data)) for doc_id, data in documents])
+
+
+class CollectionReference(Query):
+    def __init__(self, client, name):
+        self._client, self.id = client, name
+        super().__init__(self)
+
+    def document(self, doc_id):
+        return DocumentReference(self._client, self.id, doc_id)
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client, self._writes = client, []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference, data, merge))
+
+    def update(self, reference, data):
+        self._writes.append(('update', reference, data, True))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None, False))
+
+    def commit(self):
+        self._client._commit(self._writes)
+        self._writes = []
+
+
+class InMemoryFirestore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = {}  # collection -> {doc id: data}
+        self.commits = 0
+        self.writes = 0
+        self.reads = 0
+        self._indexes = {}  # (collection, field) -> {value: sorted doc ids}, dropped when the collection is written
+
+    def _index(self, collection, field, value):
+        """Doc ids whose field equals value; like Firestore's automatic single-field indexes. Caller holds the lock."""
+        index = self._indexes.get((collection, field))
+        if index is None:
+            index = self._indexes[(collection, field)] = {}
+            for doc_id, data in sorted(self._store.get(collection, {}).items()):
+                key = data.get(field)
+                if isinstance(key, (str, int, float, bool, type(None))): index.setdefault(key, []).append(doc_id)
+        return index.get(value, []) if isinstance(value, (str, int, float, bool, type(None))) else []
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def get_all(self, references):
+        return [reference.get() for reference in references]
+
+    def _commit(self, writes):
+        if len(writes) > MAX_BATCH_WRITES:
+            raise ValueError(f"A batch can hold at most {MAX_BATCH_WRITES} writes, got {len(writes)}.")
+        with self._lock:
+            for operation, reference, data, merge in writes:
+                documents = self._store.setdefault(reference.collection_name, {})
+                self._indexes = {key: index for key, index in self._indexes.items() if key[0] != reference.collection_name}
+                if operation == 'delete':
+                    documents.pop(reference.id, None)
+                elif operation == 'update' and reference.id not in documents:
+                    raise KeyError(f"No document to update: {reference.path}")
+                elif merge:
+                    documents[reference.id] = {**documents.get(reference.id, {}), **copy.deepcopy(data)}
+                else:
+                    documents[reference.id] = copy.deepcopy(data)
+            self.commits += 1
+            self.writes += len(writes)
+
+    def count(self, collection):
+        with self._lock:
+            return len(self._store.get(collection, {}))
@@ -0,0 +1,207 @@
+# backend/firestore_sync.py
+import json
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import joinedload
+
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.degree import Degree
+from models.enrollment import Enrollment
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.student import Student
+
+# Copies the SQL tables into Firestore as the documents the frontend reads.
+# Each source table is streamed in primary-key order (yield_per, with its many-to-one joins
+# eager-loaded so there is no per-row lazy load), turned into (document id, data) pairs and
+# written in batches of up to MAX_BATCH_WRITES from a thread pool. Only a bounded number of
+# batches is in flight, so memory stays flat however big the table is. When the oldest
+# in-flight batch commits, the last id it covered is saved to a checkpoint file; a run that
+# crashes resumes after that id. Documents are written with set(), so rewriting a batch that
+# was in flight during a crash is harmless.
+# The client is anything with collection()/batch(): firebase_admin's, the emulator's
+# (FIRESTORE_EMULATOR_HOST) or firestore_memory.InMemoryFirestore.
+
+MAX_BATCH_WRITES = 500 # Firestore's limit for one batched write
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_WORKERS = 8
+COMMIT_ATTEMPTS = 4
+
+Source = namedtuple('Source', 'name model collection options doc_id to_document') # doc_id: row id -> document id
+
+
+def student_uid(student_id):
+    return f"student_{student_id}"
+
+
+def lecturer_uid(lecturer_id):
+    return f"lecturer_{lecturer_id}"
+
+
+def degree_document(degree):
+    return {"name": degree.name, "faculty": degree.faculty}
+
+
+def lecturer_document(lecturer):
+    return {"name": f"{lecturer.first_name} {lecturer.last_name}", "email": lecturer.email, "department": lecturer.department,
+            "office_location": lecturer.office_location, "role": "lecturer"}
+
+
+def student_document(student):
+    data = {
+        "name": f"{student.first_name} {student.last_name}", "email": student.email, "matric_number": student.matric_number,
+        "gpa": student.gpa, "role": "student",
+        "guardian_name": student.guardian_name, "guardian_email": student.guardian_email,
+        "guardian_phone": student.guardian_phone, "guardian_relationship": student.guardian_relationship
+    }
+    if student.degree:
+        data["degree"] = {"id": student.degree.id, "name": student.degree.name, "faculty": student.degree.faculty}
+    if student.advisor_id:
+        data["advisorId"] = lecturer_uid(student.advisor_id)
+    return data
+
+
+def course_document(course):
+    return {"code": course.code, "title": course.title, "units": course.units, "status": course.status, "level": course.level, "semester": course.semester}
+
+
+def enrollment_document(enrollment):
+    return {"studentId": student_uid(enrollment.student_id), "courseId": enrollment.course_id, "academic_year": enrollment.academic_year,
+            "semester": enrollment.semester, "enrolled_at": enrollment.enrolled_at, "updated_at": enrollment.updated_at}
+
+
+def result_document(result):
+    return {"studentId": student_uid(result.student_id), "courseId": result.course_id, "grade": result.grade, "semester": result.semester, "gpa": result.gpa}
+
+
+def note_document(note):
+    return {"content": note.content, "studentId": student_uid(note.student_id), "lecturerId": lecturer_uid(note.lecturer_id),
+            "created_at": note.created_at, "updated_at": note.updated_at,
+            "author_name": f"{note.author.first_name} {note.author.last_name}" if note.author else "Unknown"} # Denormalized for display
+
+
+def resource_document(resource):
+    return {"title": resource.title, "description": resource.description, "url": resource.url, "category": resource.category}
+
+
+# Migration order; students and lecturers share the 'users' collection, told apart by the uid prefix
+SOURCES = (
+    Source('degrees', Degree, 'degrees', (), lambda row_id: row_id, degree_document),
+    Source('lecturers', Lecturer, 'users', (), lecturer_uid, lecturer_document),
+    Source('students', Student, 'users', (joinedload(Student.degree),), student_uid, student_document),
+    Source('courses', Course, 'courses', (), lambda row_id: row_id, course_document),
+    Source('enrollments', Enrollment, 'enrollments', (), lambda row_id: row_id, enrollment_document),
+    Source('results', Result, 'results', (), lambda row_id: row_id, result_document),
+    Source('advising_notes', AdvisingNote, 'advising_notes', (joinedload(AdvisingNote.author),), lambda row_id: row_id, note_document),
+    Source('advising_resources', AdvisingResource, 'advising_resources', (), lambda row_id: row_id, resource_document),
+)
+
+
+class Checkpoint:
+    """Last migrated id per source, kept in a small JSON file that is replaced atomically."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as handle:
+                self._positions = json.load(handle)
+        except FileNotFoundError:
+            self._positions = {}
+
+    def get(self, source):
+        return self._positions.get(source, 0)
+
+    def save(self, source, last_id):
+        self._positions[source] = last_id
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as handle:
+            json.dump(self._positions, handle, indent=1)
+        os.replace(temporary, self.path)
+
+    def reset(self):
+        self._positions = {}
+        if os.path.exists(self.path): os.remove(self.path)
+
+
+def firestore_client(credentials_path=None, project_id=None):
+    """The emulator's client when FIRESTORE_EMULATOR_HOST is set, otherwise one from the service-account key."""
+    if os.getenv('FIRESTORE_EMULATOR_HOST'):
+        from google.cloud import firestore as cloud_firestore # The emulator needs no credentials
+        return cloud_firestore.Client(project=project_id or os.getenv('GOOGLE_CLOUD_PROJECT', 'demo-student-advising'))
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        firebase_admin.initialize_app(credentials.Certificate(credentials_path or os.path.join(os.path.dirname(__file__), 'firebase-admin.json')))
+    return firestore.client()
+
+
+def commit_batch(client, writes):
+    """Commits [(collection, doc id, data or None to delete)] as one batch, retrying transient failures."""
+    for attempt in range(COMMIT_ATTEMPTS):
+        batch = client.batch()
+        for collection, doc_id, data in writes:
+            reference = client.collection(collection).document(str(doc_id))
+            if data is None: batch.delete(reference)
+            else: batch.set(reference, data)
+        try:
+            batch.commit()
+            return len(writes)
+        except Exception:
+            if attempt == COMMIT_ATTEMPTS - 1: raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def stream_source(source, after_id=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields (id, document id, data) for the rows of a source with an id above after_id, in id order."""
+    query = source.model.query.options(*source.options).filter(source.model.id > after_id).order_by(source.model.id)
+    for row in query.yield_per(chunk_size):
+        yield row.id, source.doc_id(row.id), source.to_document(row)
+
+
+def migrate_source(client, source, checkpoint, pool, chunk_size=DEFAULT_CHUNK_SIZE, max_in_flight=DEFAULT_WORKERS * 2):
+    """Streams one source into Firestore; returns the number of documents written."""
+    in_flight = deque() # (future, last id in that batch), oldest first
+    written, batch = 0, []
+
+    def _finish_oldest():
+        future, last_id = in_flight.popleft()
+        count = future.result()
+        checkpoint.save(source.name, last_id) # Every earlier batch has already committed
+        return count
+
+    try:
+        for row_id, doc_id, data in stream_source(source, checkpoint.get(source.name), chunk_size):
+            batch.append((source.collection, doc_id, data))
+            if len(batch) == MAX_BATCH_WRITES:
+                in_flight.append((pool.submit(commit_batch, client, batch), row_id))
+                batch = []
+                if len(in_flight) >= max_in_flight:
+                    written += _finish_oldest()
+        if batch:
+            in_flight.append((pool.submit(commit_batch, client, batch), row_id))
+        while in_flight:
+            written += _finish_oldest()
+    finally:
+        for future, _ in in_flight: future.cancel() # After a failure, don't keep writing past the checkpoint
+    return written
+
+
+def migrate_all(client, checkpoint, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE, sources=SOURCES, echo=print):
+    """Migrates every source in order, resuming from the checkpoint. Returns {source: documents written}."""
+    counts = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='firestore-writer') as pool:
+        for source in sources:
+            started, resumed_after = time.perf_counter(), checkpoint.get(source.name)
+            echo(f"\n--- Migrating {source.name} -> {source.collection}" + (f" (resuming after id {resumed_after})" if resumed_after else "") + " ---")
+            counts[source.name] = migrate_source(client, source, checkpoint, pool, chunk_size, max_in_flight=workers * 2)
+            echo(f"  {counts[source.name]} document(s) written in {time.perf_counter() - started:.1f}s.")
+    return counts
@@ -0,0 +1,149 @@
+# backend/gpa_engine.py
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from extensions import db
+from models.course import Course
+from models.result import Result
+from models.semester_gpa import StudentSemesterGpa
+from models.student import Student
+from data_versions import GLOBAL_SCOPE, touch
+from firestore_cdc import record_changes
+
+# Unit-weighted GPA kept as running sums:
+#   semester GPA = sum(units * grade points) / sum(units) over that semester's results
+#   CGPA         = the same over every result, stored on Student.gpa
+# Results without grade points (e.g. "DEX" exemptions) carry no weight.
+
+IN_CHUNK_SIZE = 500 # Keeps IN (...) lists well below driver/SQLite parameter limits
+
+# Class of degree on the 5.0 scale: (lower bound, label), ascending
+DEGREE_CLASS_BANDS = (
+    (0.0, 'Fail'),
+    (1.0, 'Pass'),
+    (1.5, 'Third Class'),
+    (2.4, 'Second Class Lower'),
+    (3.5, 'Second Class Upper'),
+    (4.5, 'First Class'),
+)
+
+
+def degree_class(cgpa):
+    """The class-of-degree label for a CGPA (None for a student without graded results)."""
+    if cgpa is None: return None
+    label = DEGREE_CLASS_BANDS[0][1]
+    for lower, band in DEGREE_CLASS_BANDS:
+        if cgpa >= lower: label = band
+    return label
+
+
+def _gpa(total_quality_points, total_units):
+    return round(total_quality_points / total_units, 2) if total_units else None
+
+
+def apply_result_to_gpa(student, result, units):
+    """Adds one new Result to the student's semester and cumulative sums in O(1).
+
+    Must be called in the same transaction that inserts the result; nothing is committed here.
+    """
+    apply_results_to_gpa([(student.id, result.semester, units, result.gpa)])
+
+
+def apply_results_to_gpa(entries):
+    """Adds newly inserted results, given as (student_id, semester, units, grade_points), to the sums.
+
+    Uses two reads per IN_CHUNK_SIZE students and no per-result queries. The student and
+    semester rows are read FOR UPDATE (a no-op on SQLite) so concurrent grade submissions for
+    the same student can't lose an update. The caller commits.
+    """
+    semester_sums, student_sums = {}, {}
+    for student_id, semester, units, grade_points in entries:
+        if grade_points is None or not units:
+            continue
+        quality_points = units * float(grade_points)
+        units_sum, points_sum = semester_sums.get((student_id, semester), (0, 0.0))
+        semester_sums[(student_id, semester)] = (units_sum + units, points_sum + quality_points)
+        units_sum, points_sum = student_sums.get(student_id, (0, 0.0))
+        student_sums[student_id] = (units_sum + units, points_sum + quality_points)
+    if not student_sums:
+        return
+
+    student_ids = list(student_sums)
+    id_chunks = [student_ids[i:i + IN_CHUNK_SIZE] for i in range(0, len(student_ids), IN_CHUNK_SIZE)]
+    semester_rows = {}
+    for chunk in id_chunks:
+        for row in StudentSemesterGpa.query.filter(StudentSemesterGpa.student_id.in_(chunk)).with_for_update().populate_existing():
+            semester_rows[(row.student_id, row.semester)] = row
+    for (student_id, semester), (units, quality_points) in semester_sums.items():
+        row = semester_rows.get((student_id, semester))
+        if not row:
+            row = StudentSemesterGpa(student_id=student_id, semester=semester, total_units=0, total_quality_points=0.0)
+            db.session.add(row)
+        row.total_units += units
+        row.total_quality_points += quality_points
+
+    students = [student for chunk in id_chunks for student in Student.query.filter(Student.id.in_(chunk)).with_for_update().populate_existing()]
+    for student in students:
+        units, quality_points = student_sums[student.id]
+        student.total_units = (student.total_units or 0) + units
+        student.total_quality_points = (student.total_quality_points or 0.0) + quality_points
+        student.gpa = _gpa(student.total_quality_points, student.total_units)
+
+
+def rebuild_gpa(student_ids=None):
+    """Recomputes all running sums from the results table with one grouped query.
+
+    Students without any graded results keep their existing gpa value. Returns the number
+    of students whose sums were rebuilt. The caller commits.
+    """
+    sums_query = db.session.query(
+        Result.student_id, Result.semester,
+        func.sum(Course.units).label('units'),
+        func.sum(Course.units * Result.gpa).label('quality_points')
+    ).join(Course, Result.course_id == Course.id).filter(Result.gpa.isnot(None), Course.units > 0)
+    delete_query = StudentSemesterGpa.query
+    reset_query = Student.query
+    if student_ids is not None:
+        sums_query = sums_query.filter(Result.student_id.in_(student_ids))
+        delete_query = delete_query.filter(StudentSemesterGpa.student_id.in_(student_ids))
+        reset_query = reset_query.filter(Student.id.in_(student_ids))
+    rows = sums_query.group_by(Result.student_id, Result.semester).all()
+
+    delete_query.delete(synchronize_session=False)
+    reset_query.update({Student.total_units: 0, Student.total_quality_points: 0.0}, synchronize_session=False)
+
+    semester_rows, totals = [], {}
+    for row in rows:
+        semester_rows.append({"student_id": row.student_id, "semester": row.semester, "total_units": int(row.units), "total_quality_points": float(row.quality_points)})
+        units, points = totals.get(row.student_id, (0, 0.0))
+        totals[row.student_id] = (units + int(row.units), points + float(row.quality_points))
+    if semester_rows:
+        db.session.execute(StudentSemesterGpa.__table__.insert(), semester_rows)
+    if totals:
+        db.session.execute(Student.__table__.update().where(Student.__table__.c.id == db.bindparam('b_id')).values(
+            total_units=db.bindparam('b_units'), total_quality_points=db.bindparam('b_points'), gpa=db.bindparam('b_gpa')
+        ), [{"b_id": sid, "b_units": units, "b_points": points, "b_gpa": _gpa(points, units)} for sid, (units, points) in totals.items()])
+    db.session.expire_all()
+    record_changes('students', list(totals)) # Student documents carry the gpa
+    touch(GLOBAL_SCOPE) # Bulk statements skip the mapper events; revalidate every cached response
+    return len(totals)
+
+
+def get_semester_gpas(student_id):
+    rows = StudentSemesterGpa.query.filter_by(student_id=student_id).order_by(StudentSemesterGpa.semester).all()
+    return [{"semester": row.semester, "units": row.total_units, "gpa": row.gpa} for row in rows]
+
+
+@click.command('rebuild-gpa')
+@click.option('--student-id', 'student_ids', type=int, multiple=True, help='Only rebuild these students (repeatable).')
+@with_appcontext
+def rebuild_gpa_command(student_ids):
+    """Rebuilds semester GPAs and CGPAs from the results table (backfill)."""
+    click.echo("--- Rebuilding GPA running sums from results ---")
+    try:
+        count = rebuild_gpa(list(student_ids) or None)
+        db.session.commit()
+        click.echo(f"Rebuilt GPA for {count} student(s).")
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error rebuilding GPA: {e}")
@@ -0,0 +1,153 @@
+# backend/grade_scale.py
+import threading
+import time
+from types import MappingProxyType
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from extensions import db
+from models.grade_scale import GradeScale, GradeScaleEntry
+
+# Central grade-scale registry: the single place that turns a letter grade into grade points.
+# Scales live in grade_scales/grade_scale_entries and are compiled once into immutable lookup
+# tables. Every table already contains the usual spellings of each grade (upper/lower case,
+# padded), so the common path is a single dict lookup; anything else is normalized once on a miss.
+# The compiled registry is dropped when a session commits a change to a scale (same scheme as
+# resource_cache) and after GRADE_SCALE_MAX_AGE seconds, for changes made by other processes.
+
+# Built-in standard 5-point scale, used when no scale is stored in the DB.
+DEFAULT_GRADE_POINTS = {
+    'A': 5.0, 'B': 4.0, 'C': 3.0, 'D': 2.0, 'E': 1.0, 'F': 0.0,
+    'A+': 5.0, 'A-': 4.7, 'B+': 4.3, 'B-': 3.7, 'C+': 3.3, 'C-': 2.7,
+    'D+': 2.3, 'D-': 1.7, 'E+': 1.3, 'E-': 0.7, 'F+': 0.3, 'F-': 0.0,
+    'DEX': None, # Exempted (e.g. Industrial Attachment): recorded, but no GPA weight
+}
+
+
+class UnknownGradeError(ValueError):
+    """Raised when a grade is not part of the applicable scale."""
+
+
+def _spellings(grade):
+    return {grade, grade.lower(), grade.capitalize(), f" {grade}", f"{grade} ", f" {grade} "}
+
+
+def _compile_table(points_by_grade):
+    table = {}
+    for grade, points in points_by_grade.items():
+        for spelling in _spellings(grade.strip().upper()):
+            table[spelling] = points
+    return MappingProxyType(table)
+
+
+def session_of(semester):
+    """'2023/2024 - Semester 1' -> '2023/2024'."""
+    return semester.split(' ', 1)[0] if semester else None
+
+
+class CompiledGradeScales:
+    """Immutable snapshot of every grade scale, keyed by (degree_id, session)."""
+
+    def __init__(self, scoped_tables, default_table):
+        self._tables = MappingProxyType(scoped_tables)
+        self.default = default_table
+
+    def table_for(self, degree_id=None, semester=None):
+        session = session_of(semester)
+        tables = self._tables
+        return (tables.get((degree_id, session)) or tables.get((degree_id, None))
+                or tables.get((None, session)) or self.default)
+
+    def points(self, grade, degree_id=None, semester=None):
+        """Grade points for `grade` (None for no-weight grades like DEX). Raises UnknownGradeError."""
+        table = self.table_for(degree_id, semester)
+        try:
+            return table[grade]
+        except KeyError:
+            normalized = (grade or '').strip().upper()
+            if normalized not in table:
+                raise UnknownGradeError(f"Unknown grade '{grade}'.")
+            return table[normalized]
+
+
+_lock = threading.Lock()
+_version = 0
+_compiled = None  # (CompiledGradeScales, version, compiled_at)
+
+
+def _compile():
+    scoped, default_table = {}, None
+    scales = GradeScale.query.options(db.selectinload(GradeScale.entries)).all()
+    for scale in scales:
+        table = _compile_table({entry.grade: entry.points for entry in scale.entries})
+        if scale.degree_id is None and scale.session is None:
+            if scale.is_default or default_table is None: default_table = table
+        else:
+            scoped[(scale.degree_id, scale.session)] = table
+    return CompiledGradeScales(scoped, default_table or _compile_table(DEFAULT_GRADE_POINTS))
+
+
+def get_grade_scales():
+    """Returns the compiled registry, compiling it from the DB on first use or after a change."""
+    global _compiled
+    entry = _compiled
+    max_age = current_app.config.get('GRADE_SCALE_MAX_AGE', 300)
+    if entry is not None and entry[1] == _version and (not max_age or time.monotonic() - entry[2] < max_age):
+        return entry[0]
+    version = _version
+    compiled = _compile()
+    with _lock:
+        if version == _version: # Don't keep a snapshot of scales that changed while we were compiling
+            _compiled = (compiled, version, time.monotonic())
+    return compiled
+
+
+def invalidate_grade_scales():
+    global _version, _compiled
+    with _lock:
+        _version += 1
+        _compiled = None
+
+
+def grade_points(grade, degree_id=None, semester=None):
+    """Shortcut for get_grade_scales().points(...)."""
+    return get_grade_scales().points(grade, degree_id, semester)
+
+
+# --- Invalidation hooks (flag on flush, drop the compiled registry on commit) ---
+def _flag_session(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['grade_scales_changed'] = True
+
+for _model in (GradeScale, GradeScaleEntry):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _flag_session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('grade_scales_changed', False):
+        invalidate_grade_scales()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_flag_on_rollback(session):
+    session.info.pop('grade_scales_changed', None)
+
+
+@click.command('seed-grade-scale')
+@with_appcontext
+def seed_grade_scale_command():
+    """Stores the built-in 5-point scale as the default grade scale (if no default exists)."""
+    if GradeScale.query.filter_by(is_default=True).first():
+        click.echo("A default grade scale already exists."); return
+    scale = GradeScale(name='Standard 5-point scale', is_default=True)
+    scale.entries = [GradeScaleEntry(grade=grade, points=points) for grade, points in DEFAULT_GRADE_POINTS.items()]
+    db.session.add(scale)
+    try: db.session.commit(); click.echo(f"Default grade scale created with {len(scale.entries)} grades.")
+    except Exception as e: db.session.rollback(); click.echo(f"!!! Error creating grade scale: {e}")
@@ -0,0 +1,140 @@
+# backend/grade_upload.py
+import csv
+import io
+
+from sqlalchemy import insert, select
+
+from extensions import db
+from models.course import Course
+from models.result import Result
+from models.student import Student
+from gpa_engine import IN_CHUNK_SIZE, apply_results_to_gpa
+from course_analytics import apply_results_to_analytics
+from grade_scale import UnknownGradeError, get_grade_scales
+from data_versions import touch
+from firestore_cdc import record_changes
+
+# Batch grade upload: hundreds of rows resolved with a handful of IN (...) queries and
+# inserted in one transaction, instead of one /submit-grade round trip per row.
+
+MAX_UPLOAD_ROWS = 5000
+
+
+class GradeUploadError(ValueError):
+    """Raised when the upload as a whole can't be read (bad format, no rows, too many rows)."""
+
+
+def _chunks(values, size=IN_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def parse_grade_upload(req):
+    """Returns a list of row dicts from a JSON body, a text/csv body or a multipart 'file' upload.
+
+    JSON: {"semester": "<default>", "grades": [{"matric_number", "course_code", "grade", "semester"?}, ...]}
+    CSV: header row with matric_number,course_code,grade[,semester]; ?semester= supplies a default.
+    Grade points are derived from the grade-scale registry; any gpa column is ignored.
+    """
+    default_semester = req.args.get('semester')
+    if req.is_json:
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('grades'), list):
+            raise GradeUploadError("JSON body must contain a 'grades' list.")
+        default_semester = data.get('semester', default_semester)
+        rows = data['grades']
+    else:
+        upload = req.files.get('file')
+        try:
+            text = (upload.read() if upload else req.get_data()).decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise GradeUploadError("The file must be UTF-8 encoded CSV.")
+        if not text or not text.strip():
+            raise GradeUploadError("Upload a CSV file ('file' field or text/csv body) or a JSON body.")
+        reader = csv.DictReader(io.StringIO(text))
+        missing = [col for col in ('matric_number', 'course_code', 'grade') if col not in (reader.fieldnames or [])]
+        if missing:
+            raise GradeUploadError(f"CSV header is missing columns: {', '.join(missing)}.")
+        rows = list(reader)
+    if not rows:
+        raise GradeUploadError("The upload contains no grade rows.")
+    if len(rows) > MAX_UPLOAD_ROWS:
+        raise GradeUploadError(f"At most {MAX_UPLOAD_ROWS} rows can be uploaded at once.")
+    normalized = []
+    for row in rows:
+        if not isinstance(row, dict):
+            row = {}
+        normalized.append({
+            'matric_number': str(row.get('matric_number') or '').strip(),
+            'course_code': str(row.get('course_code') or '').strip(),
+            'grade': str(row.get('grade') or '').strip().upper(),
+            'semester': str(row.get('semester') or default_semester or '').strip(),
+        })
+    return normalized
+
+
+def process_grade_upload(rows):
+    """Validates and inserts the rows. Returns (inserted_count, errors); the caller commits.
+
+    errors is a list of {"row": <1-based row number>, "message": ...}; rows with errors are
+    skipped and the rest are inserted.
+    """
+    errors, candidates = [], []
+    for row_number, row in enumerate(rows, start=1):
+        missing = [k for k in ('matric_number', 'course_code', 'grade', 'semester') if not row[k]]
+        if missing:
+            errors.append({"row": row_number, "message": f"Missing required fields: {', '.join(missing)}."}); continue
+        candidates.append((row_number, row))
+
+    students, courses = {}, {}
+    for chunk in _chunks({row['matric_number'] for _, row in candidates}):
+        students.update({s.matric_number: (s.id, s.degree_id) for s in db.session.query(Student.id, Student.matric_number, Student.degree_id).filter(Student.matric_number.in_(chunk))})
+    for chunk in _chunks({row['course_code'] for _, row in candidates}):
+        courses.update({c.code: (c.id, c.units) for c in db.session.query(Course.id, Course.code, Course.units).filter(Course.code.in_(chunk))})
+
+    resolved, scales = [], get_grade_scales()
+    for row_number, row in candidates:
+        student = students.get(row['matric_number'])
+        course = courses.get(row['course_code'])
+        if student is None:
+            errors.append({"row": row_number, "message": f"Student with matric number {row['matric_number']} not found."}); continue
+        if course is None:
+            errors.append({"row": row_number, "message": f"Course with code {row['course_code']} not found."}); continue
+        student_id, degree_id = student
+        try:
+            row['gpa'] = scales.points(row['grade'], degree_id, row['semester'])
+        except UnknownGradeError as e:
+            errors.append({"row": row_number, "message": str(e)}); continue
+        resolved.append((row_number, row, student_id, course))
+
+    # Duplicate detection against the database in one query per student chunk
+    existing = set()
+    semesters = {row['semester'] for _, row, _, _ in resolved}
+    course_ids = {course[0] for _, _, _, course in resolved}
+    for chunk in _chunks({student_id for _, _, student_id, _ in resolved}):
+        existing.update(db.session.query(Result.student_id, Result.course_id, Result.semester).filter(
+            Result.student_id.in_(chunk), Result.course_id.in_(course_ids), Result.semester.in_(semesters)
+        ).all())
+
+    to_insert, gpa_entries, analytics_entries, seen = [], [], [], set()
+    for row_number, row, student_id, (course_id, units) in resolved:
+        key = (student_id, course_id, row['semester'])
+        if key in existing:
+            errors.append({"row": row_number, "message": f"A result for course {row['course_code']} in semester {row['semester']} already exists for student {row['matric_number']}."}); continue
+        if key in seen:
+            errors.append({"row": row_number, "message": f"Duplicate of an earlier row for {row['matric_number']} / {row['course_code']} / {row['semester']}."}); continue
+        seen.add(key)
+        to_insert.append({"student_id": student_id, "course_id": course_id, "grade": row['grade'], "semester": row['semester'], "gpa": row['gpa']})
+        gpa_entries.append((student_id, row['semester'], units, row['gpa']))
+        analytics_entries.append((course_id, row['semester'], row['grade'], row['gpa']))
+
+    if to_insert:
+        db.session.execute(insert(Result), to_insert)
+        touch(*{f"results:{row['student_id']}" for row in to_insert}) # Bulk insert skips the mapper events
+        for chunk in _chunks({row['student_id'] for row in to_insert}): # Superset of the new ids; reshipping a result is harmless
+            record_changes('results', select(Result.id).where(Result.student_id.in_(chunk), Result.course_id.in_(course_ids), Result.semester.in_(semesters)), 'insert')
+        apply_results_to_gpa(gpa_entries)
+        apply_results_to_analytics(analytics_entries)
+    errors.sort(key=lambda e: e['row'])
+    return len(to_insert), errors
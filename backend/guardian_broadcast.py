@@ -0,0 +1,118 @@
+# backend/guardian_broadcast.py
+import json
+from datetime import datetime
+from string import Template
+
+from markupsafe import escape
+from sqlalchemy import func, insert, select
+
+from extensions import db
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.outbound_email import OutboundEmail
+from models.student import Student
+from models.guardian_broadcast import GuardianBroadcast
+from mail_queue import enqueue_emails_bulk
+from data_versions import touch
+from firestore_cdc import record_changes
+
+# Cohort-wide guardian broadcast: one query selects the matching students, then every guardian
+# email and every advising-note log entry is written with a single bulk INSERT each.
+# Message templates use $placeholders (string.Template) so user text can't reach attribute lookups:
+#   $guardian_name, $student_name, $first_name, $matric_number, $gpa, $degree, $advisor_name
+
+SCOPES = ('advisees', 'department')
+MAX_RECIPIENTS = 5000
+
+
+class BroadcastError(ValueError):
+    """Raised for an invalid broadcast request; endpoints answer it with a 400."""
+
+
+def parse_broadcast_filters(data):
+    filters = data.get('filter') or {}
+    if not isinstance(filters, dict):
+        raise BroadcastError("filter must be an object.")
+    scope = filters.get('scope', 'advisees')
+    if scope not in SCOPES:
+        raise BroadcastError(f"filter.scope must be one of: {', '.join(SCOPES)}.")
+    parsed = {"scope": scope}
+    try:
+        if filters.get('gpa_below') is not None: parsed['gpa_below'] = float(filters['gpa_below'])
+        if filters.get('degree_id') is not None: parsed['degree_id'] = int(filters['degree_id'])
+    except (TypeError, ValueError):
+        raise BroadcastError("filter.gpa_below must be a number and filter.degree_id an integer.")
+    return parsed
+
+
+def select_broadcast_students(lecturer, filters):
+    """Returns the matching student rows (one query), including those without a guardian email."""
+    query = db.session.query(
+        Student.id, Student.first_name, Student.last_name, Student.matric_number, Student.gpa,
+        Student.guardian_name, Student.guardian_email, Degree.name.label('degree_name'),
+        (Lecturer.first_name + " " + Lecturer.last_name).label('advisor_name')
+    ).outerjoin(Degree, Student.degree_id == Degree.id).outerjoin(Lecturer, Student.advisor_id == Lecturer.id)
+    if filters['scope'] == 'advisees':
+        query = query.filter(Student.advisor_id == lecturer.id)
+    else:
+        if not lecturer.department:
+            raise BroadcastError("Department broadcasts require a department on your lecturer profile.")
+        query = query.filter(Lecturer.department == lecturer.department)
+    if 'gpa_below' in filters: query = query.filter(Student.gpa < filters['gpa_below'])
+    if 'degree_id' in filters: query = query.filter(Student.degree_id == filters['degree_id'])
+    return query.order_by(Student.id).all()
+
+
+def create_guardian_broadcast(lecturer, subject, message_template, filters, is_urgent=False, sender=None):
+    """Selects students, queues one templated email per guardian and logs a note for each.
+
+    Returns (broadcast, skipped) where skipped lists students without a guardian email.
+    Nothing is committed here.
+    """
+    students = select_broadcast_students(lecturer, filters)
+    recipients = [s for s in students if s.guardian_email]
+    skipped = [{"id": s.id, "matric_number": s.matric_number} for s in students if not s.guardian_email]
+    if len(recipients) > MAX_RECIPIENTS:
+        raise BroadcastError(f"The filter matches {len(recipients)} guardians; at most {MAX_RECIPIENTS} can be contacted at once.")
+
+    subject_line = "URGENT: " + subject if is_urgent else subject
+    broadcast = GuardianBroadcast(lecturer_id=lecturer.id, scope=filters['scope'], filters=json.dumps(filters), subject=subject_line, total_recipients=len(recipients))
+    db.session.add(broadcast)
+    db.session.flush() # Assigns broadcast.id for the bulk inserts below
+
+    template = Template(message_template)
+    lecturer_name = f"{lecturer.first_name} {lecturer.last_name}"
+    emails, notes, now = [], [], datetime.utcnow()
+    for s in recipients:
+        values = {
+            "guardian_name": s.guardian_name or 'Guardian', "student_name": f"{s.first_name} {s.last_name}", "first_name": s.first_name,
+            "matric_number": s.matric_number, "gpa": f"{s.gpa:.2f}" if s.gpa is not None else "N/A",
+            "degree": s.degree_name or "N/A", "advisor_name": s.advisor_name or lecturer_name
+        }
+        message = template.safe_substitute(values)
+        plain_body = f"Dear {values['guardian_name']},\n\nThis message is from {lecturer_name}, {lecturer.department or 'Academic Advising'}, regarding your ward, {values['student_name']} (Matric No: {s.matric_number}), at Crawford University.\n\nMessage:\n{message}\n\nIf you have any questions, please feel free to reply to this email or contact the advising office.\n\nRegards,\n{lecturer_name}\n{lecturer.department}\nCrawford University"
+        html_body = f"""<p>Dear {escape(values['guardian_name'])},</p><p>This message is from {escape(lecturer_name)}, {escape(lecturer.department or 'Academic Advising')}, regarding your ward, {escape(values['student_name'])} (Matric No: {escape(s.matric_number)}), at Crawford University.</p><hr><p><strong>Message:</strong></p><p>{escape(message).replace(chr(10), '<br>')}</p><hr><p>If you have any questions, please feel free to reply to this email or contact the advising office.</p><p>Regards,<br>{escape(lecturer_name)}<br>{escape(lecturer.department or '')}<br>Crawford University</p>"""
+        emails.append({"subject": subject_line, "recipients": [s.guardian_email], "body": plain_body, "html": html_body})
+        note_content = f"Contacted guardian ({s.guardian_name or 'N/A'}, {s.guardian_email}) via broadcast #{broadcast.id} regarding: {subject}. Message snippet: {message[:100]}..."
+        notes.append({"content": ("[URGENT] " + note_content) if is_urgent else note_content, "student_id": s.id, "lecturer_id": lecturer.id, "created_at": now, "updated_at": now})
+
+    enqueue_emails_bulk(emails, sender=sender, broadcast_id=broadcast.id)
+    if notes:
+        db.session.execute(insert(AdvisingNote), notes)
+        touch(*{f"notes:{note['student_id']}" for note in notes}) # Bulk insert skips the mapper events
+        record_changes('advising_notes', select(AdvisingNote.id).where(AdvisingNote.lecturer_id == lecturer.id, AdvisingNote.created_at == now), 'insert')
+    return broadcast, skipped
+
+
+def get_broadcast_progress(broadcast):
+    """Delivery counts for a broadcast from one grouped query over its queued emails."""
+    counts = dict(db.session.query(OutboundEmail.status, func.count(OutboundEmail.id)).filter(OutboundEmail.broadcast_id == broadcast.id).group_by(OutboundEmail.status).all())
+    total = broadcast.total_recipients
+    done = counts.get('sent', 0) + counts.get('failed', 0)
+    return {
+        "id": broadcast.id, "subject": broadcast.subject, "scope": broadcast.scope, "filter": json.loads(broadcast.filters or '{}'),
+        "created_at": broadcast.created_at.isoformat(), "total": total, "sent": counts.get('sent', 0), "failed": counts.get('failed', 0),
+        "pending": counts.get('pending', 0) + counts.get('sending', 0), "progress": round(done / total, 3) if total else 1.0,
+        "complete": done >= total
+    }
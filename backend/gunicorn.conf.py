@@ -0,0 +1,22 @@
+# backend/gunicorn.conf.py
+import os
+import sys
+
+# gunicorn -c gunicorn.conf.py wsgi:app (see wsgi.py). Every setting can be overridden from the environment.
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+worker_class = 'gthread' # Threads keep a slow export or document download from tying up a whole worker
+threads = int(os.getenv('GUNICORN_THREADS', 4)) # Keep <= DB_POOL_SIZE + DB_MAX_OVERFLOW
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() in ['true', '1', 't'] # Import and build the app once, then fork
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000)) # Recycle workers to cap slow memory growth; 0 = never
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200)) # So workers don't all restart together
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def post_fork(server, worker):
+    if 'wsgi' in sys.modules: # Preloaded: the app (and maybe its pool) came from the master
+        sys.modules['wsgi'].reset_connections_after_fork()
@@ -0,0 +1,154 @@
+# backend/identity.py
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect, literal, select
+from sqlalchemy.orm import Session, object_session
+
+from extensions import db
+from models.student import Student
+from models.lecturer import Lecturer
+
+# Request identity resolved from the JWT without loading the user row.
+# The token supplies id and role; name and (for students) the advisor come from a small,
+# bounded LRU cache of column snapshots (IDENTITY_CACHE_SIZE entries, each trusted for
+# IDENTITY_CACHE_TTL seconds). The full Student/Lecturer object is only loaded when a
+# handler touches an attribute the snapshot doesn't have (e.g. user.degree).
+# Entries are evicted when a session commits a change to a user's name, advisor or
+# password, or deletes the user; the TTL bounds staleness across worker processes and
+# Core writes (seed_bulk upserts), which skip those hooks. Cached snapshots are therefore
+# only used for display: access checks (is this lecturer the student's advisor?) pass
+# fresh=True and read the row.
+
+USER_MODELS = {"student": Student, "lecturer": Lecturer}
+WATCHED_ATTRIBUTES = ('first_name', 'last_name', 'advisor_id', 'password_hash')
+
+IdentitySnapshot = namedtuple('IdentitySnapshot', 'id first_name last_name advisor_id')
+
+_lock = threading.Lock()
+_version = 0
+_entries = OrderedDict()  # (user_type, user_id) -> (loaded_at, IdentitySnapshot), least recently used first
+
+
+class RequestIdentity:
+    """The authenticated user: cheap fields from the snapshot, anything else from the lazily loaded row."""
+
+    def __init__(self, user_type, snapshot):
+        self.user_type = user_type
+        self.id = snapshot.id
+        self.first_name = snapshot.first_name
+        self.last_name = snapshot.last_name
+        self.advisor_id = snapshot.advisor_id
+        self._user = None
+
+    @property
+    def name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def user(self):
+        """The Student/Lecturer ORM object, loaded on first access."""
+        if self._user is None:
+            self._user = db.session.get(USER_MODELS[self.user_type], self.id)
+        return self._user
+
+    def __getattr__(self, attribute):
+        # Only called for attributes not set above, e.g. user.email or user.set_password
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        user = self.user
+        if user is None:
+            raise AttributeError(attribute)
+        return getattr(user, attribute)
+
+    def __repr__(self):
+        return f'<RequestIdentity {self.user_type} {self.id}>'
+
+
+def _load_snapshot(user_type, user_id):
+    model = USER_MODELS[user_type]
+    advisor_column = model.advisor_id if user_type == "student" else literal(None)
+    row = db.session.execute(select(model.id, model.first_name, model.last_name, advisor_column.label('advisor_id')).where(model.id == user_id)).first()
+    return IdentitySnapshot(*row) if row else None
+
+
+def get_identity(user_type, user_id, fresh=False):
+    """Returns the IdentitySnapshot of a user (None if the user doesn't exist), from the cache when fresh.
+
+    fresh=True always reads the row (and refreshes the cached entry); use it for access checks.
+    """
+    key = (user_type, user_id)
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', 60)
+    with _lock:
+        entry = _entries.get(key)
+        if entry and not fresh and time.monotonic() - entry[0] < ttl:
+            _entries.move_to_end(key)
+            return entry[1]
+        version = _version
+    snapshot = _load_snapshot(user_type, user_id)
+    with _lock:
+        if snapshot is None:
+            _entries.pop(key, None) # The user is gone
+        elif version == _version: # Don't cache a row that may have changed while we were reading it
+            _entries[key] = (time.monotonic(), snapshot)
+            _entries.move_to_end(key)
+            while len(_entries) > current_app.config.get('IDENTITY_CACHE_SIZE', 1024):
+                _entries.popitem(last=False)
+    return snapshot
+
+
+def invalidate_identity(user_type=None, user_id=None):
+    """Evicts one user's snapshot, or every snapshot when called without arguments."""
+    global _version
+    with _lock:
+        _version += 1
+        if user_type is None: _entries.clear()
+        else: _entries.pop((user_type, user_id), None)
+
+
+def get_request_identity():
+    """Returns (RequestIdentity, user_type) for the current JWT, or (None, None). Resolved once per request."""
+    if 'request_identity' in g:
+        return g.request_identity
+    resolved = (None, None)
+    user_id_str, user_type = get_jwt_identity(), get_jwt().get("user_type")
+    if not user_id_str or not user_type:
+        current_app.logger.warning("Token missing identity or user_type claim.")
+    elif user_type not in USER_MODELS:
+        current_app.logger.warning(f"Unknown user type in token: {user_type}")
+    else:
+        snapshot = get_identity(user_type, int(user_id_str))
+        if snapshot is not None:
+            resolved = (RequestIdentity(user_type, snapshot), user_type)
+    g.request_identity = resolved
+    return resolved
+
+
+# --- Invalidation hooks (flag on flush, evict on commit) ---
+def _flag_user(user_type, deleted=False):
+    def flag(mapper, connection, target):
+        state = inspect(target)
+        session = object_session(target)
+        if session is None:
+            return
+        if deleted or any(state.attrs[name].history.has_changes() for name in WATCHED_ATTRIBUTES if name in state.attrs):
+            session.info.setdefault('identities_changed', set()).add((user_type, target.id))
+    return flag
+
+for _user_type, _model in USER_MODELS.items():
+    event.listen(_model, 'after_update', _flag_user(_user_type))
+    event.listen(_model, 'after_delete', _flag_user(_user_type, deleted=True))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    for user_type, user_id in session.info.pop('identities_changed', ()):
+        invalidate_identity(user_type, user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_flag_on_rollback(session):
+    session.info.pop('identities_changed', None)
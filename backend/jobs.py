@@ -0,0 +1,368 @@
+# backend/jobs.py
+import importlib
+import json
+import os
+import socket
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+
+from extensions import db
+from models.background_job import BackgroundJob
+import metrics
+
+# Background jobs: a SQL-backed queue drained by `flask worker`.
+# Code enqueues work with enqueue() inside its own transaction (the job exists only if that
+# transaction commits) and returns; a worker process claims due rows with a token and runs
+# each one in a ProcessPoolExecutor child, so heavy work never holds a WSGI request thread
+# and can use every core.
+#
+# - Tasks are plain functions registered with @task(name, queue, max_attempts) (see tasks.py).
+#   The modules in TASK_MODULES are imported the first time a task is looked up.
+#   They are called as function(context, **payload) inside an app context and may return a
+#   JSON-serializable result; context.progress(fraction, message) reports progress.
+# - Each queue has a concurrency limit (JOB_QUEUES, e.g. "default=4,documents=1"), counted
+#   over the running rows in the table, so it holds across every worker sharing the database.
+# - A failed attempt is retried with exponential backoff until max_attempts. A worker that
+#   dies mid-job stops refreshing heartbeat_at; after JOB_LEASE_SECONDS another worker treats
+#   that as a failed attempt.
+#
+# Config (see app.py): JOB_QUEUES, JOB_WORKER_PROCESSES, JOB_POLL_INTERVAL, JOB_LEASE_SECONDS,
+# JOB_RETRY_BASE_SECONDS, JOB_RETRY_MAX_SECONDS.
+
+Task = namedtuple('Task', 'name function queue max_attempts')
+TASKS = {}
+TASK_MODULES = ('tasks',)
+PROGRESS_INTERVAL = 1.0 # Seconds between progress writes; more frequent reports are skipped
+
+_worker_app = None # Set in the worker process before the pool forks
+
+
+class JobError(ValueError):
+    """Raised for an unknown task or queue, or a payload that isn't JSON."""
+
+
+def task(name, queue='default', max_attempts=3):
+    """Registers function(context, **payload) as a background task."""
+    def register(function):
+        TASKS[name] = Task(name, function, queue, max_attempts)
+        return function
+    return register
+
+
+def registered_tasks():
+    """TASKS, after importing the modules that register them."""
+    for module_name in TASK_MODULES:
+        importlib.import_module(module_name)
+    return TASKS
+
+
+def queue_limits(config_value):
+    """Parses "default=4,documents=1" into {'default': 4, 'documents': 1}."""
+    limits = {}
+    for part in (config_value or '').split(','):
+        if not part.strip(): continue
+        name, _, limit = part.partition('=')
+        limits[name.strip()] = int(limit or 1)
+    return limits
+
+
+def enqueue(task_name, payload=None, queue=None, requested_by=None, max_attempts=None, run_at=None):
+    """Adds a job to the current session. The caller commits."""
+    tasks = registered_tasks()
+    if task_name not in tasks:
+        raise JobError(f"Unknown task: {task_name}")
+    definition = tasks[task_name]
+    queue = queue or definition.queue
+    if queue not in queue_limits(current_app.config.get('JOB_QUEUES')):
+        raise JobError(f"Unknown queue: {queue} (configure it in JOB_QUEUES)")
+    try:
+        payload_json = json.dumps(payload or {})
+    except TypeError as e:
+        raise JobError(f"The payload must be JSON-serializable: {e}")
+    job = BackgroundJob(queue=queue, task=task_name, payload=payload_json, status='queued', requested_by=requested_by,
+                        attempts=0, max_attempts=max_attempts or definition.max_attempts, run_at=run_at or datetime.utcnow(), progress=0.0)
+    db.session.add(job)
+    return job
+
+
+def cancel(job):
+    """Cancels a job that hasn't started. Returns False if it is already running or finished. The caller commits."""
+    if job.status != 'queued': return False
+    job.status, job.finished_at = 'cancelled', datetime.utcnow()
+    return True
+
+
+def serialize_job(job):
+    return {
+        "id": job.id, "task": job.task, "queue": job.queue, "status": job.status, "payload": json.loads(job.payload or '{}'),
+        "attempts": job.attempts, "max_attempts": job.max_attempts, "progress": job.progress, "progress_message": job.progress_message,
+        "result": json.loads(job.result) if job.result else None, "last_error": job.last_error,
+        "created_at": job.created_at.isoformat(), "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "next_attempt_at": job.run_at.isoformat() if job.status == 'queued' else None,
+    }
+
+
+class JobContext:
+    """Passed to every task: the job id, the attempt number, and progress reporting."""
+
+    def __init__(self, job_id, attempt):
+        self.job_id, self.attempt = job_id, attempt
+        self._last_write = 0.0
+
+    def progress(self, fraction, message=None, force=False):
+        """Records progress (0..1) and optionally a short message."""
+        values = {"progress": max(0.0, min(1.0, float(fraction)))}
+        if message is not None: values["progress_message"] = str(message).strip()[:255]
+        self._write(values, force)
+
+    def echo(self, message):
+        """Drop-in for the echo callbacks the bulk helpers take: the latest line becomes the progress message."""
+        self._write({"progress_message": str(message).strip()[:255]})
+
+    def _write(self, values, force=False):
+        # On its own connection, so it is visible while the task's transaction is still open;
+        # at most once per PROGRESS_INTERVAL unless forced
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL: return
+        self._last_write = now
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(update(BackgroundJob.__table__).where(BackgroundJob.__table__.c.id == self.job_id).values(heartbeat_at=datetime.utcnow(), **values))
+        except Exception as e: # Best effort: e.g. SQLite is locked by the task's own write transaction
+            current_app.logger.debug(f"Could not record progress for job {self.job_id}: {e}")
+
+
+def _retry_delay(config, attempts):
+    return min(config.get('JOB_RETRY_BASE_SECONDS', 30) * 2 ** (attempts - 1), config.get('JOB_RETRY_MAX_SECONDS', 3600))
+
+
+def _record_failure(job, error, now):
+    """Schedules a retry or marks the job failed. The caller commits."""
+    config = current_app.config
+    job.last_error = str(error)[:4000]
+    job.claim_token, job.claimed_at, job.heartbeat_at = None, None, None
+    if job.attempts >= job.max_attempts:
+        job.status, job.finished_at = 'failed', now
+        current_app.logger.error(f"Giving up on job {job.id} ({job.task}) after {job.attempts} attempt(s): {error}")
+    else:
+        delay = _retry_delay(config, job.attempts)
+        job.status, job.run_at = 'queued', now + timedelta(seconds=delay)
+        current_app.logger.warning(f"Job {job.id} ({job.task}) failed (attempt {job.attempts}), retrying in {delay}s: {error}")
+
+
+def execute_job(job_id, token):
+    """Runs one claimed job in the current app context and records the outcome on its row."""
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.claim_token != token or job.status != 'running': return
+    definition, payload, attempt = registered_tasks().get(job.task), json.loads(job.payload or '{}'), job.attempts
+    db.session.commit() # Don't hold a transaction open around the task
+    started = time.perf_counter()
+    try:
+        if definition is None: raise JobError(f"Unknown task: {job.task}")
+        result = definition.function(JobContext(job_id, attempt), **payload)
+        result_json = json.dumps(result) if result is not None else None
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(BackgroundJob, job_id)
+        if job.claim_token == token: _record_failure(job, f"{type(e).__name__}: {e}", datetime.utcnow())
+        current_app.logger.debug(traceback.format_exc())
+        db.session.commit()
+        return
+    job = db.session.get(BackgroundJob, job_id)
+    if job.claim_token != token: return # The lease expired and another worker took the job over
+    job.status, job.result, job.progress, job.finished_at = 'succeeded', result_json, 1.0, datetime.utcnow()
+    job.claim_token, job.heartbeat_at, job.last_error = None, None, None
+    db.session.commit()
+    current_app.logger.info(f"Job {job_id} ({job.task}) succeeded in {time.perf_counter() - started:.1f}s.")
+
+
+def _init_pool_process():
+    # Forked children must not share the parent's pooled DB connections
+    with _worker_app.app_context():
+        db.engine.dispose(close=False)
+
+
+def _run_in_pool_process(job_id, token):
+    with _worker_app.app_context():
+        try:
+            execute_job(job_id, token)
+        finally:
+            db.session.remove()
+
+
+class Worker:
+    def __init__(self, app, processes=None, queues=None):
+        self.app = app
+        self.processes = processes or app.config.get('JOB_WORKER_PROCESSES', 4)
+        limits = queue_limits(app.config.get('JOB_QUEUES'))
+        self.limits = {name: limit for name, limit in limits.items() if not queues or name in queues}
+        self.token = uuid.uuid4().hex
+        self.name = f"{socket.gethostname()}:{os.getpid()}"[:100]
+        self.running = {} # future -> job id
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def _claim(self, free):
+        """Claims up to `free` due jobs within every queue's concurrency limit; returns their ids."""
+        now = datetime.utcnow()
+        running = dict(db.session.execute(select(BackgroundJob.queue, func.count(BackgroundJob.id)).where(BackgroundJob.status == 'running').group_by(BackgroundJob.queue)).all())
+        wanted = []
+        for queue, limit in self.limits.items():
+            capacity = min(limit - running.get(queue, 0), free - len(wanted))
+            if capacity <= 0: continue
+            wanted += db.session.execute(select(BackgroundJob.id).where(BackgroundJob.queue == queue, BackgroundJob.status == 'queued', BackgroundJob.run_at <= now)
+                                         .order_by(BackgroundJob.run_at, BackgroundJob.id).limit(capacity)).scalars().all()
+        if not wanted:
+            db.session.commit(); return []
+        # Conditional UPDATE + token: concurrent workers never claim the same row
+        db.session.execute(update(BackgroundJob).where(BackgroundJob.id.in_(wanted), BackgroundJob.status == 'queued').values(
+            status='running', claim_token=self.token, claimed_at=now, heartbeat_at=now, worker=self.name,
+            attempts=BackgroundJob.attempts + 1, started_at=now, progress=0.0, progress_message=None
+        ).execution_options(synchronize_session=False))
+        db.session.commit()
+        mine = set(self.running.values())
+        return [job_id for job_id in db.session.execute(select(BackgroundJob.id).where(BackgroundJob.claim_token == self.token, BackgroundJob.status == 'running').order_by(BackgroundJob.id)).scalars() if job_id not in mine]
+
+    def _heartbeat(self):
+        if self.running:
+            db.session.execute(update(BackgroundJob).where(BackgroundJob.id.in_(list(self.running.values())), BackgroundJob.claim_token == self.token)
+                               .values(heartbeat_at=datetime.utcnow()).execution_options(synchronize_session=False))
+        # Jobs whose worker stopped heartbeating (crashed, killed, lost its DB connection) count as a failed attempt
+        now = datetime.utcnow()
+        expired = BackgroundJob.query.filter(BackgroundJob.status == 'running', BackgroundJob.heartbeat_at < now - timedelta(seconds=self.app.config.get('JOB_LEASE_SECONDS', 300))).all()
+        for job in expired:
+            _record_failure(job, f"Worker {job.worker} stopped responding", now)
+        db.session.commit()
+
+    def _reap(self, done):
+        for future in done:
+            job_id = self.running.pop(future)
+            error = future.exception()
+            if error is not None: # The child process died (execute_job records every task error itself)
+                job = db.session.get(BackgroundJob, job_id)
+                if job is not None and job.claim_token == self.token and job.status == 'running':
+                    _record_failure(job, f"Worker process failed: {error!r}", datetime.utcnow())
+                db.session.commit()
+
+    def _start(self, pool, claimed):
+        for job_id in claimed:
+            try:
+                self.running[pool.submit(_run_in_pool_process, job_id, self.token)] = job_id
+            except BrokenProcessPool: # A child died and took the pool with it; its job is failed in _reap
+                pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_pool_process)
+                self.running[pool.submit(_run_in_pool_process, job_id, self.token)] = job_id
+        return pool
+
+    def run(self, once=False, poll_interval=None, echo=print):
+        """Runs until stopped (Ctrl+C). With once=True, exits when no job is due or running."""
+        global _worker_app
+        _worker_app = self.app
+        poll_interval = poll_interval or self.app.config.get('JOB_POLL_INTERVAL', 1.0)
+        echo(f"Worker {self.name}: {self.processes} process(es), queues {self.limits}")
+        pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_pool_process)
+        try:
+            while not self._stop:
+                claimed = []
+                try:
+                    with self.app.app_context():
+                        free = self.processes - len(self.running)
+                        claimed = self._claim(free) if free > 0 else []
+                        pool = self._start(pool, claimed)
+                        if claimed: echo(f"  started job(s) {', '.join(map(str, claimed))}")
+                        self._heartbeat()
+                    if once and not self.running and not claimed: break
+                    if self.running:
+                        done, _ = wait(list(self.running), timeout=poll_interval, return_when=FIRST_COMPLETED)
+                        with self.app.app_context(): self._reap(done)
+                    elif not claimed:
+                        time.sleep(poll_interval)
+                except Exception as e: # e.g. the database is briefly unreachable; running jobs carry on
+                    self.app.logger.error(f"Worker pass failed: {str(e)}", exc_info=True)
+                    time.sleep(poll_interval)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+class QueueDepth:
+    """Queued/running gauges per queue, read from the table at scrape time."""
+
+    def render(self):
+        if not has_app_context(): return []
+        try:
+            rows = db.session.query(BackgroundJob.queue, BackgroundJob.status, func.count(BackgroundJob.id), func.min(BackgroundJob.run_at)) \
+                .filter(BackgroundJob.status.in_(('queued', 'running'))).group_by(BackgroundJob.queue, BackgroundJob.status).all()
+        except Exception:
+            return []
+        lines = ["# HELP background_jobs Background jobs waiting or running, by queue.", "# TYPE background_jobs gauge"]
+        lines += [f'background_jobs{{queue="{queue}",status="{status}"}} {count}' for queue, status, count, _ in rows]
+        now = datetime.utcnow()
+        lines += ["# HELP background_jobs_oldest_queued_seconds How long the oldest due job has been waiting, by queue.", "# TYPE background_jobs_oldest_queued_seconds gauge"]
+        lines += [f'background_jobs_oldest_queued_seconds{{queue="{queue}"}} {max(0.0, (now - oldest).total_seconds()):.3f}' for queue, status, _, oldest in rows if status == 'queued']
+        return lines
+
+
+def init_app(app):
+    """Adds the queue gauges to /metrics. Jobs themselves only run in `flask worker`."""
+    metrics.register_collector(QueueDepth())
+
+
+@click.command('worker')
+@click.option('--processes', type=int, default=None, help='Jobs run at once by this worker (default: JOB_WORKER_PROCESSES).')
+@click.option('--queue', 'queues', multiple=True, help='Only serve these queues (repeatable; default: all in JOB_QUEUES).')
+@click.option('--once', is_flag=True, help='Run every job that is due, then exit.')
+@with_appcontext
+def worker_command(processes, queues, once):
+    """Runs background jobs from the queue table."""
+    worker = Worker(current_app._get_current_object(), processes, set(queues) or None)
+    if not worker.limits:
+        click.echo("!!! No queues to serve; check JOB_QUEUES and --queue."); return
+    try:
+        worker.run(once=once, echo=click.echo)
+    except KeyboardInterrupt:
+        click.echo("Stopping; waiting for running jobs to finish...")
+
+
+@click.command('enqueue')
+@click.argument('task_name')
+@click.option('--payload', default='{}', help='JSON object of keyword arguments for the task.')
+@click.option('--queue', default=None, help="Override the task's queue.")
+@with_appcontext
+def enqueue_command(task_name, payload, queue):
+    """Queues a background task, e.g. `flask enqueue gpa.rebuild`."""
+    try:
+        arguments = json.loads(payload)
+        if not isinstance(arguments, dict): raise JobError("--payload must be a JSON object.")
+        job = enqueue(task_name, arguments, queue=queue)
+        db.session.commit()
+        click.echo(f"Queued job {job.id} ({task_name} on {job.queue}).")
+    except (JobError, ValueError) as e:
+        db.session.rollback(); click.echo(f"!!! {e}")
+        if task_name not in registered_tasks(): click.echo(f"Tasks: {', '.join(sorted(registered_tasks()))}")
+
+
+@click.command('jobs')
+@click.option('--status', default=None, help='queued, running, succeeded, failed or cancelled.')
+@click.option('--limit', default=20, show_default=True)
+@with_appcontext
+def jobs_command(status, limit):
+    """Lists the most recent background jobs."""
+    query = BackgroundJob.query
+    if status: query = query.filter(BackgroundJob.status == status)
+    for job in query.order_by(BackgroundJob.id.desc()).limit(limit):
+        line = f"{job.id:>6}  {job.task:<22} {job.queue:<12} {job.status:<10} {job.progress:>5.0%}  attempt {job.attempts}/{job.max_attempts}"
+        if job.progress_message: line += f"  {job.progress_message}"
+        if job.status == 'failed' and job.last_error: line += f"  !! {job.last_error.splitlines()[0][:120]}"
+        click.echo(line)
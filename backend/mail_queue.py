@@ -0,0 +1,212 @@
+# backend/mail_queue.py
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message
+
+from extensions import db, mail
+from models.outbound_email import OutboundEmail
+
+# Durable outbound mail queue.
+# Request handlers call enqueue_email() inside their own transaction, so the email is only
+# queued if the DB change commits, and an SMTP outage can no longer roll that change back.
+# MailDispatcher drains the email_outbox table from a background thread: due rows are claimed
+# with a token, split into batches, and every batch is sent over a single SMTP connection
+# (mail.connect()) by a worker from a thread pool. Failures are retried with exponential backoff.
+# Each email's outcome is committed as soon as it is known, together with a renewal of the
+# batch's claim, so a long batch never outlives CLAIM_LEASE; an email whose claim was taken
+# over by another dispatcher anyway is skipped rather than sent twice.
+#
+# Config (see app.py): MAIL_DISPATCHER_ENABLED, MAIL_DISPATCH_WORKERS, MAIL_DISPATCH_BATCH_SIZE,
+# MAIL_DISPATCH_INTERVAL, MAIL_MAX_ATTEMPTS, MAIL_RETRY_BASE_SECONDS, MAIL_RETRY_MAX_SECONDS.
+#
+# Local testing with a debugging SMTP stand-in that prints every message instead of delivering it:
+#   python -m aiosmtpd -n -l localhost:1025
+#   MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=False flask mail-dispatcher --once
+
+CLAIM_LEASE = timedelta(minutes=10) # Claimed emails not renewed for this long are assumed abandoned
+
+def enqueue_email(subject, recipients, body=None, html=None, sender=None):
+    """Adds an email to the outbox in the current session. The caller commits."""
+    email = OutboundEmail(
+        subject=subject, recipients=json.dumps(list(recipients)), body=body, html=html,
+        sender=json.dumps(sender) if sender else None, status='pending', attempts=0, next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(email)
+    return email
+
+
+def enqueue_emails_bulk(emails, sender=None, broadcast_id=None):
+    """Queues many emails with one executemany INSERT. emails: dicts with subject, recipients, body, html."""
+    now = datetime.utcnow()
+    sender_json = json.dumps(sender) if sender else None
+    rows = [{
+        "subject": e['subject'], "recipients": json.dumps(list(e['recipients'])), "body": e.get('body'), "html": e.get('html'),
+        "sender": sender_json, "broadcast_id": broadcast_id, "status": 'pending', "attempts": 0, "next_attempt_at": now, "created_at": now
+    } for e in emails]
+    if rows:
+        db.session.execute(OutboundEmail.__table__.insert(), rows)
+    return len(rows)
+
+
+def notify_mail_dispatcher():
+    """Wakes the in-process dispatcher (if running) so freshly committed emails go out right away."""
+    dispatcher = current_app.extensions.get('mail_dispatcher')
+    if dispatcher: dispatcher.wake()
+
+
+def _build_message(email):
+    sender = json.loads(email.sender) if email.sender else current_app.config.get('MAIL_DEFAULT_SENDER')
+    if isinstance(sender, list): sender = tuple(sender)
+    return Message(subject=email.subject, sender=sender, recipients=json.loads(email.recipients), body=email.body, html=email.html)
+
+
+def _mark_failed(email, error, now):
+    config = current_app.config
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    email.claimed_at, email.claim_token = None, None
+    if email.attempts >= config.get('MAIL_MAX_ATTEMPTS', 5):
+        email.status = 'failed'
+        current_app.logger.error(f"Giving up on outbound email {email.id} after {email.attempts} attempts: {error}")
+    else:
+        delay = min(config.get('MAIL_RETRY_BASE_SECONDS', 30) * 2 ** (email.attempts - 1), config.get('MAIL_RETRY_MAX_SECONDS', 3600))
+        email.status, email.next_attempt_at = 'pending', now + timedelta(seconds=delay)
+        current_app.logger.warning(f"Outbound email {email.id} failed (attempt {email.attempts}), retrying in {delay}s: {error}")
+
+
+def _renew_claim(token):
+    """Restarts the lease on every email still claimed with token."""
+    OutboundEmail.query.filter(OutboundEmail.claim_token == token, OutboundEmail.status == 'sending').update({OutboundEmail.claimed_at: datetime.utcnow()}, synchronize_session=False)
+
+
+class MailDispatcher:
+    def __init__(self, app):
+        self.app = app
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive(): return
+            self._stop.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self.app.config.get('MAIL_DISPATCH_WORKERS', 2), thread_name_prefix='mail-worker')
+            self._thread = threading.Thread(target=self._run, name='mail-dispatcher', daemon=True)
+            self._thread.start()
+            self.app.logger.info("Mail dispatcher started.")
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        if self._thread: self._thread.join(timeout=10)
+        if self._pool: self._pool.shutdown(wait=True)
+        self._thread, self._pool = None, None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        interval = self.app.config.get('MAIL_DISPATCH_INTERVAL', 5)
+        while not self._stop.is_set():
+            try:
+                processed = self.dispatch_once()
+            except Exception as e:
+                processed = 0; self.app.logger.error(f"Mail dispatcher pass failed: {str(e)}", exc_info=True)
+            if not processed: # Keep draining while there is work; otherwise sleep until woken or the interval passes
+                self._wake.wait(interval)
+            self._wake.clear()
+
+    def _claim(self):
+        """Claims up to workers * batch size due emails. Returns (claim token, batches of ids)."""
+        config = self.app.config
+        batch_size = config.get('MAIL_DISPATCH_BATCH_SIZE', 50)
+        now = datetime.utcnow()
+        # Emails left in 'sending' by a crashed dispatcher become due again after a lease period
+        OutboundEmail.query.filter(OutboundEmail.status == 'sending', OutboundEmail.claimed_at < now - CLAIM_LEASE).update({OutboundEmail.status: 'pending', OutboundEmail.claimed_at: None, OutboundEmail.claim_token: None}, synchronize_session=False)
+        due_ids = [row.id for row in db.session.query(OutboundEmail.id).filter(OutboundEmail.status == 'pending', OutboundEmail.next_attempt_at <= now).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(batch_size * config.get('MAIL_DISPATCH_WORKERS', 2))]
+        if not due_ids:
+            db.session.commit(); return None, []
+        # Conditional UPDATE + token: concurrent dispatchers (e.g. several gunicorn workers) never claim the same row
+        token = uuid.uuid4().hex
+        OutboundEmail.query.filter(OutboundEmail.id.in_(due_ids), OutboundEmail.status == 'pending').update({OutboundEmail.status: 'sending', OutboundEmail.claimed_at: now, OutboundEmail.claim_token: token}, synchronize_session=False)
+        db.session.commit()
+        claimed = [row.id for row in db.session.query(OutboundEmail.id).filter(OutboundEmail.status == 'sending', OutboundEmail.claim_token == token).order_by(OutboundEmail.id)]
+        return token, [claimed[i:i + batch_size] for i in range(0, len(claimed), batch_size)]
+
+    def dispatch_once(self):
+        """Runs one claim-and-send pass and returns the number of emails processed (sent or rescheduled)."""
+        with self.app.app_context():
+            token, batches = self._claim()
+        if not batches: return 0
+        send_batch = partial(self._send_batch, token)
+        sent = sum(self._pool.map(send_batch, batches)) if self._pool else sum(send_batch(batch) for batch in batches)
+        processed = sum(len(batch) for batch in batches)
+        self.app.logger.info(f"Mail dispatcher sent {sent} of {processed} claimed email(s).")
+        return processed
+
+    def _send_batch(self, token, email_ids):
+        sent = 0
+        with self.app.app_context():
+            pending = OutboundEmail.query.filter(OutboundEmail.id.in_(email_ids)).order_by(OutboundEmail.id).all()
+            try:
+                with mail.connect() as connection: # One SMTP session for the whole batch
+                    while pending:
+                        email = pending.pop(0)
+                        if email.claim_token != token: continue # Reloaded after each commit; the claim was lost, so the new owner sends it
+                        try:
+                            connection.send(_build_message(email))
+                            email.status, email.sent_at, email.claimed_at, email.claim_token, email.last_error = 'sent', datetime.utcnow(), None, None, None
+                            email.attempts += 1; sent += 1
+                        except Exception as e:
+                            _mark_failed(email, e, datetime.utcnow())
+                        _renew_claim(token)
+                        db.session.commit() # This outcome is durable before the next email goes out
+            except Exception as e: # Connect/login failed or the connection dropped: retry everything not yet handled
+                db.session.rollback()
+                for email in pending:
+                    if email.claim_token == token: _mark_failed(email, e, datetime.utcnow())
+                db.session.commit()
+        return sent
+
+
+def init_app(app):
+    """Registers the dispatcher. When MAIL_DISPATCHER_ENABLED it starts with the first request."""
+    dispatcher = MailDispatcher(app)
+    app.extensions['mail_dispatcher'] = dispatcher
+    if not app.config.get('MAIL_DISPATCHER_ENABLED', True): return
+
+    @app.before_request
+    def _start_mail_dispatcher():
+        if dispatcher._thread is None: dispatcher.start()
+
+
+@click.command('mail-dispatcher')
+@click.option('--once', is_flag=True, help='Send everything currently due, then exit.')
+@with_appcontext
+def mail_dispatcher_command(once):
+    """Runs the outbound mail dispatcher in the foreground."""
+    dispatcher = current_app.extensions.get('mail_dispatcher') or MailDispatcher(current_app._get_current_object())
+    if once:
+        total = 0
+        while True: # Failed emails are rescheduled into the future, so this always terminates
+            processed = dispatcher.dispatch_once()
+            total += processed
+            if not processed: break
+        click.echo(f"Processed {total} email(s).")
+        return
+    dispatcher.start()
+    click.echo("Mail dispatcher running. Press Ctrl+C to stop.")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        dispatcher.stop()
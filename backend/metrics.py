@@ -0,0 +1,158 @@
+# backend/metrics.py
+import bisect
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Built-in request instrumentation, exposed at /metrics in the Prometheus text format.
+# Per route (the URL rule, e.g. /api/students/<int:student_id>/notes, so ids don't explode
+# the label set): request latency, SQL statements and DB time per request, and response size.
+# SQL is timed with engine events, so every query is counted, whichever module issued it.
+# With SLOW_REQUEST_SECONDS set, requests slower than that are logged with their SQL.
+# Metrics are kept in memory per process; with several workers each one reports its own.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SLOW_LOG_MAX_STATEMENTS = 50 # Statements kept per request for the slow-request log
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name, self.help_text, self.label_names, self.buckets = name, help_text, label_names, buckets
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name, self.help_text, self.label_names = name, help_text, label_names
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{label_text}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by route, method and status.', ('route', 'method', 'status'))
+LATENCY = Histogram('http_request_duration_seconds', 'Request latency.', ('route', 'method'), LATENCY_BUCKETS)
+SQL_STATEMENTS = Histogram('http_request_sql_statements', 'SQL statements executed per request.', ('route', 'method'), SQL_COUNT_BUCKETS)
+DB_TIME = Histogram('http_request_db_seconds', 'Cumulative database time per request.', ('route', 'method'), LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size (streamed responses are not measured).', ('route', 'method'), SIZE_BUCKETS)
+_COLLECTORS = [REQUESTS, LATENCY, SQL_STATEMENTS, DB_TIME, RESPONSE_SIZE]
+
+
+def register_collector(collector):
+    """Adds another metric (anything with render() -> lines) to the /metrics output. Each kind is added once per process."""
+    if any(type(existing) is type(collector) and getattr(existing, 'name', None) == getattr(collector, 'name', None) for existing in _COLLECTORS): return
+    _COLLECTORS.append(collector)
+
+
+def render_metrics():
+    lines = []
+    for collector in _COLLECTORS:
+        lines.extend(collector.render())
+    return '\n'.join(lines) + '\n'
+
+
+# --- SQL timing (engine events; only statements issued while handling a request are attributed) ---
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['metrics_query_start'].pop()
+    if not has_request_context():
+        return
+    stats = g.get('request_metrics')
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats['sql_count'] += 1
+    stats['db_time'] += elapsed
+    if stats['statements'] is not None and len(stats['statements']) < SLOW_LOG_MAX_STATEMENTS:
+        stats['statements'].append((elapsed, statement))
+
+
+@event.listens_for(Engine, 'handle_error')
+def _on_cursor_error(exception_context):
+    if exception_context.connection is not None and exception_context.connection.info.get('metrics_query_start'):
+        exception_context.connection.info['metrics_query_start'].pop()
+
+
+def init_app(app):
+    """Instruments every request and registers GET /metrics (unless METRICS_ENABLED is false)."""
+    if not app.config.get('METRICS_ENABLED', True): return
+    slow_seconds = app.config.get('SLOW_REQUEST_SECONDS') or 0
+
+    @app.before_request
+    def _start_request_metrics():
+        g.request_metrics = {"started": time.perf_counter(), "sql_count": 0, "db_time": 0.0, "statements": [] if slow_seconds else None}
+
+    @app.after_request
+    def _record_request_metrics(response):
+        stats = g.pop('request_metrics', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats['started']
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        labels = (route, request.method)
+        REQUESTS.inc((route, request.method, str(response.status_code)))
+        LATENCY.observe(labels, elapsed)
+        SQL_STATEMENTS.observe(labels, stats['sql_count'])
+        DB_TIME.observe(labels, stats['db_time'])
+        if not response.is_streamed:
+            RESPONSE_SIZE.observe(labels, response.calculate_content_length() or 0)
+        if slow_seconds and elapsed >= slow_seconds:
+            statements = '\n'.join(f"  [{duration * 1000:.1f} ms] {' '.join(statement.split())}" for duration, statement in stats['statements'])
+            app.logger.warning(f"Slow request: {request.method} {request.full_path.rstrip('?')} took {elapsed * 1000:.0f} ms "
+                               f"({stats['sql_count']} SQL statements, {stats['db_time'] * 1000:.0f} ms in the DB):\n{statements}")
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -1,8 +1,8 @@
 # backend/migrate_to_firebase.py
 
+import argparse
 import os
 import sys
-import json
 from datetime import datetime
 from werkzeug.security import generate_password_hash # For creating dummy passwords if needed
 
@@ -10,8 +10,6 @@ from werkzeug.security import generate_password_hash # For creating dummy passwo
 # This allows importing app and models correctly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
 from flask import Flask # Import Flask to create a dummy app context
 from extensions import db, jwt, mail, cors # Import extensions for app initialization
 
@@ -24,6 +22,12 @@ from models.advising_resource import AdvisingResource
 from models.note import AdvisingNote
 from models.enrollment import Enrollment
 from models.result import Result
+from models.grade_scale import GradeScale, GradeScaleEntry
+from grade_scale import UnknownGradeError, grade_points
+from firestore_memory import InMemoryFirestore
+from firestore_sync import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, Checkpoint, firestore_client, migrate_all
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'firestore_migration_checkpoint.json')
 
 # --- Flask App Initialization (for DB context) ---
 # Create a minimal Flask app instance to get the SQLAlchemy DB context
@@ -44,35 +48,14 @@ jwt.init_app(app)
 mail.init_app(app)
 cors.init_app(app) # Initialize CORS
 
-# --- Firebase Admin SDK Initialization ---
-try:
-    cred = credentials.Certificate(os.path.join(os.path.dirname(__file__), "firebase-admin.json"))
-    firebase_admin.initialize_app(cred)
-    firestore_db = firestore.client()
-    print("🔥 Firebase Admin SDK initialized successfully.")
-except Exception as e:
-    print(f"❌ Error initializing Firebase Admin SDK: {e}")
-    print("Please ensure 'firebase-admin.json' is in the 'backend' directory and is valid.")
-    sys.exit(1)
-
-# --- Helper to add/update document in Firestore ---
-def add_to_firestore(collection_name, doc_id, data):
-    try:
-        firestore_db.collection(collection_name).document(str(doc_id)).set(data)
-        # print(f"  ✅ Added/Updated {collection_name}/{doc_id}")
-    except Exception as e:
-        print(f"  ❌ Failed to add/update {collection_name}/{doc_id}: {e}")
-
 # --- Dummy Data for empty tables ---
-# Define a mapping for grades to GPA points (standard 5.0 scale)
-GRADE_TO_GPA = {
-    'A': 5.0, 'B': 4.0, 'C': 3.0, 'D': 2.0, 'E': 1.0, 'F': 0.0,
-    'A+': 5.0, 'A-': 4.7, 'B+': 4.3, 'B-': 3.7, 'C+': 3.3, 'C-': 2.7,
-    'D+': 2.3, 'D-': 1.7, 'E+': 1.3, 'E-': 0.7, 'F+': 0.3, 'F-': 0.0
-}
-
-def get_gpa_from_grade(grade):
-    return GRADE_TO_GPA.get(grade.upper().strip(), 0.0)
+# Grade points come from the central grade-scale registry (grade_scale.py), the same
+# compiled lookup used by submit_grade and the batch upload.
+def get_gpa_from_grade(grade, degree_id=None, semester=None):
+    try:
+        return grade_points(grade, degree_id, semester)
+    except UnknownGradeError:
+        return 0.0
 
 def create_dummy_data():
     print("\n--- Creating Dummy Data for Empty Tables ---")
@@ -118,10 +101,6 @@ def create_dummy_data():
             degree_id=degree.id,
             gpa=0.0,
             advisor_id=lecturer.id,
-            dob="2000-01-01",
-            gender="Male",
-            phone_number="08012345678",
-            address="123 University Rd",
             guardian_name="Test Guardian",
             guardian_email="guardian@example.com",
             guardian_phone="09098765432",
@@ -197,7 +176,7 @@ def create_dummy_data():
                     course_id=course.id,
                     grade=res_data['grade'],
                     semester=res_data['semester'],
-                    gpa=get_gpa_from_grade(res_data['grade']) # Calculate GPA based on grade
+                    gpa=get_gpa_from_grade(res_data['grade'], student.degree_id, res_data['semester']) # Calculate GPA based on grade
                 )
                 db.session.add(result)
                 db.session.commit()
@@ -233,161 +212,46 @@ def create_dummy_data():
     return dummy_data
 
 # --- Main Migration Logic ---
-def migrate_data():
+def migrate_data(client, checkpoint_path=DEFAULT_CHECKPOINT, restart=False, workers=DEFAULT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE, dummy_data=True):
+    """Streams every table into Firestore (see firestore_sync.py), resuming from the checkpoint file."""
     with app.app_context():
-        # Ensure dummy data exists if tables are empty
-        dummy_data = create_dummy_data()
-        default_student_uid = None
-        default_lecturer_uid = None
-
-        # 1. Migrate Degrees
-        print("\n--- Migrating Degrees ---")
-        degrees = Degree.query.all()
-        for degree in degrees:
-            doc_data = {
-                "name": degree.name,
-                "faculty": degree.faculty
-            }
-            add_to_firestore("degrees", degree.id, doc_data)
-
-        # 2. Migrate Lecturers (and create users in 'users' collection with role 'lecturer')
-        print("\n--- Migrating Lecturers ---")
-        lecturers = Lecturer.query.all()
-        for lecturer in lecturers:
-            # We use the lecturer's email as a unique identifier for Firebase Auth
-            # For simplicity, we'll generate a UID for them here if not already linked to Firebase Auth
-            # In a real scenario, you'd link existing users to Firebase Auth
-            # For this migration, we'll use their DB ID as the Firestore Document ID
-            lecturer_uid = f"lecturer_{lecturer.id}" # Using a prefix to avoid collision if IDs overlap with students
-            # Or, if you want to link to actual Firebase Auth UIDs, you'd fetch them here.
-            # For now, let's use a consistent ID.
-            
-            # If the dummy lecturer was created, use its UID for consistency
-            if lecturer.email == "lecturer@example.com" and hasattr(dummy_data['lecturer'], 'id'):
-                lecturer_uid = f"lecturer_{dummy_data['lecturer'].id}"
-                default_lecturer_uid = lecturer_uid # Store for later use
-
-            user_doc_data = {
-                "name": f"{lecturer.first_name} {lecturer.last_name}",
-                "email": lecturer.email,
-                "department": lecturer.department,
-                "office_location": lecturer.office_location,
-                "role": "lecturer"
-            }
-            add_to_firestore("users", lecturer_uid, user_doc_data)
-
-        # 3. Migrate Students (and create users in 'users' collection with role 'student')
-        print("\n--- Migrating Students ---")
-        students = Student.query.all()
-        for student in students:
-            # Similar to lecturers, use a consistent UID for Firestore Document ID
-            student_uid = f"student_{student.id}"
-            if student.email == "student@example.com" and hasattr(dummy_data['student'], 'id'):
-                student_uid = f"student_{dummy_data['student'].id}"
-                default_student_uid = student_uid # Store for later use
-
-            user_doc_data = {
-                "name": f"{student.first_name} {student.last_name}",
-                "email": student.email,
-                "matric_number": student.matric_number,
-                "gpa": student.gpa,
-                "role": "student",
-                "dob": student.dob,
-                "gender": student.gender,
-                "phone_number": student.phone_number,
-                "address": student.address,
-                "guardian_name": student.guardian_name,
-                "guardian_email": student.guardian_email,
-                "guardian_phone": student.guardian_phone,
-                "guardian_relationship": student.guardian_relationship
-            }
-            if student.degree:
-                user_doc_data["degree"] = {
-                    "id": student.degree.id,
-                    "name": student.degree.name,
-                    "faculty": student.degree.faculty
-                }
-            if student.advisor:
-                user_doc_data["advisorId"] = f"lecturer_{student.advisor.id}" # Link to lecturer's Firestore UID
-            add_to_firestore("users", student_uid, user_doc_data)
-
-        # 4. Migrate Courses
-        print("\n--- Migrating Courses ---")
-        courses = Course.query.all()
-        for course in courses:
-            doc_data = {
-                "code": course.code,
-                "title": course.title,
-                "units": course.units,
-                "status": course.status,
-                "level": course.level,
-                "semester": course.semester
-            }
-            add_to_firestore("courses", course.id, doc_data)
-
-        # 5. Migrate Enrollments (if you had any specific enrollment data beyond results)
-        # Note: Your current Enrollment model doesn't have grade/gpa, Result model handles that.
-        # So, for now, we'll just migrate basic enrollment records if they exist.
-        print("\n--- Migrating Enrollments (if applicable) ---")
-        enrollments = Enrollment.query.all()
-        for enrollment in enrollments:
-            doc_data = {
-                "studentId": f"student_{enrollment.student_id}", # Link to student's Firestore UID
-                "courseId": enrollment.course_id,
-                "academic_year": enrollment.academic_year,
-                "semester": enrollment.semester,
-                "enrolled_at": enrollment.enrolled_at,
-                "updated_at": enrollment.updated_at
-            }
-            add_to_firestore("enrollments", enrollment.id, doc_data)
-
-
-        # 6. Migrate Results
-        print("\n--- Migrating Results ---")
-        results = Result.query.all()
-        for result in results:
-            doc_data = {
-                "studentId": f"student_{result.student_id}", # Link to student's Firestore UID
-                "courseId": result.course_id,
-                "grade": result.grade,
-                "semester": result.semester,
-                "gpa": result.gpa
-            }
-            add_to_firestore("results", result.id, doc_data)
-
-        # 7. Migrate Advising Notes
-        print("\n--- Migrating Advising Notes ---")
-        notes = AdvisingNote.query.all()
-        for note in notes:
-            doc_data = {
-                "content": note.content,
-                "studentId": f"student_{note.student_id}", # Link to student's Firestore UID
-                "lecturerId": f"lecturer_{note.lecturer_id}", # Link to lecturer's Firestore UID
-                "created_at": note.created_at,
-                "updated_at": note.updated_at,
-                "author_name": note.author.first_name + " " + note.author.last_name if note.author else "Unknown" # Denormalized for display
-            }
-            add_to_firestore("advising_notes", note.id, doc_data)
+        if dummy_data:
+            # Ensure dummy data exists if tables are empty
+            create_dummy_data()
 
-        # 8. Migrate Advising Resources
-        print("\n--- Migrating Advising Resources ---")
-        resources = AdvisingResource.query.all()
-        for resource in resources:
-            doc_data = {
-                "title": resource.title,
-                "description": resource.description,
-                "url": resource.url,
-                "category": resource.category
-            }
-            add_to_firestore("advising_resources", resource.id, doc_data)
+        checkpoint = Checkpoint(checkpoint_path)
+        if restart:
+            checkpoint.reset()
+        counts = migrate_all(client, checkpoint, workers=workers, chunk_size=chunk_size)
 
-        print("\n--- Data Migration to Firebase Firestore Complete! ---")
+        print(f"\n--- Data Migration to Firebase Firestore Complete! ({sum(counts.values())} documents) ---")
         print("Remember to create corresponding users in Firebase Authentication if you haven't already,")
         print("and ensure their UIDs match the Document IDs in the 'users' collection (e.g., student_1, lecturer_1).")
-        print("For the dummy student/lecturer, their UIDs will be 'student_X' and 'lecturer_Y' where X/Y are their original DB IDs.")
+        print(f"Progress is checkpointed in {checkpoint_path}; re-running only copies rows added since (use --restart for a full copy).")
+        return counts
 
 if __name__ == "__main__":
     # To run this script, ensure your Flask app's database is accessible
     # and you have the firebase-admin.json key in the backend directory.
     # Run from your project root: python backend/migrate_to_firebase.py
-    migrate_data()
+    # Against the emulator: FIRESTORE_EMULATOR_HOST=localhost:8080 python backend/migrate_to_firebase.py
+    parser = argparse.ArgumentParser(description="Copy the SQL database into Firestore.")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help="File recording the last migrated id per table.")
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and copy everything again.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Concurrent batch writers.")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched per database round trip.")
+    parser.add_argument('--no-dummy-data', action='store_true', help="Don't create the sample rows first.")
+    parser.add_argument('--memory', action='store_true', help="Dry run into an in-memory Firestore.")
+    args = parser.parse_args()
+
+    if args.memory:
+        firestore_db = InMemoryFirestore()
+    else:
+        try:
+            firestore_db = firestore_client()
+            print("🔥 Firebase Admin SDK initialized successfully.")
+        except Exception as e:
+            print(f"❌ Error initializing Firebase Admin SDK: {e}")
+            print("Please ensure 'firebase-admin.json' is in the 'backend' directory and is valid.")
+            sys.exit(1)
+    migrate_data(firestore_db, args.checkpoint, args.restart, args.workers, args.chunk_size, dummy_data=not args.no_dummy_data)
@@ -0,0 +1,32 @@
+"""add keyset pagination indexes
+
+Revision ID: 3f1a9c2b7d40
+Revises: ce71786dee8c
+Create Date: 2026-10-17 10:12:03.114512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2b7d40'
+down_revision = 'ce71786dee8c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('advising_notes', schema=None) as batch_op:
+        batch_op.create_index('ix_advising_notes_student_created', ['student_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.create_index('ix_results_student_semester', ['student_id', 'semester'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.drop_index('ix_results_student_semester')
+
+    with op.batch_alter_table('advising_notes', schema=None) as batch_op:
+        batch_op.drop_index('ix_advising_notes_student_created')
@@ -0,0 +1,47 @@
+"""add document jobs
+
+Revision ID: 4d8e2f6a1c93
+Revises: b61f0d9e3c75
+Create Date: 2026-10-18 01:12:07.614230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8e2f6a1c93'
+down_revision = 'b61f0d9e3c75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('document_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('filters', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('rendered', sa.Integer(), nullable=False),
+    sa.Column('reused', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['requested_by'], ['lecturers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('document_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_document_jobs_requested_by'), ['requested_by'], unique=False)
+        batch_op.create_index(batch_op.f('ix_document_jobs_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('document_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_document_jobs_status'))
+        batch_op.drop_index(batch_op.f('ix_document_jobs_requested_by'))
+
+    op.drop_table('document_jobs')
@@ -0,0 +1,29 @@
+"""add data versions
+
+Revision ID: 5e2b9c7f4a13
+Revises: f18c6a2d9e05
+Create Date: 2026-10-17 21:42:17.204519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b9c7f4a13'
+down_revision = 'f18c6a2d9e05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_versions',
+    sa.Column('scope', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
@@ -0,0 +1,49 @@
+"""add guardian broadcasts
+
+Revision ID: 6c0b3e58a2f1
+Revises: d4e7a1f09b36
+Create Date: 2026-10-17 13:05:41.217730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c0b3e58a2f1'
+down_revision = 'd4e7a1f09b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('guardian_broadcasts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lecturer_id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=20), nullable=False),
+    sa.Column('filters', sa.Text(), nullable=True),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('total_recipients', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['lecturer_id'], ['lecturers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('guardian_broadcasts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_guardian_broadcasts_lecturer_id'), ['lecturer_id'], unique=False)
+
+    with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('broadcast_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_email_outbox_broadcast_id'), ['broadcast_id'], unique=False)
+        batch_op.create_foreign_key('fk_email_outbox_broadcast_id', 'guardian_broadcasts', ['broadcast_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_email_outbox_broadcast_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_email_outbox_broadcast_id'))
+        batch_op.drop_column('broadcast_id')
+
+    with op.batch_alter_table('guardian_broadcasts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_guardian_broadcasts_lecturer_id'))
+
+    op.drop_table('guardian_broadcasts')
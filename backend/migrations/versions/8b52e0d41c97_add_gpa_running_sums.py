@@ -0,0 +1,63 @@
+"""add gpa running sums
+
+Revision ID: 8b52e0d41c97
+Revises: 3f1a9c2b7d40
+Create Date: 2026-10-17 11:02:47.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b52e0d41c97'
+down_revision = '3f1a9c2b7d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_semester_gpa',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('semester', sa.String(length=50), nullable=False),
+    sa.Column('total_units', sa.Integer(), nullable=False),
+    sa.Column('total_quality_points', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', 'semester', name='uq_student_semester_gpa')
+    )
+    with op.batch_alter_table('student_semester_gpa', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_student_semester_gpa_student_id'), ['student_id'], unique=False)
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_units', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('total_quality_points', sa.Float(), server_default='0', nullable=False))
+
+    # Backfill the sums from existing results (what `flask rebuild-gpa` does), so CGPAs are
+    # right as soon as the new code serves them. Students without graded results keep their gpa.
+    op.execute(
+        "INSERT INTO student_semester_gpa (student_id, semester, total_units, total_quality_points) "
+        "SELECT results.student_id, results.semester, SUM(courses.units), SUM(courses.units * results.gpa) "
+        "FROM results JOIN courses ON results.course_id = courses.id "
+        "WHERE results.gpa IS NOT NULL AND courses.units > 0 "
+        "GROUP BY results.student_id, results.semester"
+    )
+    op.execute(
+        "UPDATE students SET "
+        "total_units = (SELECT SUM(s.total_units) FROM student_semester_gpa s WHERE s.student_id = students.id), "
+        "total_quality_points = (SELECT SUM(s.total_quality_points) FROM student_semester_gpa s WHERE s.student_id = students.id), "
+        "gpa = (SELECT ROUND(CAST(SUM(s.total_quality_points) / SUM(s.total_units) AS NUMERIC), 2) FROM student_semester_gpa s WHERE s.student_id = students.id) "
+        "WHERE id IN (SELECT student_id FROM student_semester_gpa)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_column('total_quality_points')
+        batch_op.drop_column('total_units')
+
+    with op.batch_alter_table('student_semester_gpa', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_student_semester_gpa_student_id'))
+
+    op.drop_table('student_semester_gpa')
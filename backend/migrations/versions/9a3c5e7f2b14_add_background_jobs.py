@@ -0,0 +1,56 @@
+"""add background jobs
+
+Revision ID: 9a3c5e7f2b14
+Revises: 4d8e2f6a1c93
+Create Date: 2026-10-18 02:40:53.207815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3c5e7f2b14'
+down_revision = '4d8e2f6a1c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('queue', sa.String(length=32), nullable=False),
+    sa.Column('task', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('claim_token', sa.String(length=32), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('progress_message', sa.String(length=255), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['requested_by'], ['lecturers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_background_jobs_claim_token'), ['claim_token'], unique=False)
+        batch_op.create_index(batch_op.f('ix_background_jobs_requested_by'), ['requested_by'], unique=False)
+        batch_op.create_index('ix_background_jobs_queue_status_run_at', ['queue', 'status', 'run_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_background_jobs_queue_status_run_at')
+        batch_op.drop_index(batch_op.f('ix_background_jobs_requested_by'))
+        batch_op.drop_index(batch_op.f('ix_background_jobs_claim_token'))
+
+    op.drop_table('background_jobs')
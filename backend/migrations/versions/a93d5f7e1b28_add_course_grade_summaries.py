@@ -0,0 +1,46 @@
+"""add course grade summaries
+
+Revision ID: a93d5f7e1b28
+Revises: 6c0b3e58a2f1
+Create Date: 2026-10-17 13:48:22.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93d5f7e1b28'
+down_revision = '6c0b3e58a2f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('course_grade_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('semester', sa.String(length=50), nullable=False),
+    sa.Column('result_count', sa.Integer(), nullable=False),
+    sa.Column('graded_count', sa.Integer(), nullable=False),
+    sa.Column('total_grade_points', sa.Float(), nullable=False),
+    sa.Column('pass_count', sa.Integer(), nullable=False),
+    sa.Column('fail_count', sa.Integer(), nullable=False),
+    sa.Column('grade_histogram', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('course_id', 'semester', name='uq_course_grade_summary')
+    )
+    with op.batch_alter_table('course_grade_summaries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_course_grade_summaries_course_id'), ['course_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_course_grade_summaries_semester'), ['semester'], unique=False)
+
+    # Run `flask rebuild-analytics` afterwards to backfill from existing results.
+
+
+def downgrade():
+    with op.batch_alter_table('course_grade_summaries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_course_grade_summaries_semester'))
+        batch_op.drop_index(batch_op.f('ix_course_grade_summaries_course_id'))
+
+    op.drop_table('course_grade_summaries')
@@ -0,0 +1,42 @@
+"""add firestore outbox
+
+Revision ID: b61f0d9e3c75
+Revises: 5e2b9c7f4a13
+Create Date: 2026-10-17 23:05:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61f0d9e3c75'
+down_revision = '5e2b9c7f4a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('firestore_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=32), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('operation', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('claim_token', sa.String(length=32), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('firestore_outbox', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_firestore_outbox_claim_token'), ['claim_token'], unique=False)
+        batch_op.create_index(batch_op.f('ix_firestore_outbox_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_firestore_outbox_source_row', ['source', 'row_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('firestore_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_firestore_outbox_source_row')
+        batch_op.drop_index(batch_op.f('ix_firestore_outbox_created_at'))
+        batch_op.drop_index(batch_op.f('ix_firestore_outbox_claim_token'))
+
+    op.drop_table('firestore_outbox')
@@ -0,0 +1,57 @@
+"""add grade scales
+
+Revision ID: f18c6a2d9e05
+Revises: a93d5f7e1b28
+Create Date: 2026-10-17 14:31:09.883457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f18c6a2d9e05'
+down_revision = 'a93d5f7e1b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('grade_scales',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('degree_id', sa.Integer(), nullable=True),
+    sa.Column('session', sa.String(length=9), nullable=True),
+    sa.Column('is_default', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['degree_id'], ['degrees.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    with op.batch_alter_table('grade_scales', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_grade_scales_degree_id'), ['degree_id'], unique=False)
+
+    op.create_table('grade_scale_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scale_id', sa.Integer(), nullable=False),
+    sa.Column('grade', sa.String(length=5), nullable=False),
+    sa.Column('points', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['scale_id'], ['grade_scales.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scale_id', 'grade', name='uq_grade_scale_entry')
+    )
+    with op.batch_alter_table('grade_scale_entries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_grade_scale_entries_scale_id'), ['scale_id'], unique=False)
+
+    # Until a scale is stored (`flask seed-grade-scale`), the built-in 5-point scale applies.
+
+
+def downgrade():
+    with op.batch_alter_table('grade_scale_entries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_grade_scale_entries_scale_id'))
+
+    op.drop_table('grade_scale_entries')
+    with op.batch_alter_table('grade_scales', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_grade_scales_degree_id'))
+
+    op.drop_table('grade_scales')
@@ -0,0 +1,38 @@
+# backend/models/background_job.py
+from extensions import db
+from datetime import datetime
+
+class BackgroundJob(db.Model):
+    __tablename__ = 'background_jobs'
+
+    # One unit of work for `flask worker` (see jobs.py). Workers claim queued rows with a token,
+    # keep heartbeat_at fresh while the task runs, and record the outcome on the row.
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(32), nullable=False)
+    task = db.Column(db.String(64), nullable=False)      # Registered task name, e.g. "gpa.rebuild"
+    payload = db.Column(db.Text, nullable=True)          # JSON keyword arguments for the task
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, succeeded, failed, cancelled
+    requested_by = db.Column(db.Integer, db.ForeignKey('lecturers.id'), nullable=True, index=True) # NULL = enqueued from the CLI
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) # Not claimed before this (retry backoff)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True, index=True) # Set by the worker that claimed the row
+    worker = db.Column(db.String(100), nullable=True)    # host:pid of that worker
+    heartbeat_at = db.Column(db.DateTime, nullable=True) # Running rows with a stale heartbeat are retried
+
+    progress = db.Column(db.Float, nullable=False, default=0.0) # 0..1, reported by the task
+    progress_message = db.Column(db.String(255), nullable=True)
+    result = db.Column(db.Text, nullable=True)           # JSON return value of the task
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Serves the claim query: WHERE queue = ? AND status = 'queued' AND run_at <= now ORDER BY run_at
+    __table_args__ = (db.Index('ix_background_jobs_queue_status_run_at', 'queue', 'status', 'run_at'),)
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.task} {self.status}>'
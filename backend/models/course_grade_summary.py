@@ -0,0 +1,30 @@
+# backend/models/course_grade_summary.py
+import json
+from extensions import db
+
+class CourseGradeSummary(db.Model):
+    __tablename__ = 'course_grade_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
+    semester = db.Column(db.String(50), nullable=False, index=True) # Same string as Result.semester
+
+    # Running aggregates maintained by course_analytics
+    result_count = db.Column(db.Integer, nullable=False, default=0)     # Every result, including ones without points (e.g. DEX)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)     # Results that carry grade points
+    total_grade_points = db.Column(db.Float, nullable=False, default=0.0)
+    pass_count = db.Column(db.Integer, nullable=False, default=0)
+    fail_count = db.Column(db.Integer, nullable=False, default=0)
+    grade_histogram = db.Column(db.Text, nullable=False, default='{}')  # JSON: {"A": 12, "B": 30, ...}
+
+    __table_args__ = (db.UniqueConstraint('course_id', 'semester', name='uq_course_grade_summary'),)
+
+    @property
+    def mean_grade_points(self):
+        return round(self.total_grade_points / self.graded_count, 2) if self.graded_count else None
+
+    def histogram(self):
+        return json.loads(self.grade_histogram or '{}')
+
+    def __repr__(self):
+        return f'<CourseGradeSummary CourseID:{self.course_id} Semester:{self.semester} Results:{self.result_count}>'
@@ -0,0 +1,16 @@
+# backend/models/data_version.py
+from extensions import db
+from datetime import datetime
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+
+    # Change counter per scope, e.g. "results:42" (one student's results), "notes:42",
+    # "advisees:7" (one lecturer's advisee list) or "degrees" (a whole table).
+    # Bumped in the same transaction as the change; see data_versions.py.
+    scope = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.scope}={self.version}>'
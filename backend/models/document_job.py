@@ -0,0 +1,27 @@
+# backend/models/document_job.py
+from extensions import db
+from datetime import datetime
+
+class DocumentJob(db.Model):
+    __tablename__ = 'document_jobs'
+
+    # A batch of generated certificates or transcripts (see documents.py).
+    # Progress counters are updated after every chunk of students; the per-student output
+    # list is written to <DOCUMENT_CACHE_DIR>/jobs/<id>.json when the job finishes.
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)      # certificate or transcript
+    requested_by = db.Column(db.Integer, db.ForeignKey('lecturers.id'), nullable=True, index=True) # NULL = started from the CLI
+    filters = db.Column(db.Text, nullable=True)          # JSON of the filter used to select students
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True) # pending, running, completed, failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    rendered = db.Column(db.Integer, nullable=False, default=0) # Newly rendered documents
+    reused = db.Column(db.Integer, nullable=False, default=0)   # Served from the content-addressed cache
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<DocumentJob {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,21 @@
+# backend/models/firestore_outbox.py
+from extensions import db
+from datetime import datetime
+
+class FirestoreOutbox(db.Model):
+    __tablename__ = 'firestore_outbox'
+
+    # One row per SQL change waiting to be copied to Firestore (see firestore_cdc.py).
+    # The shipper rebuilds the document from the current row, so only the key is recorded.
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(32), nullable=False)   # firestore_sync source name, e.g. "results"
+    row_id = db.Column(db.Integer, nullable=False)      # Primary key of the changed row
+    operation = db.Column(db.String(10), nullable=False) # insert, update or delete (informational)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True, index=True) # Set by the shipper pass that claimed the row
+
+    __table_args__ = (db.Index('ix_firestore_outbox_source_row', 'source', 'row_id'),)
+
+    def __repr__(self):
+        return f'<FirestoreOutbox {self.id} {self.operation} {self.source}/{self.row_id}>'
@@ -0,0 +1,36 @@
+# backend/models/grade_scale.py
+from extensions import db
+from datetime import datetime
+
+class GradeScale(db.Model):
+    __tablename__ = 'grade_scales'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True) # e.g. "Standard 5-point scale"
+    # Scope: a scale applies to a degree and/or an academic session; with neither set and
+    # is_default it is the institution-wide fallback. The most specific match wins.
+    degree_id = db.Column(db.Integer, db.ForeignKey('degrees.id'), nullable=True, index=True)
+    session = db.Column(db.String(9), nullable=True)  # e.g. "2023/2024", matches the start of Result.semester
+    is_default = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    entries = db.relationship('GradeScaleEntry', back_populates='scale', cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<GradeScale {self.name}>'
+
+
+class GradeScaleEntry(db.Model):
+    __tablename__ = 'grade_scale_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scale_id = db.Column(db.Integer, db.ForeignKey('grade_scales.id'), nullable=False, index=True)
+    grade = db.Column(db.String(5), nullable=False)  # Stored upper-case, e.g. "A", "B+", "DEX"
+    points = db.Column(db.Float, nullable=True)      # NULL = no grade points, carries no GPA weight (e.g. DEX exemption)
+
+    scale = db.relationship('GradeScale', back_populates='entries')
+
+    __table_args__ = (db.UniqueConstraint('scale_id', 'grade', name='uq_grade_scale_entry'),)
+
+    def __repr__(self):
+        return f'<GradeScaleEntry {self.grade}={self.points}>'
@@ -0,0 +1,20 @@
+# backend/models/guardian_broadcast.py
+from extensions import db
+from datetime import datetime
+
+class GuardianBroadcast(db.Model):
+    __tablename__ = 'guardian_broadcasts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    lecturer_id = db.Column(db.Integer, db.ForeignKey('lecturers.id'), nullable=False, index=True)
+    scope = db.Column(db.String(20), nullable=False)   # 'advisees' or 'department'
+    filters = db.Column(db.Text, nullable=True)        # JSON of the filter used to select students
+    subject = db.Column(db.String(255), nullable=False)
+    total_recipients = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Per-email delivery progress lives on the queued OutboundEmail rows (email_outbox.broadcast_id)
+    emails = db.relationship('OutboundEmail', backref='broadcast', lazy='dynamic')
+
+    def __repr__(self):
+        return f'<GuardianBroadcast {self.id} by Lecturer {self.lecturer_id} to {self.total_recipients} guardian(s)>'
@@ -1,7 +1,7 @@
 # backend/models/lecturer.py
 # --- Corrected Version ---
 from extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash # Import hashing functions
+from password_policy import hash_password, verify_password # Hashing follows PASSWORD_HASH_METHOD
 
 class Lecturer(db.Model):
     __tablename__ = 'lecturers'
@@ -26,14 +26,12 @@ class Lecturer(db.Model):
     notes_authored = db.relationship('AdvisingNote', back_populates='author', lazy='dynamic')
 
     def set_password(self, password):
-        """Hashes the password and stores it."""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        """Hashes the password (using the configured hash policy) and stores it."""
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Checks if the submitted password matches the stored hash."""
-        if not self.password_hash:
-            return False # No password set
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<Lecturer {self.first_name} {self.last_name}>'
\ No newline at end of file
@@ -19,5 +19,8 @@ class AdvisingNote(db.Model):
     student = db.relationship('Student', back_populates='notes')
     author = db.relationship('Lecturer', back_populates='notes_authored') # Changed name to 'author'
 
+    # Serves the paginated notes timeline: WHERE student_id = ? ORDER BY created_at DESC, id DESC
+    __table_args__ = (db.Index('ix_advising_notes_student_created', 'student_id', 'created_at', 'id'),)
+
     def __repr__(self):
         return f'<AdvisingNote {self.id} for Student {self.student_id} by Lecturer {self.lecturer_id}>'
\ No newline at end of file
@@ -0,0 +1,28 @@
+# backend/models/outbound_email.py
+from extensions import db
+from datetime import datetime
+
+class OutboundEmail(db.Model):
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.Text, nullable=True)        # JSON: "addr" or ["Name", "addr"]; NULL = MAIL_DEFAULT_SENDER
+    recipients = db.Column(db.Text, nullable=False)   # JSON list of addresses
+    body = db.Column(db.Text, nullable=True)
+    html = db.Column(db.Text, nullable=True)
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('guardian_broadcasts.id'), nullable=True, index=True) # Set for cohort broadcasts
+
+    # Delivery state, driven by mail_queue.MailDispatcher
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True) # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True, index=True) # Set by the dispatcher that claimed the row
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<OutboundEmail {self.id} {self.status} to {self.recipients}>'
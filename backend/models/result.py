@@ -14,6 +14,9 @@ class Result(db.Model):
     semester = db.Column(db.String(50), nullable=False)  # e.g., "2023/2024 - Semester 1" (as used in seed.py)
     gpa = db.Column(db.Float, nullable=True)  # Grade points for this specific course result
 
+    # Serves the paginated results listing: WHERE student_id = ? ORDER BY semester DESC
+    __table_args__ = (db.Index('ix_results_student_semester', 'student_id', 'semester'),)
+
     # Optional: Relationships can be helpful for ORM-based access patterns
     # If your 'Student' model has a backref like 'results', define it here or there.
     # If your 'Course' model has a backref like 'results', define it here or there.
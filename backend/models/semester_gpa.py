@@ -0,0 +1,22 @@
+# backend/models/semester_gpa.py
+from extensions import db
+
+class StudentSemesterGpa(db.Model):
+    __tablename__ = 'student_semester_gpa'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    semester = db.Column(db.String(50), nullable=False) # Same string as Result.semester, e.g. "2023/2024 - Semester 1"
+
+    # Running sums maintained by gpa_engine; GPA = total_quality_points / total_units
+    total_units = db.Column(db.Integer, nullable=False, default=0)
+    total_quality_points = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (db.UniqueConstraint('student_id', 'semester', name='uq_student_semester_gpa'),)
+
+    @property
+    def gpa(self):
+        return round(self.total_quality_points / self.total_units, 2) if self.total_units else None
+
+    def __repr__(self):
+        return f'<StudentSemesterGpa StudentID:{self.student_id} Semester:{self.semester} GPA:{self.gpa}>'
@@ -1,6 +1,6 @@
 # backend/models/student.py
 from extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_policy import hash_password, verify_password # Hashing follows PASSWORD_HASH_METHOD
 
 class Student(db.Model):
     __tablename__ = 'students'
@@ -10,7 +10,10 @@ class Student(db.Model):
     last_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     matric_number = db.Column(db.String(20), unique=True, nullable=False)
-    gpa = db.Column(db.Float, nullable=True) # Overall GPA for the student
+    gpa = db.Column(db.Float, nullable=True) # Overall GPA (CGPA) for the student, maintained by gpa_engine
+    # Cumulative running sums behind gpa (see gpa_engine.py)
+    total_units = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_quality_points = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
     password_hash = db.Column(db.String(255), nullable=True)
 
     # Foreign Keys
@@ -33,14 +36,12 @@ class Student(db.Model):
 
 
     def set_password(self, password):
-        """Hashes the password and stores it."""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        """Hashes the password (using the configured hash policy) and stores it."""
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Checks if the submitted password matches the stored hash."""
-        if not self.password_hash:
-            return False # No password set
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<Student {self.matric_number} - {self.first_name} {self.last_name}>'
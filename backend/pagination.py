@@ -0,0 +1,57 @@
+# backend/pagination.py
+import base64
+import json
+
+from flask import current_app, request
+
+# Keyset (seek) pagination helpers.
+# A page is requested with ?limit=N and continued with ?cursor=<next_cursor from the previous page>.
+# The cursor is an opaque, URL-safe token holding the sort key of the last row returned, so each
+# page is a bounded index range scan no matter how deep into the history the client is.
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed limit or cursor; endpoints answer it with a 400."""
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Returns the list of `size` key values stored in the cursor token."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode((token + '=' * (-len(token) % 4)).encode('ascii')))
+    except (ValueError, TypeError):
+        raise InvalidPageRequest("Invalid pagination cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest("Invalid pagination cursor.")
+    return values
+
+
+def get_page_args():
+    """Reads ?limit= and ?cursor= from the request.
+
+    Returns (paginate, limit, cursor_token). Pagination is opt-in: when neither argument is
+    given, paginate is False and the endpoint returns its full list as before.
+    """
+    limit_arg = request.args.get('limit')
+    cursor = request.args.get('cursor') or None
+    if limit_arg is None and cursor is None:
+        return False, None, None
+    max_limit = current_app.config.get('PAGINATION_MAX_LIMIT', 100)
+    if limit_arg is None:
+        limit = current_app.config.get('PAGINATION_DEFAULT_LIMIT', 25)
+    else:
+        try: limit = int(limit_arg)
+        except ValueError: raise InvalidPageRequest("limit must be an integer.")
+    return True, max(1, min(limit, max_limit)), cursor
+
+
+def split_page(rows, limit, key_func):
+    """Trims a `limit + 1` row fetch to `limit` rows and builds the cursor for the next page."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(key_func(rows[-1])) if has_more and rows else None
+    return rows, next_cursor
@@ -0,0 +1,39 @@
+# backend/password_policy.py
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password-hash policy. PASSWORD_HASH_METHOD takes any werkzeug method string, e.g.
+# "pbkdf2:sha256:600000" or "scrypt:16384:8:1"; leaving out the cost parameters means
+# werkzeug's defaults. Hashes made under an older policy keep working and are upgraded
+# transparently the next time the user logs in (see needs_rehash).
+
+DEFAULT_PASSWORD_HASH_METHOD = 'pbkdf2:sha256'
+
+
+def _configured_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
+
+
+@lru_cache(maxsize=16)
+def _canonical_prefix(method):
+    """The '<method>:<params>' prefix werkzeug writes for `method`, with defaults filled in."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=_configured_method())
+
+
+def verify_password(password_hash, password):
+    if not password_hash:
+        return False # No password set
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with a different algorithm or cost than the current policy."""
+    if not password_hash:
+        return False
+    return password_hash.split('$', 1)[0] != _canonical_prefix(_configured_method())
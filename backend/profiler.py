@@ -0,0 +1,147 @@
+# backend/profiler.py
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Opt-in profiling of individual requests in a running deployment.
+# A request is profiled when it carries `X-Profile: <PROFILER_TOKEN>` or is picked by
+# PROFILER_SAMPLE_RATE (0..1). A sampling profiler records the handling thread's stack
+# every PROFILER_INTERVAL_MS; the stacks are written in collapsed ("folded") form, ready
+# for flamegraph.pl or speedscope, next to a JSON file with the SQL timeline. Profiles go to
+# PROFILER_DIR, and only the newest PROFILER_MAX_PROFILES are kept.
+# With neither a token nor a sample rate configured nothing is registered, so there is no
+# per-request cost at all.
+
+PROFILE_HEADER = 'X-Profile'
+MAX_STACK_DEPTH = 128
+
+
+class StackSampler:
+    """One background thread sampling the stacks of the threads currently being profiled."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stacks = {}  # thread id -> Counter of folded stacks
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._stacks[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._stacks.pop(thread_id, Counter())
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                profiled = list(self._stacks)
+            if not profiled:
+                self._wake.clear(); self._wake.wait(); continue # Idle until the next profiled request
+            frames = sys._current_frames()
+            for thread_id in profiled:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                folded = ';'.join(reversed(stack))
+                with self._lock:
+                    if thread_id in self._stacks: self._stacks[thread_id][folded] += 1
+            time.sleep(self.interval)
+
+
+def _should_profile(token, sample_rate):
+    supplied = request.headers.get(PROFILE_HEADER)
+    if supplied is not None and token and hmac.compare_digest(supplied, token):
+        return 'header'
+    if sample_rate and random.random() < sample_rate:
+        return 'sampled'
+    return None
+
+
+def _prune(directory, keep):
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    for name in profiles[:max(0, len(profiles) - keep)]:
+        for path in (name, name[:-len('.json')] + '.folded'):
+            try: os.remove(os.path.join(directory, path))
+            except FileNotFoundError: pass
+
+
+# --- SQL timeline (engine events; only statements of a profiled request are recorded) ---
+def _mark_sql_start(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('profile') is not None:
+        conn.info['profiler_query_start'] = time.perf_counter()
+
+
+def _record_sql(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('profiler_query_start', None)
+    profile = g.get('profile') if started is not None and has_request_context() else None
+    if profile is not None:
+        profile['sql'].append({"start_ms": round((started - profile['started']) * 1000, 2), "duration_ms": round((time.perf_counter() - started) * 1000, 2), "statement": ' '.join(statement.split())})
+
+
+def init_app(app):
+    """Registers the profiling hooks if PROFILER_TOKEN or PROFILER_SAMPLE_RATE is configured."""
+    token, sample_rate = app.config.get('PROFILER_TOKEN'), app.config.get('PROFILER_SAMPLE_RATE') or 0
+    if not token and not sample_rate: return
+    directory = app.config.get('PROFILER_DIR') or os.path.join(app.instance_path, 'profiles')
+    keep = app.config.get('PROFILER_MAX_PROFILES', 200)
+    sampler = StackSampler(app.config.get('PROFILER_INTERVAL_MS', 5) / 1000)
+    os.makedirs(directory, exist_ok=True)
+
+    # Engine events are process-wide: register them once, however many apps are created
+    if not event.contains(Engine, 'before_cursor_execute', _mark_sql_start):
+        event.listen(Engine, 'before_cursor_execute', _mark_sql_start)
+        event.listen(Engine, 'after_cursor_execute', _record_sql)
+
+    @app.before_request
+    def _start_profile():
+        trigger = _should_profile(token, sample_rate)
+        if trigger:
+            g.profile = {"id": f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}", "trigger": trigger, "started": time.perf_counter(), "sql": []}
+            sampler.start(threading.get_ident())
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        stacks = sampler.stop(threading.get_ident())
+        elapsed_ms = round((time.perf_counter() - profile['started']) * 1000, 2)
+        summary = {
+            "id": profile['id'], "trigger": profile['trigger'], "method": request.method, "path": request.full_path.rstrip('?'),
+            "route": request.url_rule.rule if request.url_rule else None, "status": response.status_code, "duration_ms": elapsed_ms,
+            "samples": sum(stacks.values()), "sample_interval_ms": sampler.interval * 1000,
+            "sql_count": len(profile['sql']), "sql_ms": round(sum(q['duration_ms'] for q in profile['sql']), 2), "sql": profile['sql'],
+        }
+        try:
+            with open(os.path.join(directory, profile['id'] + '.folded'), 'w') as folded:
+                folded.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+            with open(os.path.join(directory, profile['id'] + '.json'), 'w') as details:
+                json.dump(summary, details, indent=1)
+            _prune(directory, keep)
+            response.headers['X-Profile-Id'] = profile['id']
+        except OSError as e:
+            app.logger.error(f"Could not write profile {profile['id']}: {e}")
+        return response
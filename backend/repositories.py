@@ -0,0 +1,327 @@
+# backend/repositories.py
+import random
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+
+from extensions import db
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.student import Student
+from firestore_cdc import build_writes
+from firestore_memory import InMemoryFirestore
+from firestore_sync import MAX_BATCH_WRITES, commit_batch, firestore_client, lecturer_uid, student_uid
+from gpa_engine import get_semester_gpas
+from resource_cache import get_cached_resources
+
+# Read side of the API behind one interface, so it can be served from SQL or from Firestore
+# while both run in parallel. DATA_BACKEND picks the implementation ('sql' or 'firestore').
+# Writes always go to SQL, the source of truth, and reach Firestore through firestore_cdc.
+#
+# Both backends return the same plain dicts:
+#   get_student(id)              {"id", "name", "matric_number", "email", "gpa", "advisor_id", "degree": {"name", "faculty"} | None} | None
+#   get_lecturer(id)             {"id", "name", "email", "department", "office_location"} | None
+#   get_results(student_id, after=(semester, course_code), limit)   newest semester first
+#   get_semester_gpas(student_id)
+#   get_notes(student_id, after=(created_at, id), limit)             newest first, with author_name
+#   get_advisees(lecturer_id, after_id, limit)                       by student id
+#   get_resources(ordering)      'title' or 'category'
+#
+# FirestoreRepository reads the denormalized documents migrate_to_firebase.py writes: a
+# student's degree is embedded in its users/ document and notes carry author_name. Results
+# only hold a courseId, so the courses of a page are fetched with one batched get_all().
+# Per-student collections are small, so ordering and cursors are applied in Python, which
+# keeps Firestore down to its automatic single-field indexes. Lecturer profiles and advising
+# resources are still served from SQL (resources through resource_cache): both are read on
+# every dashboard load, and a lagging replica would keep showing a renamed lecturer or a
+# removed resource until the next shipper pass.
+#
+# `flask repository-benchmark` times both on the same sampled workload.
+
+BACKENDS = ('sql', 'firestore')
+
+
+class SqlRepository:
+    name = 'sql'
+    reads_sql = True # data_versions ETags describe exactly what it returns
+
+    def get_student(self, student_id):
+        row = db.session.query(
+            Student.id, Student.first_name, Student.last_name, Student.matric_number, Student.email, Student.gpa, Student.advisor_id,
+            Degree.name.label('degree_name'), Degree.faculty.label('degree_faculty')
+        ).outerjoin(Degree, Student.degree_id == Degree.id).filter(Student.id == student_id).first()
+        if row is None: return None
+        return {"id": row.id, "name": f"{row.first_name} {row.last_name}", "matric_number": row.matric_number, "email": row.email, "gpa": row.gpa,
+                "advisor_id": row.advisor_id, "degree": {"name": row.degree_name, "faculty": row.degree_faculty} if row.degree_name else None}
+
+    def get_lecturer(self, lecturer_id):
+        row = db.session.query(Lecturer.id, Lecturer.first_name, Lecturer.last_name, Lecturer.email, Lecturer.department, Lecturer.office_location).filter(Lecturer.id == lecturer_id).first()
+        if row is None: return None
+        return {"id": row.id, "name": f"{row.first_name} {row.last_name}", "email": row.email, "department": row.department, "office_location": row.office_location}
+
+    def get_results(self, student_id, after=None, limit=None):
+        query = db.session.query(Result.grade, Result.semester, Result.gpa.label('grade_points'), Course.code.label('course_code'), Course.title.label('course_title'), Course.units.label('course_units')).join(Course, Result.course_id == Course.id).filter(Result.student_id == student_id)
+        if after: # Seek past the last (semester DESC, course code ASC) row of the previous page
+            after_semester, after_code = after
+            query = query.filter((Result.semester < after_semester) | ((Result.semester == after_semester) & (Course.code > after_code)))
+        query = query.order_by(Result.semester.desc(), Course.code.asc())
+        if limit is not None: query = query.limit(limit)
+        return [{"grade": res.grade, "semester": res.semester, "grade_points": res.grade_points, "course_code": res.course_code, "course_title": res.course_title, "course_units": res.course_units} for res in query]
+
+    def get_semester_gpas(self, student_id):
+        return get_semester_gpas(student_id)
+
+    def get_notes(self, student_id, after=None, limit=None):
+        query = db.session.query(AdvisingNote.id, AdvisingNote.content, AdvisingNote.created_at, AdvisingNote.updated_at, (Lecturer.first_name + " " + Lecturer.last_name).label("author_name")).join(Lecturer, AdvisingNote.lecturer_id == Lecturer.id).filter(AdvisingNote.student_id == student_id)
+        if after: # Seek past the last (created_at DESC, id DESC) row of the previous page
+            after_created_at, after_id = after
+            query = query.filter((AdvisingNote.created_at < after_created_at) | ((AdvisingNote.created_at == after_created_at) & (AdvisingNote.id < after_id)))
+        query = query.order_by(AdvisingNote.created_at.desc(), AdvisingNote.id.desc())
+        if limit is not None: query = query.limit(limit)
+        return [{"id": note.id, "content": note.content, "created_at": note.created_at, "updated_at": note.updated_at, "author_name": note.author_name} for note in query]
+
+    def get_advisees(self, lecturer_id, after_id=None, limit=None):
+        # One column-projected query for all advisees (LEFT JOIN keeps students without a degree),
+        # instead of lazy-loading lecturer.advisees and then each advisee's degree.
+        query = db.session.query(
+            Student.id, Student.first_name, Student.last_name, Student.matric_number, Student.email, Student.gpa,
+            Student.guardian_name, Student.guardian_email, Student.guardian_phone, Student.guardian_relationship,
+            Degree.name.label('degree_name')
+        ).outerjoin(Degree, Student.degree_id == Degree.id).filter(Student.advisor_id == lecturer_id)
+        if after_id is not None: query = query.filter(Student.id > after_id)
+        query = query.order_by(Student.id)
+        if limit is not None: query = query.limit(limit)
+        return [{
+            "id": adv.id, "name": f"{adv.first_name} {adv.last_name}", "matric_number": adv.matric_number, "email": adv.email,
+            "degree_name": adv.degree_name, "gpa": adv.gpa,
+            "guardian_name": adv.guardian_name, "guardian_email": adv.guardian_email,
+            "guardian_phone": adv.guardian_phone, "guardian_relationship": adv.guardian_relationship
+        } for adv in query]
+
+    def get_resources(self, ordering='title'):
+        return get_cached_resources(ordering)
+
+
+def _where(query, field, op, value):
+    try:
+        from google.cloud.firestore_v1.base_query import FieldFilter
+    except ImportError: # Without the client library installed (in-memory Firestore)
+        return query.where(field, op, value)
+    return query.where(filter=FieldFilter(field, op, value))
+
+
+def _uid_to_id(uid):
+    return int(uid.rsplit('_', 1)[1]) if uid else None
+
+
+def _page(rows, sort_key, after, limit, reverse=False):
+    """Sorts rows, keeps those past the cursor (compared on sort_key) and trims to limit."""
+    rows.sort(key=sort_key, reverse=reverse)
+    if after is not None:
+        after = tuple(after)
+        rows = [row for row in rows if (sort_key(row) < after if reverse else sort_key(row) > after)]
+    return rows if limit is None else rows[:limit]
+
+
+class _Descending:
+    """Wraps a value so it sorts in reverse inside an otherwise ascending sort key."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __gt__(self, other):
+        return self.value < other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class FirestoreRepository:
+    name = 'firestore'
+    reads_sql = False # A replica that may lag the SQL data_versions
+
+    def __init__(self, client):
+        self.client = client
+
+    def _users(self):
+        return self.client.collection('users')
+
+    def get_student(self, student_id):
+        snapshot = self._users().document(student_uid(student_id)).get()
+        if not snapshot.exists: return None
+        data = snapshot.to_dict()
+        degree = data.get('degree')
+        return {"id": student_id, "name": data.get('name'), "matric_number": data.get('matric_number'), "email": data.get('email'), "gpa": data.get('gpa'),
+                "advisor_id": _uid_to_id(data.get('advisorId')), "degree": {"name": degree.get('name'), "faculty": degree.get('faculty')} if degree else None}
+
+    def get_lecturer(self, lecturer_id):
+        return _sql.get_lecturer(lecturer_id) # See the module comment: served from SQL
+
+    def _result_rows(self, student_id):
+        results = [snapshot.to_dict() for snapshot in _where(self.client.collection('results'), 'studentId', '==', student_uid(student_id)).stream()]
+        course_ids = sorted({result['courseId'] for result in results})
+        courses = {int(snapshot.id): snapshot.to_dict() for snapshot in self.client.get_all([self.client.collection('courses').document(str(course_id)) for course_id in course_ids]) if snapshot.exists} if course_ids else {}
+        rows = []
+        for result in results:
+            course = courses.get(result['courseId'], {})
+            rows.append({"grade": result.get('grade'), "semester": result.get('semester'), "grade_points": result.get('gpa'),
+                         "course_code": course.get('code'), "course_title": course.get('title'), "course_units": course.get('units')})
+        return rows
+
+    def get_results(self, student_id, after=None, limit=None):
+        sort_key = lambda row: (_Descending(row['semester']), row['course_code'] or '')
+        return _page(self._result_rows(student_id), sort_key, (_Descending(after[0]), after[1]) if after else None, limit)
+
+    def get_semester_gpas(self, student_id):
+        # The same sums gpa_engine keeps in student_semester_gpa, from the results and course units
+        totals = {}
+        for row in self._result_rows(student_id):
+            if row['grade_points'] is None or not row['course_units']: continue
+            units, points = totals.get(row['semester'], (0, 0.0))
+            totals[row['semester']] = (units + row['course_units'], points + row['course_units'] * row['grade_points'])
+        return [{"semester": semester, "units": units, "gpa": round(points / units, 2) if units else None} for semester, (units, points) in sorted(totals.items())]
+
+    def get_notes(self, student_id, after=None, limit=None):
+        rows = []
+        for snapshot in _where(self.client.collection('advising_notes'), 'studentId', '==', student_uid(student_id)).stream():
+            data = snapshot.to_dict()
+            rows.append({"id": int(snapshot.id), "content": data.get('content'), "created_at": data.get('created_at'), "updated_at": data.get('updated_at'), "author_name": data.get('author_name')})
+        return _page(rows, lambda note: (_naive(note['created_at']), note['id']), (_naive(after[0]), after[1]) if after else None, limit, reverse=True)
+
+    def get_advisees(self, lecturer_id, after_id=None, limit=None):
+        rows = []
+        for snapshot in _where(self._users(), 'advisorId', '==', lecturer_uid(lecturer_id)).stream():
+            data = snapshot.to_dict()
+            if data.get('role') != 'student': continue
+            rows.append({
+                "id": _uid_to_id(snapshot.id), "name": data.get('name'), "matric_number": data.get('matric_number'), "email": data.get('email'),
+                "degree_name": (data.get('degree') or {}).get('name'), "gpa": data.get('gpa'),
+                "guardian_name": data.get('guardian_name'), "guardian_email": data.get('guardian_email'),
+                "guardian_phone": data.get('guardian_phone'), "guardian_relationship": data.get('guardian_relationship')
+            })
+        return _page(rows, lambda adv: (adv['id'],), (after_id,) if after_id is not None else None, limit)
+
+    def get_resources(self, ordering='title'):
+        return _sql.get_resources(ordering)
+
+
+_sql = SqlRepository()
+
+
+def _naive(value):
+    """Firestore returns timezone-aware UTC timestamps; SQL columns hold naive UTC."""
+    return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
+
+
+def create_repository(app, backend=None, client=None):
+    backend = backend or app.config.get('DATA_BACKEND', 'sql')
+    if backend == 'sql':
+        return SqlRepository()
+    if backend == 'firestore':
+        return FirestoreRepository(client or firestore_client(app.config.get('FIRESTORE_CREDENTIALS')))
+    raise ValueError(f"Unknown DATA_BACKEND '{backend}'; expected one of {', '.join(BACKENDS)}.")
+
+
+def get_repository():
+    """The app's repository for DATA_BACKEND, created on first use."""
+    repository = current_app.extensions.get('repository')
+    if repository is None:
+        repository = current_app.extensions['repository'] = create_repository(current_app)
+    return repository
+
+
+# --- Benchmark ---
+def _copy_sample_to_firestore(client, student_ids, lecturer_ids):
+    """Writes the documents the sampled workload reads, built exactly as the migration builds them."""
+    course_ids = {row.course_id for row in db.session.query(Result.course_id).filter(Result.student_id.in_(student_ids)).distinct()}
+    advisee_ids = {row.id for row in db.session.query(Student.id).filter(Student.advisor_id.in_(lecturer_ids))}
+    keys = {('students', sid) for sid in set(student_ids) | advisee_ids} | {('lecturers', lid) for lid in lecturer_ids} | {('courses', cid) for cid in course_ids}
+    keys |= {('results', row.id) for row in db.session.query(Result.id).filter(Result.student_id.in_(student_ids))}
+    keys |= {('advising_notes', row.id) for row in db.session.query(AdvisingNote.id).filter(AdvisingNote.student_id.in_(student_ids))}
+    keys |= {('advising_resources', row.id) for row in db.session.query(AdvisingResource.id)}
+    writes = build_writes(keys)
+    for i in range(0, len(writes), MAX_BATCH_WRITES):
+        commit_batch(client, writes[i:i + MAX_BATCH_WRITES])
+    return len(writes)
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))] if sorted_values else 0.0
+
+
+@click.command('repository-benchmark')
+@click.option('--students', 'sample_size', default=200, show_default=True, help='Students (and their advisors) in the workload.')
+@click.option('--target', type=click.Choice(['memory', 'firestore']), default='memory', show_default=True,
+              help="Firestore side: the in-memory stand-in, or the real client (the emulator when FIRESTORE_EMULATOR_HOST is set).")
+@click.option('--populate/--no-populate', default=None, help='Copy the sampled rows to Firestore first (default: only for memory).')
+@click.option('--seed', default=0, show_default=True)
+@with_appcontext
+def repository_benchmark_command(sample_size, target, populate, seed):
+    """Runs the same read workload against the SQL and Firestore repositories and compares latency."""
+    rng = random.Random(seed)
+    candidates = [row.id for row in db.session.query(Student.id).filter(Student.advisor_id.isnot(None)).order_by(Student.id)]
+    if not candidates:
+        click.echo("!!! No students with an advisor to benchmark. Run seed-data or generate-university first."); return
+    student_ids = rng.sample(candidates, min(sample_size, len(candidates)))
+    advisors = dict(db.session.query(Student.id, Student.advisor_id).filter(Student.id.in_(student_ids)).all())
+    client = InMemoryFirestore() if target == 'memory' else firestore_client(current_app.config.get('FIRESTORE_CREDENTIALS'))
+    if populate if populate is not None else target == 'memory':
+        click.echo(f"Copied {_copy_sample_to_firestore(client, student_ids, set(advisors.values()))} document(s) to Firestore ({target}).")
+    db.session.commit()
+
+    operations = (
+        ('student', lambda repo, sid: (repo.get_student(sid), repo.get_lecturer(advisors[sid]))),
+        ('results', lambda repo, sid: repo.get_results(sid)),
+        ('results_page', lambda repo, sid: repo.get_results(sid, limit=10)),
+        ('semester_gpas', lambda repo, sid: repo.get_semester_gpas(sid)),
+        ('notes', lambda repo, sid: repo.get_notes(sid)),
+        ('advisees', lambda repo, sid: repo.get_advisees(advisors[sid])),
+        ('resources', lambda repo, sid: repo.get_resources('category')),
+    )
+    statements = [0]
+    count_statement = lambda *args: statements.__setitem__(0, statements[0] + 1)
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    report, mismatches = [], 0
+    try:
+        repositories = [SqlRepository(), FirestoreRepository(client)]
+        outputs = {}
+        for repo in repositories:
+            for name, operation in operations:
+                latencies, statements[0], reads_before = [], 0, getattr(client, 'reads', 0)
+                for sid in student_ids:
+                    started = time.perf_counter()
+                    outputs[(repo.name, name, sid)] = operation(repo, sid)
+                    latencies.append(time.perf_counter() - started)
+                db.session.rollback() # End the read transaction between operations
+                latencies.sort()
+                reads = (getattr(client, 'reads', 0) - reads_before) if repo.name == 'firestore' and target == 'memory' else None
+                report.append((name, repo.name, _percentile(latencies, 0.5) * 1000, _percentile(latencies, 0.95) * 1000, sum(latencies) / len(latencies) * 1000,
+                               statements[0] / len(student_ids) if repo.name == 'sql' else None, reads / len(student_ids) if reads is not None else None))
+        mismatches = sum(1 for (backend, name, sid), value in outputs.items() if backend == 'sql' and name != 'resources' and _comparable(value) != _comparable(outputs[('firestore', name, sid)]))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    click.echo(f"\n{'operation':<15}{'backend':<11}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'SQL/op':>8}{'reads/op':>10}")
+    for name, backend, p50, p95, mean, sql_per_op, reads_per_op in sorted(report):
+        click.echo(f"{name:<15}{backend:<11}{p50:>9.2f}{p95:>9.2f}{mean:>9.2f}{'' if sql_per_op is None else f'{sql_per_op:.1f}':>8}{'' if reads_per_op is None else f'{reads_per_op:.1f}':>10}")
+    click.echo(f"\n{len(student_ids)} student(s) per operation; {mismatches} result(s) differed between the backends.")
+
+
+def _comparable(value):
+    """Normalizes outputs for comparison: timestamps to naive UTC, floats rounded."""
+    if isinstance(value, (list, tuple)): return [_comparable(item) for item in value]
+    if isinstance(value, dict): return {key: _comparable(item) for key, item in value.items()}
+    if isinstance(value, float): return round(value, 6)
+    if hasattr(value, 'tzinfo'): return _naive(value)
+    return value
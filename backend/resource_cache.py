@@ -0,0 +1,99 @@
+# backend/resource_cache.py
+import hashlib
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from extensions import db
+from models.advising_resource import AdvisingResource
+
+# Process-wide cache of the serialized advising resource catalog.
+# Every entry is tagged with the catalog version it was built from; the version is bumped
+# whenever a session commits an insert/update/delete of an AdvisingResource row, so a stale
+# entry is simply ignored and rebuilt on the next read.
+# Each worker process keeps its own copy, so RESOURCE_CACHE_MAX_AGE (seconds) bounds how long
+# a worker can serve a catalog changed by another process. 0 disables the age check.
+
+_ORDERINGS = {
+    'title': (AdvisingResource.title,),  # Used by both dashboards
+    'category': (AdvisingResource.category, AdvisingResource.title),  # Used by /api/resources
+}
+
+_lock = threading.Lock()
+_version = 0
+_entries = {}  # ordering -> (version, loaded_at, resources, payload_bytes, etag)
+
+
+def catalog_version():
+    return _version
+
+
+def invalidate_resource_cache():
+    """Bumps the catalog version so every cached entry is rebuilt on next access."""
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
+
+
+def _load(ordering):
+    rows = db.session.query(AdvisingResource.id, AdvisingResource.title, AdvisingResource.description, AdvisingResource.url, AdvisingResource.category).order_by(*_ORDERINGS[ordering]).all()
+    resources = [{"id": res.id, "title": res.title, "description": res.description, "url": res.url, "category": res.category} for res in rows]
+    payload = current_app.json.dumps({"success": True, "resources": resources}).encode('utf-8')
+    return resources, payload
+
+
+def _get_entry(ordering):
+    entry = _entries.get(ordering)
+    max_age = current_app.config.get('RESOURCE_CACHE_MAX_AGE', 300)
+    if entry and entry[0] == _version and (not max_age or time.monotonic() - entry[1] < max_age):
+        return entry
+    version = _version
+    resources, payload = _load(ordering)
+    entry = (version, time.monotonic(), resources, payload, hashlib.sha1(payload).hexdigest()[:20])
+    with _lock:
+        if version == _version:  # Don't store a catalog that was changed while we were loading it
+            _entries[ordering] = entry
+    return entry
+
+
+def get_cached_resources(ordering='title'):
+    """Returns the serialized resource list. Callers must treat it as read-only."""
+    return _get_entry(ordering)[2]
+
+
+def get_cached_resources_response(ordering='category'):
+    """(etag, payload) from the same cache entry, so a response never pairs one catalog's ETag with another's body."""
+    entry = _get_entry(ordering)
+    return entry[4], entry[3]
+
+
+def get_cached_resources_etag(ordering='category'):
+    """Content hash of the cached payload; the ETag of /api/resources and part of the dashboard ETags."""
+    return _get_entry(ordering)[4]
+
+
+# --- Invalidation hooks ---
+# Mapper events only flag the session; the version is bumped once the change is committed,
+# so other requests can never cache rows from a transaction that is later rolled back.
+def _flag_session(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['resource_catalog_changed'] = True
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(AdvisingResource, _event_name, _flag_session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('resource_catalog_changed', False):
+        invalidate_resource_cache()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_flag_on_rollback(session):
+    session.info.pop('resource_catalog_changed', None)
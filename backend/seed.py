@@ -1,5 +1,8 @@
 # backend/seed.py
+import time
+
 import click
+from flask import current_app
 from flask.cli import with_appcontext
 from extensions import db
 from models.student import Student
@@ -10,12 +13,28 @@ from models.degree import Degree
 from models.lecturer import Lecturer
 from models.advising_resource import AdvisingResource
 from models.note import AdvisingNote
+from grade_scale import grade_points
+from gpa_engine import rebuild_gpa
+from course_analytics import rebuild_course_analytics
+from seed_bulk import seed_from_dataset
 
 
 @click.command('seed-data')
+@click.option('--dataset', type=click.Path(exists=True), default=None, help='Bulk-load a JSON file or a directory of CSV files instead of the sample data (see seed_bulk.py).')
+@click.option('--hash-workers', type=int, default=None, help='Processes for password hashing in bulk mode (default: one per CPU).')
+@click.option('--hash-method', default=None, help='Password hash method for bulk mode (default: PASSWORD_HASH_METHOD). Cheaper hashes are upgraded on first login.')
 @with_appcontext
-def seed_data_command():
+def seed_data_command(dataset, hash_workers, hash_method):
     """Seeds the database with comprehensive sample data including guardian info."""
+    if dataset:
+        click.echo(f"--- Bulk seeding from {dataset} ---")
+        started = time.perf_counter()
+        try:
+            counts = seed_from_dataset(dataset, hash_method or current_app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256'), hash_workers, click.echo)
+        except Exception as e:
+            db.session.rollback(); click.echo(f"!!! Error bulk seeding: {e}"); return
+        click.echo(', '.join(f"{count} {section}" for section, count in counts.items()) + f" written in {time.perf_counter() - started:.1f}s.")
+        return
     click.echo("--- Starting to seed data ---")
 
     # --- 1. Add Sample Degrees with Faculty ---
@@ -137,15 +156,15 @@ def seed_data_command():
 
     enrollments_results_map = {
         student_cst001: [
-            {'course_code': 'CSC101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'A', 'grade_points': 5.0, 'official_semester_string': '2023/2024 - Semester 1'},
-            {'course_code': 'MTH101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'B', 'grade_points': 4.0, 'official_semester_string': '2023/2024 - Semester 1'},
-            {'course_code': 'GST101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'A', 'grade_points': 5.0, 'official_semester_string': '2023/2024 - Semester 1'},
-            {'course_code': 'PHY101', 'academic_year': '2023/2024', 'semester_number': 2, 'grade': 'C', 'grade_points': 3.0, 'official_semester_string': '2023/2024 - Semester 2'},
-            {'course_code': 'CSC201', 'academic_year': '2024/2025', 'semester_number': 1, 'grade': None, 'grade_points': None, 'official_semester_string': '2024/2025 - Semester 1'}
+            {'course_code': 'CSC101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'A', 'official_semester_string': '2023/2024 - Semester 1'},
+            {'course_code': 'MTH101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'B', 'official_semester_string': '2023/2024 - Semester 1'},
+            {'course_code': 'GST101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'A', 'official_semester_string': '2023/2024 - Semester 1'},
+            {'course_code': 'PHY101', 'academic_year': '2023/2024', 'semester_number': 2, 'grade': 'C', 'official_semester_string': '2023/2024 - Semester 2'},
+            {'course_code': 'CSC201', 'academic_year': '2024/2025', 'semester_number': 1, 'grade': None, 'official_semester_string': '2024/2025 - Semester 1'}
         ],
         student_phy002: [ # Results for Jane Doe
-            {'course_code': 'PHY101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'D', 'grade_points': 1.0, 'official_semester_string': '2023/2024 - Semester 1'}, # Low grade
-            {'course_code': 'MTH101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'C', 'grade_points': 2.0, 'official_semester_string': '2023/2024 - Semester 1'},
+            {'course_code': 'PHY101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'D', 'official_semester_string': '2023/2024 - Semester 1'}, # Low grade
+            {'course_code': 'MTH101', 'academic_year': '2023/2024', 'semester_number': 1, 'grade': 'C', 'official_semester_string': '2023/2024 - Semester 1'},
         ]
     }
 
@@ -164,7 +183,7 @@ def seed_data_command():
                 if enroll_data.get('grade') is not None:
                     existing_result = Result.query.filter_by(student_id=student_obj.id, course_id=course_obj.id, semester=enroll_data['official_semester_string']).first()
                     if not existing_result:
-                        new_result = Result(student_id=student_obj.id, course_id=course_obj.id, grade=enroll_data['grade'], semester=enroll_data['official_semester_string'], gpa=enroll_data['grade_points'])
+                        new_result = Result(student_id=student_obj.id, course_id=course_obj.id, grade=enroll_data['grade'], semester=enroll_data['official_semester_string'], gpa=grade_points(enroll_data['grade'], student_obj.degree_id, enroll_data['official_semester_string']))
                         db.session.add(new_result)
     try: db.session.commit(); click.echo("All Enrollments and Results committed.")
     except Exception as e: db.session.rollback(); click.echo(f"!!! Error committing enrollments/results: {e}")
@@ -199,4 +218,11 @@ def seed_data_command():
     try: db.session.commit(); click.echo("Advising resources committed.")
     except Exception as e: db.session.rollback(); click.echo(f"!!! Error resources: {e}")
 
+    # --- 8. Derive GPA running sums and grade summaries from the seeded results (they were inserted directly, not graded) ---
+    click.echo("--- Rebuilding GPA Running Sums and Course Grade Summaries ---")
+    try:
+        count, summaries = rebuild_gpa(), rebuild_course_analytics()
+        db.session.commit(); click.echo(f"GPA rebuilt for {count} student(s); {summaries} course grade summaries written.")
+    except Exception as e: db.session.rollback(); click.echo(f"!!! Error rebuilding GPA/analytics: {e}")
+
     click.echo("--- Seeding data finished ---")
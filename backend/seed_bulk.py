@@ -0,0 +1,230 @@
+# backend/seed_bulk.py
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.degree import Degree
+from models.enrollment import Enrollment
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.student import Student
+from data_versions import GLOBAL_SCOPE, touch
+from gpa_engine import rebuild_gpa
+from course_analytics import rebuild_course_analytics
+from grade_scale import UnknownGradeError, get_grade_scales
+from identity import invalidate_identity
+from resource_cache import invalidate_resource_cache
+
+# Bulk mode of `flask seed-data --dataset <file.json | directory of CSVs>`.
+# Instead of one SELECT per row, the natural keys of each table (degree name, lecturer email,
+# course code, matric number, ...) are fetched once and rows are written in batches with
+# INSERT ... ON CONFLICT (unique tables) or insert-if-missing (results, notes, resources).
+# New passwords are hashed in a process pool. Everything runs in one transaction; GPA and
+# course analytics are rebuilt from the loaded results at the end. Core writes skip the ORM
+# change hooks, so every load bumps the global data version (ETags) and clears the
+# resource and identity caches of this process.
+#
+# Dataset: a JSON object, or a directory with one <section>.csv per section, with sections
+#   degrees      name, faculty
+#   lecturers    email, first_name, last_name, department, office_location, password
+#   courses      code, title, units, level, status, semester
+#   students     matric_number, email, first_name, last_name, password, degree (name),
+#                advisor_email, guardian_name, guardian_email, guardian_phone, guardian_relationship
+#   enrollments  matric_number, course_code, academic_year, semester (1 or 2)
+#   results      matric_number, course_code, semester ("2023/2024 - Semester 1"), grade
+#   notes        matric_number, lecturer_email, content
+#   resources    title, description, url, category
+
+SECTIONS = ('degrees', 'lecturers', 'courses', 'students', 'enrollments', 'results', 'notes', 'resources')
+BATCH_SIZE = 2000
+IN_CHUNK_SIZE = 500
+_INTEGER_FIELDS = {'courses': ('units', 'level', 'semester'), 'enrollments': ('semester',)} # CSV values arrive as text
+
+
+class DatasetError(ValueError):
+    """Raised for an unreadable dataset or rows that reference unknown keys."""
+
+
+def load_dataset(path):
+    """Reads a JSON file or a directory of CSV files into {section: [row dicts]}."""
+    if os.path.isdir(path):
+        dataset = {}
+        for section in SECTIONS:
+            csv_path = os.path.join(path, f"{section}.csv")
+            if os.path.exists(csv_path):
+                with open(csv_path, newline='', encoding='utf-8-sig') as handle:
+                    dataset[section] = [{key: (value if value != '' else None) for key, value in row.items()} for row in csv.DictReader(handle)]
+    else:
+        with open(path, encoding='utf-8') as handle:
+            dataset = json.load(handle)
+        if not isinstance(dataset, dict):
+            raise DatasetError("A JSON dataset must be an object keyed by section name.")
+    unknown = set(dataset) - set(SECTIONS)
+    if unknown:
+        raise DatasetError(f"Unknown dataset sections: {', '.join(sorted(unknown))}.")
+    for section, fields in _INTEGER_FIELDS.items():
+        for row in dataset.get(section) or []:
+            for field in fields:
+                if row.get(field) is not None: row[field] = int(row[field])
+    return dataset
+
+
+def _hash_one(password, method):
+    return generate_password_hash(password, method=method) if password else None
+
+
+def hash_passwords(passwords, method, workers=None):
+    """Hashes in a process pool (werkzeug's KDFs hold the GIL, so threads wouldn't help)."""
+    if len(passwords) < 16 or workers == 1:
+        return [_hash_one(password, method) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_one, passwords, repeat(method), chunksize=64))
+
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _upsert(model, rows, key_columns, update_columns):
+    """INSERT ... ON CONFLICT (key_columns) DO UPDATE (or DO NOTHING without update_columns), in batches."""
+    dialect = db.session.get_bind().dialect.name
+    rows = list({tuple(r[c] for c in key_columns): r for r in rows}.values()) # Last row wins for repeated keys
+    for batch in _chunks(rows, BATCH_SIZE):
+        if dialect in ('postgresql', 'sqlite'):
+            statement = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(model)
+            if update_columns:
+                statement = statement.on_conflict_do_update(index_elements=key_columns, set_={column: statement.excluded[column] for column in update_columns})
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+            db.session.execute(statement, batch)
+        else: # No portable upsert: split on the keys that already exist
+            keys = [getattr(model, column) for column in key_columns]
+            existing = {tuple(row) for chunk in _chunks({tuple(r[c] for c in key_columns) for r in batch}, IN_CHUNK_SIZE)
+                        for row in db.session.query(*keys).filter(tuple_(*keys).in_(chunk))}
+            new_rows = [r for r in batch if tuple(r[c] for c in key_columns) not in existing]
+            if new_rows: db.session.execute(insert(model), new_rows)
+            for r in batch:
+                if update_columns and tuple(r[c] for c in key_columns) in existing:
+                    db.session.execute(update(model).where(*(getattr(model, c) == r[c] for c in key_columns)).values({c: r[c] for c in update_columns}))
+
+
+def _key_map(id_column, key_column):
+    """{natural key: id} for a whole table in one query."""
+    return {key: id_ for id_, key in db.session.query(id_column, key_column)}
+
+
+def _resolve(mapping, key, what, section, row_number):
+    if key not in mapping:
+        raise DatasetError(f"{section} row {row_number}: unknown {what} '{key}'.")
+    return mapping[key]
+
+
+def bulk_seed(dataset, hash_method='pbkdf2:sha256', hash_workers=None, echo=print):
+    """Loads a dataset from load_dataset(). Returns {section: rows written}; the caller commits."""
+    counts = {}
+    if dataset.get('degrees'):
+        _upsert(Degree, [{"name": r['name'], "faculty": r.get('faculty')} for r in dataset['degrees']], ['name'], ['faculty'])
+        counts['degrees'] = len(dataset['degrees'])
+    degree_ids = _key_map(Degree.id, Degree.name)
+
+    for section, model, key_field, fields in (
+        ('lecturers', Lecturer, 'email', ('first_name', 'last_name', 'department', 'office_location')),
+        ('students', Student, 'matric_number', ('first_name', 'last_name', 'email', 'guardian_name', 'guardian_email', 'guardian_phone', 'guardian_relationship')),
+    ):
+        rows = dataset.get(section) or []
+        if section == 'students': # Students reference the lecturers written above
+            lecturer_ids = _key_map(Lecturer.id, Lecturer.email)
+        existing = _key_map(model.id, getattr(model, key_field))
+        new_rows = [r for r in rows if r[key_field] not in existing]
+        echo(f"{section}: {len(rows)} rows, {len(new_rows)} new; hashing {sum(1 for r in new_rows if r.get('password'))} password(s)...")
+        hashes = dict(zip((r[key_field] for r in new_rows), hash_passwords([r.get('password') for r in new_rows], hash_method, hash_workers)))
+        records = []
+        for row_number, r in enumerate(rows, start=1):
+            record = {key_field: r[key_field], **{field: r.get(field) for field in fields}}
+            if section == 'students':
+                record['degree_id'] = _resolve(degree_ids, r['degree'], 'degree', section, row_number) if r.get('degree') else None
+                record['advisor_id'] = _resolve(lecturer_ids, r['advisor_email'], 'lecturer', section, row_number) if r.get('advisor_email') else None
+            records.append(record)
+        # Existing accounts keep their password; new ones get theirs from the pool
+        _upsert(model, [{**record, "password_hash": hashes.get(record[key_field])} for record in records if record[key_field] not in existing], [key_field], [])
+        update_columns = [c for c in records[0] if c != key_field] if records else []
+        _upsert(model, [record for record in records if record[key_field] in existing], [key_field], update_columns)
+        counts[section] = len(rows)
+
+    if dataset.get('courses'):
+        _upsert(Course, [{field: r.get(field) for field in ('code', 'title', 'units', 'level', 'status', 'semester')} for r in dataset['courses']],
+                ['code'], ['title', 'units', 'level', 'status', 'semester'])
+        counts['courses'] = len(dataset['courses'])
+    course_ids = _key_map(Course.id, Course.code)
+    students = {row.matric_number: (row.id, row.degree_id) for row in db.session.query(Student.id, Student.matric_number, Student.degree_id)}
+
+    if dataset.get('enrollments'):
+        _upsert(Enrollment, [{
+            "student_id": _resolve(students, r['matric_number'], 'student', 'enrollments', n)[0],
+            "course_id": _resolve(course_ids, r['course_code'], 'course', 'enrollments', n),
+            "academic_year": r['academic_year'], "semester": r['semester']
+        } for n, r in enumerate(dataset['enrollments'], start=1)], ['student_id', 'course_id', 'academic_year', 'semester'], [])
+        counts['enrollments'] = len(dataset['enrollments'])
+
+    if dataset.get('results'): # No unique constraint on results: skip keys that are already stored
+        scales, rows = get_grade_scales(), []
+        for n, r in enumerate(dataset['results'], start=1):
+            student_id, degree_id = _resolve(students, r['matric_number'], 'student', 'results', n)
+            grade = str(r['grade']).strip().upper()
+            try: points = scales.points(grade, degree_id, r['semester'])
+            except UnknownGradeError as e: raise DatasetError(f"results row {n}: {e}")
+            rows.append({"student_id": student_id, "course_id": _resolve(course_ids, r['course_code'], 'course', 'results', n), "grade": grade, "semester": r['semester'], "gpa": points})
+        existing = set()
+        for chunk in _chunks({row['student_id'] for row in rows}, IN_CHUNK_SIZE):
+            existing.update(db.session.query(Result.student_id, Result.course_id, Result.semester).filter(Result.student_id.in_(chunk)))
+        new_rows = list({(row['student_id'], row['course_id'], row['semester']): row for row in rows
+                         if (row['student_id'], row['course_id'], row['semester']) not in existing}.values())
+        for batch in _chunks(new_rows, BATCH_SIZE):
+            db.session.execute(insert(Result), batch)
+        counts['results'] = len(new_rows)
+
+    if dataset.get('notes'):
+        lecturer_ids = _key_map(Lecturer.id, Lecturer.email)
+        rows = [{"student_id": _resolve(students, r['matric_number'], 'student', 'notes', n)[0], "lecturer_id": _resolve(lecturer_ids, r['lecturer_email'], 'lecturer', 'notes', n), "content": r['content']}
+                for n, r in enumerate(dataset['notes'], start=1)]
+        existing = set()
+        for chunk in _chunks({row['student_id'] for row in rows}, IN_CHUNK_SIZE):
+            existing.update(db.session.query(AdvisingNote.student_id, AdvisingNote.lecturer_id, AdvisingNote.content).filter(AdvisingNote.student_id.in_(chunk)))
+        new_rows = [row for row in rows if (row['student_id'], row['lecturer_id'], row['content']) not in existing]
+        for batch in _chunks(new_rows, BATCH_SIZE):
+            db.session.execute(insert(AdvisingNote), batch)
+        counts['notes'] = len(new_rows)
+
+    if dataset.get('resources'):
+        titles = {row.title for row in db.session.query(AdvisingResource.title)}
+        new_rows = [{field: r.get(field) for field in ('title', 'description', 'url', 'category')} for r in dataset['resources'] if r['title'] not in titles]
+        if new_rows: db.session.execute(insert(AdvisingResource), new_rows)
+        counts['resources'] = len(new_rows)
+
+    if dataset.get('results'):
+        echo("Rebuilding GPA running sums and course analytics...")
+        rebuild_gpa()
+        rebuild_course_analytics()
+    touch(GLOBAL_SCOPE) # Core upserts skip the change hooks; revalidate every cached response, with or without results
+    return counts
+
+
+def seed_from_dataset(path, hash_method, hash_workers, echo):
+    """Loads, writes and commits a dataset; the entry point used by `flask seed-data --dataset`."""
+    counts = bulk_seed(load_dataset(path), hash_method, hash_workers, echo)
+    db.session.commit()
+    invalidate_resource_cache() # Core inserts skip the caches' change hooks
+    invalidate_identity() # Names and advisors may have changed
+    return counts
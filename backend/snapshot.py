@@ -0,0 +1,251 @@
+# backend/snapshot.py
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import date, datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, func, insert, select, text
+
+from extensions import db
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.course_grade_summary import CourseGradeSummary
+from models.background_job import BackgroundJob
+from models.degree import Degree
+from models.document_job import DocumentJob
+from models.enrollment import Enrollment
+from models.firestore_outbox import FirestoreOutbox
+from models.grade_scale import GradeScale, GradeScaleEntry
+from models.guardian_broadcast import GuardianBroadcast
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.outbound_email import OutboundEmail
+from models.result import Result
+from models.semester_gpa import StudentSemesterGpa
+from models.student import Student
+from gpa_engine import rebuild_gpa
+from course_analytics import rebuild_course_analytics
+from grade_scale import invalidate_grade_scales
+from identity import invalidate_identity
+from resource_cache import invalidate_resource_cache
+from data_versions import GLOBAL_SCOPE, touch
+
+# `flask export-snapshot` / `flask import-snapshot`: the whole advising dataset in one file.
+#
+# File layout: MAGIC, then frames of <1-byte kind><4-byte big-endian length><payload>:
+#   H  header  JSON {"format", "created_at", "dialect", "chunk_size"}
+#   T  table   JSON {"table", "columns": [[name, kind], ...]}
+#   C  chunk   zlib-compressed JSON list with one list of values per column (columnar, so
+#              similar values sit together and compress well)
+#   E  end of table, JSON {"rows": n}
+#   Z  end of file, JSON {"tables": {name: rows}}
+# Tables are streamed with yield_per and written one chunk at a time, and import reads one
+# chunk at a time, so memory use depends on the chunk size, not the table size. Import
+# inserts each chunk with one executemany INSERT keeping the original ids, resets the
+# PostgreSQL id sequences, and rebuilds the derived tables (semester GPAs, course
+# analytics) from the restored results, all in a single transaction.
+# Snapshots include password hashes and guardian contact details; handle them as such.
+
+MAGIC = b'ADVSNAP\x01'
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 5000
+
+# Dependency order: every table comes after the tables it references
+SNAPSHOT_MODELS = (Degree, GradeScale, GradeScaleEntry, Lecturer, Student, Course, Enrollment, Result, AdvisingNote, AdvisingResource)
+# Rebuilt from the restored rows, or referring to rows that --replace deletes
+DERIVED_MODELS = (StudentSemesterGpa, CourseGradeSummary)
+_FRAME = struct.Struct('>cI')
+
+
+class SnapshotError(ValueError):
+    """Raised for a file that isn't a snapshot, a truncated one, or a target that can't take it."""
+
+
+def _kind(column):
+    for sa_type, kind in ((DateTime, 'datetime'), (Date, 'date'), (Boolean, 'bool'), (Integer, 'int'), (Float, 'float')):
+        if isinstance(column.type, sa_type): return kind
+    return 'str'
+
+
+def _encoder(kind):
+    if kind in ('datetime', 'date'): return lambda value: value.isoformat() if value is not None else None
+    return None
+
+
+def _decoder(kind):
+    if kind == 'datetime': return lambda value: datetime.fromisoformat(value) if value is not None else None
+    if kind == 'date': return lambda value: date.fromisoformat(value) if value is not None else None
+    return None
+
+
+def _write_frame(handle, kind, payload):
+    handle.write(_FRAME.pack(kind, len(payload)))
+    handle.write(payload)
+
+
+def _read_frame(handle):
+    header = handle.read(_FRAME.size)
+    if len(header) < _FRAME.size:
+        raise SnapshotError("The snapshot is truncated.")
+    kind, length = _FRAME.unpack(header)
+    payload = handle.read(length)
+    if len(payload) < length:
+        raise SnapshotError("The snapshot is truncated.")
+    return kind, payload
+
+
+def export_snapshot(path, chunk_size=DEFAULT_CHUNK_SIZE, echo=print):
+    """Streams every snapshot table to path (written to a temporary file, then renamed). Returns {table: rows}."""
+    counts = {}
+    temporary = f"{path}.partial"
+    with open(temporary, 'wb') as handle:
+        handle.write(MAGIC)
+        _write_frame(handle, b'H', json.dumps({"format": FORMAT_VERSION, "created_at": datetime.utcnow().isoformat(), "dialect": db.session.get_bind().dialect.name, "chunk_size": chunk_size}).encode('utf-8'))
+        for model in SNAPSHOT_MODELS:
+            table, started = model.__table__, time.perf_counter()
+            columns = list(table.columns)
+            kinds = [_kind(column) for column in columns]
+            encoders = [_encoder(kind) for kind in kinds]
+            _write_frame(handle, b'T', json.dumps({"table": table.name, "columns": [[column.name, kind] for column, kind in zip(columns, kinds)]}).encode('utf-8'))
+            rows = 0
+            result = db.session.execute(select(table).order_by(table.c.id).execution_options(yield_per=chunk_size))
+            for partition in result.partitions():
+                values = [list(column_values) for column_values in zip(*partition)]
+                for index, encode in enumerate(encoders):
+                    if encode: values[index] = [encode(value) for value in values[index]]
+                _write_frame(handle, b'C', zlib.compress(json.dumps(values, separators=(',', ':')).encode('utf-8'), 6))
+                rows += len(partition)
+            _write_frame(handle, b'E', json.dumps({"rows": rows}).encode('utf-8'))
+            counts[table.name] = rows
+            echo(f"  {table.name}: {rows} row(s) in {time.perf_counter() - started:.1f}s")
+        _write_frame(handle, b'Z', json.dumps({"tables": counts}).encode('utf-8'))
+    db.session.rollback() # End the read transaction
+    os.replace(temporary, path)
+    return counts
+
+
+def read_snapshot(path):
+    """Yields ('header', dict), ('table', name, columns), ('chunk', name, rows as dicts), ('end', name, count), ('done', counts)."""
+    with open(path, 'rb') as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path} is not an advising snapshot.")
+        table, names, decoders = None, None, None
+        while True:
+            kind, payload = _read_frame(handle)
+            if kind == b'H':
+                header = json.loads(payload)
+                if header.get('format') != FORMAT_VERSION:
+                    raise SnapshotError(f"Unsupported snapshot format {header.get('format')}.")
+                yield ('header', header)
+            elif kind == b'T':
+                section = json.loads(payload)
+                table, names = section['table'], [name for name, _ in section['columns']]
+                decoders = [_decoder(column_kind) for _, column_kind in section['columns']]
+                yield ('table', table, section['columns'])
+            elif kind == b'C':
+                values = json.loads(zlib.decompress(payload))
+                for index, decode in enumerate(decoders):
+                    if decode: values[index] = [decode(value) for value in values[index]]
+                yield ('chunk', table, [dict(zip(names, row)) for row in zip(*values)])
+            elif kind == b'E':
+                yield ('end', table, json.loads(payload)['rows'])
+            elif kind == b'Z':
+                yield ('done', json.loads(payload)['tables']); return
+            else:
+                raise SnapshotError(f"Unknown frame {kind!r} in the snapshot.")
+
+
+def _clear_tables():
+    """Deletes the snapshot tables and everything that references them, children first."""
+    OutboundEmail.query.filter(OutboundEmail.broadcast_id.isnot(None)).delete(synchronize_session=False)
+    for model in (GuardianBroadcast, DocumentJob, BackgroundJob, FirestoreOutbox, *DERIVED_MODELS, *reversed(SNAPSHOT_MODELS)):
+        db.session.execute(model.__table__.delete())
+
+
+def _reset_sequences():
+    """Moves PostgreSQL's id sequences past the restored ids (SQLite needs nothing)."""
+    if db.session.get_bind().dialect.name != 'postgresql': return
+    for model in SNAPSHOT_MODELS:
+        table = model.__table__.name
+        db.session.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"))
+
+
+def import_snapshot(path, replace=False, echo=print):
+    """Restores a snapshot in one transaction; the caller commits. Returns {table: rows}."""
+    tables = {model.__table__.name: model.__table__ for model in SNAPSHOT_MODELS}
+    if replace:
+        _clear_tables()
+    else:
+        populated = [name for name, table in tables.items() if db.session.execute(select(func.count()).select_from(table)).scalar()]
+        if populated:
+            raise SnapshotError(f"Target tables are not empty ({', '.join(populated)}); use --replace to overwrite them.")
+
+    counts, started = {}, time.perf_counter()
+    for record in read_snapshot(path):
+        if record[0] == 'table':
+            _, name, columns = record
+            if name not in tables:
+                raise SnapshotError(f"The snapshot has a table this database doesn't: {name}.")
+            missing = {column for column, _ in columns} - set(tables[name].columns.keys())
+            if missing:
+                raise SnapshotError(f"{name}: the snapshot has columns this database doesn't ({', '.join(sorted(missing))}); upgrade the schema first.")
+            counts[name], table_started = 0, time.perf_counter()
+        elif record[0] == 'chunk':
+            _, name, rows = record
+            db.session.execute(insert(tables[name]), rows)
+            counts[name] += len(rows)
+        elif record[0] == 'end':
+            _, name, expected = record
+            if counts[name] != expected:
+                raise SnapshotError(f"{name}: read {counts[name]} row(s), the snapshot says {expected}.")
+            echo(f"  {name}: {counts[name]} row(s) in {time.perf_counter() - table_started:.1f}s")
+    _reset_sequences()
+    echo("Rebuilding GPA running sums and course analytics...")
+    rebuild_gpa()
+    rebuild_course_analytics()
+    touch(GLOBAL_SCOPE) # Core inserts skip the change hooks; revalidate every cached response
+    echo(f"Restored {sum(counts.values())} row(s) in {time.perf_counter() - started:.1f}s.")
+    return counts
+
+
+def _invalidate_process_caches():
+    invalidate_resource_cache()
+    invalidate_grade_scales()
+    invalidate_identity() # Rows were replaced with Core inserts, which skip its eviction hooks
+
+
+@click.command('export-snapshot')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, help='Rows per compressed chunk.')
+@with_appcontext
+def export_snapshot_command(path, chunk_size):
+    """Writes every advising table to a compressed, columnar snapshot file."""
+    click.echo(f"--- Exporting snapshot to {path} ---")
+    started = time.perf_counter()
+    try:
+        counts = export_snapshot(path, chunk_size, echo=click.echo)
+        click.echo(f"{sum(counts.values())} row(s), {os.path.getsize(path) / 1e6:.1f} MB in {time.perf_counter() - started:.1f}s.")
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error exporting snapshot: {e}")
+        if os.path.exists(f"{path}.partial"): os.remove(f"{path}.partial")
+
+
+@click.command('import-snapshot')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--replace', is_flag=True, help='Delete the existing advising data (and broadcasts, document and background jobs, derived tables) first.')
+@with_appcontext
+def import_snapshot_command(path, replace):
+    """Restores a snapshot written by export-snapshot, in one transaction."""
+    click.echo(f"--- Importing snapshot from {path} ---")
+    try:
+        import_snapshot(path, replace, echo=click.echo)
+        db.session.commit()
+        _invalidate_process_caches()
+    except SnapshotError as e:
+        db.session.rollback(); click.echo(f"!!! {e}")
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error importing snapshot: {e}")
@@ -0,0 +1,125 @@
+# backend/startup.py
+import importlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+from flask.cli import AppGroup
+
+import metrics
+
+# Boot cost of the app: CLI commands that are only imported when they are run, and a record
+# of how long create_app() took and how much memory the process holds.
+# LazyAppGroup replaces app.cli; commands are listed as {name: "module:attribute"} and the
+# module is imported on first use, so a web worker doesn't load seed, benchmark or snapshot
+# code. Modules only some routes need (cohort_analytics and NumPy, documents and
+# document_render, transcript_export, the job tasks) are imported by those routes on first
+# use (see app.py), so they stay out of the preloaded master. firestore_sync is still
+# imported: it defines the document shapes the change outbox records on every write, and
+# only loads the Firebase SDK when a client is created. Startup timings are kept in
+# app.extensions['startup'] and exported at /metrics; the RSS gauge is read at scrape time,
+# so with preloaded gunicorn workers each one reports its own (copy-on-write) footprint.
+# `flask startup-benchmark` measures cold starts in fresh interpreters.
+
+
+class LazyAppGroup(AppGroup):
+    """app.cli whose commands are imported when they are first looked up."""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_commands:
+            self.add_command(_load_command(name, self.lazy_commands[name]), name)
+        return super().get_command(ctx, name)
+
+
+def _load_command(name, import_path):
+    module_name, attribute = import_path.split(':')
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except ImportError as e:
+        message = f"!!! `flask {name}` is unavailable: {e}"
+
+        @click.command(name, help=f"(unavailable: {e})")
+        def unavailable_command():
+            click.echo(message, err=True); sys.exit(1)
+        return unavailable_command
+
+
+def resident_memory_bytes():
+    """Current RSS of this process (peak RSS where /proc is not available)."""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StartupMetrics:
+    def __init__(self, app):
+        self.app = app
+
+    def render(self):
+        stats = self.app.extensions.get('startup') or {}
+        lines = ["# HELP app_startup_seconds Time spent importing app.py and in create_app() for this process.", "# TYPE app_startup_seconds gauge"]
+        lines += [f'app_startup_seconds{{phase="{phase}"}} {stats[key]:.4f}' for phase, key in (('import', 'import_seconds'), ('create_app', 'create_app_seconds')) if key in stats]
+        lines += ["# HELP process_resident_memory_bytes Resident memory of this worker process.", "# TYPE process_resident_memory_bytes gauge",
+                  f"process_resident_memory_bytes {resident_memory_bytes()}"]
+        return lines
+
+
+def record_startup(app, import_started, create_started):
+    """Stores timings and memory for this create_app() call, logs them and adds them to /metrics."""
+    now = time.perf_counter()
+    stats = {"profile": app.config.get('APP_PROFILE'), "pid": os.getpid(), "create_app_seconds": now - create_started, "rss_bytes": resident_memory_bytes()}
+    if import_started is not None: stats['import_seconds'] = create_started - import_started # First app in the process only
+    app.extensions['startup'] = stats
+    metrics.register_collector(StartupMetrics(app))
+    imports = f" after {stats['import_seconds'] * 1000:.0f} ms of imports" if 'import_seconds' in stats else ""
+    app.logger.info(f"App created ({stats['profile']} profile) in {stats['create_app_seconds'] * 1000:.0f} ms{imports}; RSS {stats['rss_bytes'] / 1e6:.1f} MB.")
+    return stats
+
+
+_PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({profile!r})
+ready = time.perf_counter()
+stats = app.extensions['startup']
+print(json.dumps({{"import": imported - started, "create_app": ready - imported, "total": ready - started, "rss": stats['rss_bytes']}}))
+"""
+
+
+@click.command('startup-benchmark')
+@click.option('--runs', type=int, default=5, show_default=True, help='Fresh interpreters to start.')
+@click.option('--profile', default='production', show_default=True)
+def startup_benchmark_command(runs, profile):
+    """Measures cold start (import + create_app) and RSS of a new app process, as a worker would see it."""
+    click.echo(f"--- Starting the app {runs} time(s) with the {profile} profile ---")
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', _PROBE.format(profile=profile)], cwd=backend_dir, capture_output=True, text=True)
+        if completed.returncode != 0:
+            click.echo(f"!!! App failed to start:\n{completed.stderr.strip()}", err=True); return
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        sample['process'] = time.perf_counter() - started
+        samples.append(sample)
+    for key, label in (('process', 'Interpreter + app'), ('import', 'Import app.py'), ('create_app', 'create_app()')):
+        values = [sample[key] * 1000 for sample in samples]
+        click.echo(f"{label:<18} median {statistics.median(values):7.1f} ms   min {min(values):7.1f} ms   max {max(values):7.1f} ms")
+    click.echo(f"{'RSS after start':<18} median {statistics.median(sample['rss'] for sample in samples) / 1e6:7.1f} MB")
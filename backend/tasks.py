@@ -0,0 +1,76 @@
+# backend/tasks.py
+import os
+
+from flask import current_app
+
+from extensions import db
+from jobs import JobError, task
+
+# Built-in background tasks (see jobs.py). Each is the blocking operation behind an existing
+# CLI command or endpoint, so it can be queued with `flask enqueue <name> --payload '{...}'`
+# or from code with jobs.enqueue() and run by `flask worker` instead of in the caller.
+# Queues: "maintenance" for whole-table rebuilds and loads, "documents" for certificate and
+# transcript batches, "reports" for file exports.
+
+
+@task('gpa.rebuild', queue='maintenance', max_attempts=2)
+def rebuild_gpa_task(context, student_ids=None):
+    from gpa_engine import rebuild_gpa
+    count = rebuild_gpa(student_ids)
+    db.session.commit()
+    return {"students": count}
+
+
+@task('analytics.rebuild', queue='maintenance', max_attempts=2)
+def rebuild_analytics_task(context, course_ids=None):
+    from course_analytics import rebuild_course_analytics
+    count = rebuild_course_analytics(course_ids)
+    db.session.commit()
+    return {"summaries": count}
+
+
+@task('seed.dataset', queue='maintenance', max_attempts=1)
+def seed_dataset_task(context, path, hash_method=None, hash_workers=None):
+    from seed_bulk import seed_from_dataset
+    return seed_from_dataset(path, hash_method or current_app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256'), hash_workers, context.echo)
+
+
+@task('firestore.migrate', queue='maintenance', max_attempts=3)
+def migrate_firestore_task(context, checkpoint=None, restart=False, workers=None, chunk_size=None):
+    """Full SQL -> Firestore copy. Retries resume from the checkpoint file."""
+    from firestore_memory import InMemoryFirestore
+    from firestore_sync import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, SOURCES, Checkpoint, firestore_client, migrate_all
+    config = current_app.config
+    client = InMemoryFirestore() if config.get('FIRESTORE_SYNC_TARGET') == 'memory' else firestore_client(config.get('FIRESTORE_CREDENTIALS'))
+    progress = Checkpoint(checkpoint or os.path.join(current_app.instance_path, 'firestore_migration_checkpoint.json'))
+    if restart and context.attempt == 1: progress.reset()
+    counts = {}
+    for number, source in enumerate(SOURCES, start=1):
+        counts.update(migrate_all(client, progress, workers or DEFAULT_WORKERS, chunk_size or DEFAULT_CHUNK_SIZE, sources=(source,), echo=context.echo))
+        context.progress(number / len(SOURCES), f"{source.name}: {counts[source.name]} document(s)", force=True)
+    return counts
+
+
+@task('documents.generate', queue='documents', max_attempts=2)
+def generate_documents_task(context, document_job_id, workers=None):
+    from documents import run_document_job
+    job = run_document_job(document_job_id, workers=workers, echo=context.echo)
+    return {"document_job_id": job.id, "rendered": job.rendered, "reused": job.reused, "failed": job.failed}
+
+
+@task('reports.export', queue='reports', max_attempts=2)
+def export_report_task(context, report='transcripts', format='csv', filters=None):
+    """Writes a transcript or cohort export to JOB_OUTPUT_DIR; the result has the file path."""
+    import transcript_export
+    if report not in ('transcripts', 'cohort'): raise JobError("report must be 'transcripts' or 'cohort'.")
+    export_format, parsed = transcript_export.parse_export_args({**(filters or {}), 'format': format}, allow_level=report == 'transcripts')
+    generate = transcript_export.generate_transcripts if report == 'transcripts' else transcript_export.generate_cohort_report
+    directory = current_app.config.get('JOB_OUTPUT_DIR') or os.path.join(current_app.instance_path, 'job-output')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"job-{context.job_id}-{transcript_export.export_filename(report, export_format, parsed)}")
+    size = 0
+    with open(path, 'w', encoding='utf-8', newline='') as handle:
+        for chunk in generate(export_format, parsed):
+            handle.write(chunk); size += len(chunk)
+    db.session.rollback() # End the read transaction
+    return {"path": path, "bytes": size}
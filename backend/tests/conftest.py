@@ -0,0 +1,53 @@
+# backend/tests/conftest.py
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+
+# Each test gets a fresh app on its own SQLite file (schema from the models, not the
+# migrations) with the in-process background threads switched off. No app context is left
+# pushed: a request made inside one would share its g and session, so tests open their own
+# `with app.app_context():` around setup and assertions.
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('MAIL_DISPATCHER_ENABLED', 'False')
+    monkeypatch.setenv('FIRESTORE_SYNC_ENABLED', 'False')
+    monkeypatch.setenv('DOCUMENT_CACHE_DIR', str(tmp_path / 'documents'))
+    app = create_app('development')
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def auth_headers(user, user_type):
+    """Bearer header for a Student or Lecturer row, with the claims /api/login issues."""
+    token = create_access_token(identity=str(user.id), additional_claims={"user_type": user_type, "user_name": f"{user.first_name} {user.last_name}"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@contextmanager
+def count_statements(engine):
+    """Collects the SQL statements run on `engine` inside the block."""
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -0,0 +1,45 @@
+# backend/tests/test_course_analytics.py
+import pytest
+
+from course_analytics import apply_results_to_analytics, get_summaries, is_fail, rebuild_course_analytics
+from extensions import db
+from grade_scale import DEFAULT_GRADE_POINTS
+from models.course import Course
+from models.result import Result
+from models.student import Student
+
+SEMESTER = '2023/2024 First'
+GRADES = ['A', 'B+', 'E-', 'F+', 'F-', 'F', 'DEX'] # 3 pass, 3 fail, DEX has no points
+
+
+@pytest.mark.parametrize('grade, expected', [('F', True), ('F+', True), ('F-', True), (' f+ ', True), ('E-', False), ('A', False)])
+def test_fail_is_decided_by_the_grade_letter(grade, expected):
+    assert is_fail(grade, DEFAULT_GRADE_POINTS.get(grade.strip().upper(), 0.5)) is expected
+
+
+def test_plus_and_minus_f_grades_count_as_fails(app):
+    with app.app_context():
+        course = Course(code='CSC101', title='Programming', units=3, level=100)
+        db.session.add(course); db.session.flush()
+        students = [Student(first_name='S', last_name=str(i), email=f's{i}@example.com', matric_number=f'M/{i}', password_hash='x') for i in range(len(GRADES))]
+        db.session.add_all(students); db.session.flush()
+        entries = []
+        for student, grade in zip(students, GRADES):
+            points = DEFAULT_GRADE_POINTS.get(grade)
+            db.session.add(Result(student_id=student.id, course_id=course.id, grade=grade, gpa=points, semester=SEMESTER))
+            entries.append((course.id, SEMESTER, grade, points))
+        apply_results_to_analytics(entries) # The per-insert path
+        db.session.commit()
+        incremental = get_summaries(semester=SEMESTER)
+
+        rebuild_course_analytics() # The bulk path
+        db.session.commit()
+        rebuilt = get_summaries(semester=SEMESTER)
+
+    for summaries in (incremental, rebuilt):
+        assert len(summaries) == 1
+        summary = summaries[0]
+        assert (summary['result_count'], summary['graded_count']) == (7, 6)
+        assert (summary['pass_count'], summary['fail_count']) == (3, 3)
+        assert summary['pass_rate'] == 0.5
+        assert summary['grade_histogram']['F+'] == summary['grade_histogram']['F-'] == 1
@@ -0,0 +1,92 @@
+# backend/tests/test_credentials.py
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from conftest import count_statements
+from credentials import find_credentials
+from extensions import db
+from models.lecturer import Lecturer
+from models.student import Student
+
+FAST_METHOD = 'pbkdf2:sha256:1000' # Cheap hashes keep the tests quick
+SHARED_EMAIL = 'shared@example.com'
+
+
+@pytest.fixture
+def accounts(app):
+    app.config['PASSWORD_HASH_METHOD'] = FAST_METHOD
+    with app.app_context():
+        student = Student(first_name='Tolu', last_name='Ade', email='tolu@example.com', matric_number='CST/20/001', password_hash=generate_password_hash('student-pass', method=FAST_METHOD))
+        lecturer = Lecturer(first_name='Ada', last_name='Obi', email='ada@example.com', password_hash=generate_password_hash('lecturer-pass', method=FAST_METHOD))
+        # One address registered as both a student and a lecturer
+        shared_student = Student(first_name='Kemi', last_name='Bello', email=SHARED_EMAIL, matric_number='CST/20/002', password_hash=generate_password_hash('as-student', method=FAST_METHOD))
+        shared_lecturer = Lecturer(first_name='Kemi', last_name='Bello', email=SHARED_EMAIL, password_hash=generate_password_hash('as-lecturer', method=FAST_METHOD))
+        db.session.add_all([student, lecturer, shared_student, shared_lecturer]); db.session.commit()
+        return {"student": student.id, "lecturer": lecturer.id, "shared_student": shared_student.id, "shared_lecturer": shared_lecturer.id}
+
+
+def _login(client, username, password):
+    return client.post('/api/login', json={"username": username, "password": password})
+
+
+@pytest.mark.parametrize('username, password, user_type, key', [
+    ('CST/20/001', 'student-pass', 'student', 'student'), # Matric number
+    ('tolu@example.com', 'student-pass', 'student', 'student'),
+    ('ada@example.com', 'lecturer-pass', 'lecturer', 'lecturer'),
+    (SHARED_EMAIL, 'as-student', 'student', 'shared_student'), # Students are tried first
+    (SHARED_EMAIL, 'as-lecturer', 'lecturer', 'shared_lecturer'),
+])
+def test_login_succeeds_by_matric_number_or_email(client, accounts, username, password, user_type, key):
+    response = _login(client, username, password)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['user_type'], body['user_id']) == (user_type, accounts[key])
+    assert body['access_token']
+
+
+@pytest.mark.parametrize('username, password', [
+    ('CST/20/001', 'wrong'), ('tolu@example.com', 'lecturer-pass'), ('ada@example.com', 'student-pass'),
+    (SHARED_EMAIL, 'neither'), ('CST/20/999', 'student-pass'),
+    ('ada', 'lecturer-pass'), # Not an email, so only matric numbers are searched
+])
+def test_wrong_password_or_unknown_user_is_rejected(client, accounts, username, password):
+    response = _login(client, username, password)
+    assert response.status_code == 401
+    assert response.get_json()['success'] is False
+
+
+def test_email_lookup_is_one_statement_over_both_tables(app, accounts):
+    with app.app_context():
+        with count_statements(db.engine) as statements:
+            rows = find_credentials(SHARED_EMAIL)
+        assert len(statements) == 1 and 'UNION ALL' in statements[0]
+        assert [(row.user_type, row.id) for row in rows] == [('student', accounts['shared_student']), ('lecturer', accounts['shared_lecturer'])]
+        with count_statements(db.engine) as statements:
+            rows = find_credentials('CST/20/001')
+        assert len(statements) == 1 and 'lecturers' not in statements[0]
+        assert [(row.user_type, row.id) for row in rows] == [('student', accounts['student'])]
+
+
+def _stored_hash(app, model, user_id):
+    with app.app_context():
+        return db.session.get(model, user_id).password_hash
+
+
+def test_login_rehashes_when_the_hash_method_changes(app, client, accounts):
+    before = _stored_hash(app, Student, accounts['student'])
+    assert _login(client, 'CST/20/001', 'student-pass').status_code == 200
+    assert _stored_hash(app, Student, accounts['student']) == before # Already current: left alone
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    assert _login(client, 'CST/20/001', 'wrong').status_code == 401
+    assert _stored_hash(app, Student, accounts['student']) == before # Only a successful login upgrades
+    assert _login(client, 'CST/20/001', 'student-pass').status_code == 200
+    upgraded = _stored_hash(app, Student, accounts['student'])
+    assert upgraded.startswith('pbkdf2:sha256:2000$') and check_password_hash(upgraded, 'student-pass')
+    assert _login(client, 'CST/20/001', 'student-pass').status_code == 200 # The new hash verifies
+    assert _stored_hash(app, Student, accounts['student']) == upgraded
+
+    lecturer_before = _stored_hash(app, Lecturer, accounts['lecturer'])
+    assert _login(client, 'ada@example.com', 'lecturer-pass').status_code == 200
+    lecturer_after = _stored_hash(app, Lecturer, accounts['lecturer'])
+    assert lecturer_after != lecturer_before and lecturer_after.startswith('pbkdf2:sha256:2000$')
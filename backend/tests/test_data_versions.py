@@ -0,0 +1,84 @@
+# backend/tests/test_data_versions.py
+import pytest
+
+import data_versions
+from conftest import auth_headers, count_statements
+from extensions import db
+from models.course import Course
+from models.lecturer import Lecturer
+from models.student import Student
+
+RESULTS = '/api/student/results'
+
+
+@pytest.fixture
+def school(app):
+    with app.app_context():
+        lecturer = Lecturer(first_name='Ada', last_name='Obi', email='ada@example.com', password_hash='x')
+        db.session.add(lecturer); db.session.flush()
+        students = [Student(first_name='Tolu', last_name=str(i), email=f'tolu{i}@example.com', matric_number=f'CST/{i}', password_hash='x', advisor_id=lecturer.id) for i in range(2)]
+        courses = [Course(code=f'CSC10{i}', title=f'Course {i}', units=3) for i in range(2)]
+        db.session.add_all(students + courses); db.session.commit()
+        return {"student": students[0].id, "other_student": students[1].id, "courses": [course.id for course in courses],
+                "student_headers": auth_headers(students[0], 'student'), "lecturer_headers": auth_headers(lecturer, 'lecturer')}
+
+
+def _submit_grade(client, school, student_id, course_id, grade='A'):
+    response = client.post('/api/lecturer/submit-grade', headers=school['lecturer_headers'],
+                           json={"student_id": student_id, "course_id": course_id, "grade": grade, "semester": "2023/2024 First"})
+    assert response.status_code == 201, response.get_json()
+
+
+def _conditional_get(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": f'W/"{etag}"'})
+
+
+def test_conditional_get_returns_304_until_a_write_bumps_the_version(app, client, school):
+    first = client.get(RESULTS, headers=school['student_headers'])
+    assert first.status_code == 200 and first.get_json()['results'] == []
+    etag, _ = first.get_etag()
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    with app.app_context():
+        engine = db.engine
+    with count_statements(engine) as statements:
+        cached = _conditional_get(client, RESULTS, school['student_headers'], etag)
+    assert cached.status_code == 304 and cached.data == b''
+    assert cached.get_etag()[0] == etag
+    assert not any('FROM results' in statement for statement in statements) # Answered from the version counters alone
+
+    _submit_grade(client, school, school['other_student'], school['courses'][0]) # Someone else's results
+    assert _conditional_get(client, RESULTS, school['student_headers'], etag).status_code == 304
+
+    _submit_grade(client, school, school['student'], school['courses'][0])
+    changed = _conditional_get(client, RESULTS, school['student_headers'], etag)
+    assert changed.status_code == 200
+    assert [result['course_code'] for result in changed.get_json()['results']] == ['CSC100']
+    new_etag, _ = changed.get_etag()
+    assert new_etag != etag
+    assert _conditional_get(client, RESULTS, school['student_headers'], new_etag).status_code == 304
+
+
+def test_note_write_changes_the_notes_etag(client, school):
+    url = f"/api/students/{school['student']}/notes"
+    etag, _ = client.get(url, headers=school['lecturer_headers']).get_etag()
+    assert _conditional_get(client, url, school['lecturer_headers'], etag).status_code == 304
+    assert client.post(url, headers=school['lecturer_headers'], json={"content": "Met to plan electives."}).status_code == 201
+    response = _conditional_get(client, url, school['lecturer_headers'], etag)
+    assert response.status_code == 200 and len(response.get_json()['notes']) == 1
+
+
+def test_if_modified_since_and_global_touch(app, client, school):
+    first = client.get(RESULTS, headers=school['student_headers'])
+    _submit_grade(client, school, school['student'], school['courses'][1])
+    second = client.get(RESULTS, headers=school['student_headers'])
+    assert second.last_modified is not None
+    since = second.headers['Last-Modified']
+    assert client.get(RESULTS, headers={**school['student_headers'], "If-Modified-Since": since}).status_code == 304
+
+    etag, _ = second.get_etag()
+    with app.app_context():
+        data_versions.touch(data_versions.GLOBAL_SCOPE) # What bulk rebuilds and imports do
+        db.session.commit()
+    assert _conditional_get(client, RESULTS, school['student_headers'], etag).status_code == 200
+    assert first.get_etag()[0] != etag
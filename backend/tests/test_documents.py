@@ -0,0 +1,73 @@
+# backend/tests/test_documents.py
+import pytest
+
+import documents
+from conftest import auth_headers
+from extensions import db
+from identity import invalidate_identity
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.student import Student
+
+JOBS = '/api/documents/jobs'
+
+
+@pytest.fixture
+def advisors(app):
+    """Two lecturers with one advisee each, both in the same degree."""
+    invalidate_identity()
+    with app.app_context():
+        degree = Degree(name='Computer Science', faculty='Science')
+        lecturers = [Lecturer(first_name=name, last_name='Obi', email=f'{name.lower()}@example.com', password_hash='x') for name in ('Ada', 'Bola')]
+        db.session.add_all([degree, *lecturers]); db.session.flush()
+        students = [Student(first_name='Tolu', last_name=str(i), email=f'tolu{i}@example.com', matric_number=f'CST/{i}', password_hash='x',
+                            degree_id=degree.id, advisor_id=lecturer.id) for i, lecturer in enumerate(lecturers)]
+        db.session.add_all(students); db.session.commit()
+        ids = {"degree": degree.id, "ada": lecturers[0].id, "bola": lecturers[1].id, "ada_student": students[0].id, "bola_student": students[1].id,
+               "ada_headers": auth_headers(lecturers[0], 'lecturer'), "bola_headers": auth_headers(lecturers[1], 'lecturer')}
+    yield ids
+    invalidate_identity()
+
+
+def _run_job(app, client, headers, document_filter):
+    response = client.post(JOBS, headers=headers, json={"kind": "transcript", "filter": document_filter})
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()['job']['id']
+    with app.app_context():
+        documents.run_document_job(job_id, workers=1)
+    return client.get(f'{JOBS}/{job_id}', headers=headers).get_json()['job']
+
+
+@pytest.mark.parametrize('document_filter', [
+    lambda ids: {"advisor_id": ids['bola']},
+    lambda ids: {"degree_id": ids['degree'], "advisor_id": ids['bola']},
+    lambda ids: {"student_ids": [ids['bola_student']]},
+    lambda ids: {"student_ids": [ids['ada_student'], ids['bola_student']]},
+])
+def test_jobs_for_other_lecturers_advisees_are_refused(client, advisors, document_filter):
+    response = client.post(JOBS, headers=advisors['ada_headers'], json={"kind": "transcript", "filter": document_filter(advisors)})
+    assert response.status_code == 403 and response.get_json()['success'] is False
+
+
+def test_jobs_are_scoped_to_the_lecturers_advisees(app, client, advisors):
+    job = _run_job(app, client, advisors['ada_headers'], {"degree_id": advisors['degree']})
+    assert job['filter'] == {"degree_id": advisors['degree'], "advisor_id": advisors['ada']}
+    assert [entry['student_id'] for entry in job['documents']] == [advisors['ada_student']]
+    assert [entry['student_id'] for entry in _run_job(app, client, advisors['ada_headers'], {})['documents']] == [advisors['ada_student']]
+
+
+def test_downloads_need_a_job_of_the_lecturer_for_a_current_advisee(app, client, advisors):
+    ada_url = _run_job(app, client, advisors['ada_headers'], {})['documents'][0]['url']
+    bola_url = _run_job(app, client, advisors['bola_headers'], {})['documents'][0]['url']
+
+    response = client.get(ada_url, headers=advisors['ada_headers'])
+    assert response.status_code == 200 and response.mimetype == 'application/pdf'
+    assert response.cache_control.private and not response.cache_control.public
+    assert client.get(ada_url, headers=advisors['bola_headers']).status_code == 404 # Exists, but not in any of Bola's jobs
+    assert client.get(bola_url, headers=advisors['ada_headers']).status_code == 404
+    assert client.get('/api/documents/' + '0' * 64, headers=advisors['ada_headers']).status_code == 404
+
+    with app.app_context():
+        db.session.get(Student, advisors['ada_student']).advisor_id = advisors['bola']
+        db.session.commit()
+    assert client.get(ada_url, headers=advisors['ada_headers']).status_code == 404 # No longer their advisee
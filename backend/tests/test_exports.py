@@ -0,0 +1,43 @@
+# backend/tests/test_exports.py
+import csv
+import io
+
+import pytest
+
+from conftest import auth_headers
+from extensions import db
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.student import Student
+
+
+@pytest.fixture
+def advisors(app):
+    """Two lecturers with one advisee each, both in the same degree."""
+    with app.app_context():
+        degree = Degree(name='Computer Science', faculty='Science')
+        lecturers = [Lecturer(first_name=name, last_name='Obi', email=f'{name.lower()}@example.com', password_hash='x') for name in ('Ada', 'Bola')]
+        db.session.add_all([degree, *lecturers]); db.session.flush()
+        db.session.add_all([Student(first_name='Tolu', last_name=str(i), email=f'tolu{i}@example.com', matric_number=f'CST/{i}', password_hash='x',
+                                    degree_id=degree.id, advisor_id=lecturer.id) for i, lecturer in enumerate(lecturers)])
+        db.session.commit()
+        return {"degree": degree.id, "ada": lecturers[0].id, "bola": lecturers[1].id, "ada_headers": auth_headers(lecturers[0], 'lecturer')}
+
+
+def _matric_numbers(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [row['matric_number'] for row in csv.DictReader(io.StringIO(response.get_data(as_text=True)))]
+
+
+@pytest.mark.parametrize('query', ['', '?degree_id={degree}', '?faculty=Science', '?advisor_id={ada}'])
+def test_exports_cover_the_lecturers_own_advisees(client, advisors, query):
+    assert _matric_numbers(client.get('/api/exports/cohort' + query.format(**advisors), headers=advisors['ada_headers'])) == ['CST/0']
+    response = client.get('/api/exports/transcripts' + query.format(**advisors), headers=advisors['ada_headers'])
+    assert response.status_code == 200 and 'CST/1' not in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url', ['/api/exports/transcripts', '/api/exports/cohort'])
+def test_another_lecturers_advisees_are_refused(client, advisors, url):
+    response = client.get(f"{url}?advisor_id={advisors['bola']}", headers=advisors['ada_headers'])
+    assert response.status_code == 403 and response.get_json()['success'] is False
+    assert client.get(f"{url}?advisor_id={advisors['bola']}&degree_id={advisors['degree']}", headers=advisors['ada_headers']).status_code == 403
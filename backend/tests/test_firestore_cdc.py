@@ -0,0 +1,104 @@
+# backend/tests/test_firestore_cdc.py
+import pytest
+
+from app import create_app
+from extensions import db
+from firestore_cdc import FirestoreShipper
+from firestore_memory import InMemoryFirestore
+from firestore_sync import lecturer_uid, student_uid
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.degree import Degree
+from models.firestore_outbox import FirestoreOutbox
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.student import Student
+
+
+def _outbox():
+    return sorted((row.source, row.row_id) for row in FirestoreOutbox.query)
+
+
+@pytest.fixture
+def synced(app):
+    """Sync on for this app, everything created so far shipped to an in-memory Firestore."""
+    app.config['FIRESTORE_SYNC_ENABLED'] = True
+    with app.app_context():
+        degree = Degree(name='Computer Science', faculty='Science')
+        lecturer = Lecturer(first_name='Ada', last_name='Obi', email='ada@example.com', password_hash='x')
+        db.session.add_all([degree, lecturer]); db.session.flush()
+        students = [Student(first_name='Tolu', last_name=str(i), email=f'tolu{i}@example.com', matric_number=f'CST/{i}', password_hash='x', degree_id=degree.id, advisor_id=lecturer.id) for i in range(2)]
+        db.session.add_all(students); db.session.flush()
+        notes = [AdvisingNote(content=f'Note {i}', student_id=students[i].id, lecturer_id=lecturer.id) for i in range(2)]
+        db.session.add_all(notes + [Course(code='CSC101', title='Programming', units=3), AdvisingResource(title='Handbook', url='https://example.com/handbook', category='Guides')])
+        db.session.commit()
+        ids = {"degree": degree.id, "lecturer": lecturer.id, "students": [s.id for s in students], "notes": [n.id for n in notes]}
+    shipper = FirestoreShipper(app, client=InMemoryFirestore())
+    assert shipper.ship_once() == 8 # Every tracked table, including lecturers, degrees, courses and resources
+    return app, shipper, ids
+
+
+def _document(shipper, collection, doc_id):
+    return shipper.client.collection(collection).document(str(doc_id)).get().to_dict()
+
+
+def test_recording_follows_the_flag_of_the_current_app(app):
+    app.config['FIRESTORE_SYNC_ENABLED'] = True
+    other = create_app('development') # A second app in the process (CLI, tests) with sync off
+    assert other.config['FIRESTORE_SYNC_ENABLED'] is False
+    with app.app_context():
+        db.session.add(Degree(name='Physics', faculty='Science')); db.session.commit()
+        assert _outbox() == [('degrees', 1)]
+    with other.app_context():
+        db.session.add(Degree(name='Chemistry', faculty='Science')); db.session.commit()
+    other.config['FIRESTORE_SYNC_ENABLED'] = True
+    with app.app_context():
+        app.config['FIRESTORE_SYNC_ENABLED'] = False # Switching one app off doesn't switch the other
+        assert _outbox() == [('degrees', 1)]
+    with other.app_context():
+        db.session.add(Degree(name='Biology', faculty='Science')); db.session.commit()
+        assert _outbox() == [('degrees', 1), ('degrees', 3)]
+
+
+def test_renaming_a_lecturer_reships_their_notes(synced):
+    app, shipper, ids = synced
+    with app.app_context():
+        db.session.get(Lecturer, ids['lecturer']).last_name = 'Okafor'
+        db.session.commit()
+        assert _outbox() == [('advising_notes', ids['notes'][0]), ('advising_notes', ids['notes'][1]), ('lecturers', ids['lecturer'])]
+    assert shipper.ship_once() == 3
+    assert _document(shipper, 'users', lecturer_uid(ids['lecturer']))['name'] == 'Ada Okafor'
+    assert {_document(shipper, 'advising_notes', note_id)['author_name'] for note_id in ids['notes']} == {'Ada Okafor'}
+
+    with app.app_context():
+        db.session.get(Lecturer, ids['lecturer']).office_location = 'Block C' # Not copied anywhere
+        db.session.commit()
+        assert _outbox() == [('lecturers', ids['lecturer'])]
+
+
+def test_editing_a_degree_reships_its_students(synced):
+    app, shipper, ids = synced
+    with app.app_context():
+        db.session.get(Degree, ids['degree']).name = 'Computing'
+        db.session.commit()
+    assert shipper.ship_once() == 3
+    assert _document(shipper, 'degrees', ids['degree'])['name'] == 'Computing'
+    assert {_document(shipper, 'users', student_uid(student_id))['degree']['name'] for student_id in ids['students']} == {'Computing'}
+
+
+def test_courses_and_resources_are_shipped(synced):
+    app, shipper, ids = synced
+    with app.app_context():
+        resource = AdvisingResource.query.one()
+        resource.title = 'Student Handbook'
+        Course.query.one().title = 'Programming I'
+        db.session.commit()
+        resource_id, course_id = resource.id, Course.query.one().id
+    assert shipper.ship_once() == 2
+    assert _document(shipper, 'advising_resources', resource_id)['title'] == 'Student Handbook'
+    assert _document(shipper, 'courses', course_id)['title'] == 'Programming I'
+
+    with app.app_context():
+        db.session.delete(db.session.get(AdvisingResource, resource_id)); db.session.commit()
+    assert shipper.ship_once() == 1
+    assert not shipper.client.collection('advising_resources').document(str(resource_id)).get().exists
@@ -0,0 +1,56 @@
+# backend/tests/test_grade_upload.py
+import io
+
+from sqlalchemy import event
+
+from conftest import auth_headers
+from extensions import db
+from gpa_engine import IN_CHUNK_SIZE
+from models.course import Course
+from models.lecturer import Lecturer
+from models.semester_gpa import StudentSemesterGpa
+from models.student import Student
+
+
+def _setup(student_count):
+    lecturer = Lecturer(first_name='Grace', last_name='Hopper', email='grace@example.com', password_hash='x')
+    db.session.add_all([lecturer, Course(code='CSC101', title='Intro', units=3), Course(code='MTH101', title='Maths', units=2)])
+    db.session.add_all(Student(first_name='S', last_name=str(i), email=f's{i}@example.com', matric_number=f'M/{i:05d}', password_hash='x') for i in range(student_count))
+    db.session.commit()
+    return auth_headers(lecturer, 'lecturer')
+
+
+def test_non_utf8_file_is_rejected_with_400(app, client):
+    with app.app_context(): headers = _setup(1)
+    csv_bytes = "matric_number,course_code,grade\nM/00000,CSC101,A\n# Adébáyọ̀\n".encode('utf-16')
+    response = client.post('/api/lecturer/submit-grades', headers=headers, data={'file': (io.BytesIO(csv_bytes), 'grades.csv')}, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "The file must be UTF-8 encoded CSV."
+
+
+def test_large_upload_updates_gpa_with_chunked_reads(app, client):
+    student_count = IN_CHUNK_SIZE * 2 + 100
+    with app.app_context():
+        headers = _setup(student_count)
+        engine = db.engine
+    lines = ["matric_number,course_code,grade,semester"]
+    for i in range(student_count):
+        lines += [f"M/{i:05d},CSC101,A,2024/2025 - Semester 1", f"M/{i:05d},MTH101,C,2024/2025 - Semester 1"]
+
+    largest_in = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and ('FROM students' in statement or 'FROM student_semester_gpa' in statement):
+            largest_in.append(len(parameters))
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.post('/api/lecturer/submit-grades?semester=2024/2025 - Semester 1', headers=headers, data="\n".join(lines), content_type='text/csv')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['inserted'] == student_count * 2
+    assert max(largest_in) <= IN_CHUNK_SIZE
+
+    with app.app_context():
+        gpas = {gpa for (gpa,) in db.session.query(Student.gpa)}
+        assert gpas == {round((3 * 5.0 + 2 * 3.0) / 5, 2)}
+        assert StudentSemesterGpa.query.count() == student_count
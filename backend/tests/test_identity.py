@@ -0,0 +1,111 @@
+# backend/tests/test_identity.py
+import pytest
+
+import identity
+from conftest import auth_headers, count_statements
+from extensions import db
+from identity import get_identity, invalidate_identity
+from models.lecturer import Lecturer
+from models.student import Student
+
+
+@pytest.fixture
+def people(app):
+    invalidate_identity() # The cache is process-wide; don't see another test's users
+    with app.app_context():
+        first = Lecturer(first_name='Ada', last_name='Obi', email='ada@example.com', password_hash='x')
+        second = Lecturer(first_name='Bola', last_name='Eze', email='bola@example.com', password_hash='x')
+        db.session.add_all([first, second]); db.session.flush()
+        student = Student(first_name='Tolu', last_name='Ade', email='tolu@example.com', matric_number='CST/001', password_hash='x', advisor_id=first.id)
+        db.session.add(student); db.session.commit()
+        ids = {"first": first.id, "second": second.id, "student": student.id,
+               "first_headers": auth_headers(first, 'lecturer'), "second_headers": auth_headers(second, 'lecturer')}
+    yield ids # Outside the app context, so client requests get their own g and session
+    invalidate_identity()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(identity.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def _reassign_with_core(student_id, advisor_id):
+    """A write that skips the ORM hooks, like seed_bulk's upserts or another worker's commit."""
+    db.session.execute(Student.__table__.update().where(Student.__table__.c.id == student_id).values(advisor_id=advisor_id))
+    db.session.commit()
+
+
+def test_cache_hit_skips_the_query(app, people):
+    with app.app_context():
+        with count_statements(db.engine) as statements:
+            first = get_identity('student', people['student'])
+            second = get_identity('student', people['student'])
+        assert first == second and first.advisor_id == people['first']
+        assert len(statements) == 1
+        assert get_identity('student', 999999) is None
+
+
+def test_entries_expire_after_the_ttl(app, people, clock):
+    app.config['IDENTITY_CACHE_TTL'] = 60
+    with app.app_context():
+        assert get_identity('student', people['student']).advisor_id == people['first']
+        _reassign_with_core(people['student'], people['second'])
+        clock[0] += 59
+        assert get_identity('student', people['student']).advisor_id == people['first'] # Still trusted
+        clock[0] += 2
+        assert get_identity('student', people['student']).advisor_id == people['second']
+
+
+def test_orm_commit_evicts_and_rollback_does_not(app, people):
+    with app.app_context():
+        assert get_identity('student', people['student']).first_name == 'Tolu'
+        student = db.session.get(Student, people['student'])
+        student.first_name = 'Tolulope'
+        db.session.flush(); db.session.rollback()
+        assert get_identity('student', people['student']).first_name == 'Tolu'
+
+        student = db.session.get(Student, people['student'])
+        student.first_name, student.advisor_id = 'Tolulope', people['second']
+        db.session.commit()
+        snapshot = get_identity('student', people['student'])
+        assert (snapshot.first_name, snapshot.advisor_id) == ('Tolulope', people['second'])
+
+        db.session.delete(db.session.get(Student, people['student'])); db.session.commit()
+        assert get_identity('student', people['student']) is None
+
+
+def test_cache_is_bounded_lru(app, people):
+    app.config['IDENTITY_CACHE_SIZE'] = 2
+    with app.app_context():
+        get_identity('lecturer', people['first']); get_identity('lecturer', people['second'])
+        get_identity('lecturer', people['first']) # Now most recently used
+        get_identity('student', people['student']) # Evicts the second lecturer
+        assert list(identity._entries) == [('lecturer', people['first']), ('student', people['student'])]
+
+
+def test_fresh_read_sees_writes_the_cache_missed(app, people):
+    with app.app_context():
+        get_identity('student', people['student'])
+        _reassign_with_core(people['student'], people['second'])
+        assert get_identity('student', people['student']).advisor_id == people['first'] # Stale, as documented
+        assert get_identity('student', people['student'], fresh=True).advisor_id == people['second']
+        assert get_identity('student', people['student']).advisor_id == people['second'] # Refreshed the entry
+        db.session.execute(Student.__table__.delete()); db.session.commit()
+        assert get_identity('student', people['student'], fresh=True) is None
+        assert ('student', people['student']) not in identity._entries
+
+
+def test_reassigned_advisor_loses_note_access_at_once(app, client, people):
+    url = f"/api/students/{people['student']}/notes"
+    assert client.post(url, headers=people['first_headers'], json={"content": "First meeting."}).status_code == 201
+    assert client.get(url, headers=people['first_headers']).status_code == 200 # Advisor is now cached
+    with app.app_context():
+        _reassign_with_core(people['student'], people['second'])
+
+    assert client.get(url, headers=people['first_headers']).status_code == 403
+    assert client.post(url, headers=people['first_headers'], json={"content": "Too late."}).status_code == 403
+    response = client.get(url, headers=people['second_headers'])
+    assert response.status_code == 200 and [note['content'] for note in response.get_json()['notes']] == ["First meeting."]
+    assert client.post(url, headers=people['second_headers'], json={"content": "Handover."}).status_code == 201
@@ -0,0 +1,155 @@
+# backend/tests/test_jobs.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from extensions import db
+from jobs import Worker, enqueue, execute_job, task
+from models.background_job import BackgroundJob
+
+CALLS = []
+
+
+@task('tests.record', queue='default', max_attempts=2)
+def record_task(context, value=None):
+    CALLS.append((context.job_id, context.attempt, value))
+    return {"value": value}
+
+
+@task('tests.fail', queue='default', max_attempts=2)
+def fail_task(context):
+    raise RuntimeError("boom")
+
+
+@task('tests.lose_claim', queue='default', max_attempts=2)
+def lose_claim_task(context):
+    # Another worker takes the job over (lease expired) while this attempt is still running
+    with db.engine.begin() as connection:
+        connection.execute(BackgroundJob.__table__.update().where(BackgroundJob.__table__.c.id == context.job_id).values(claim_token='other-worker'))
+    return {"late": True}
+
+
+@pytest.fixture
+def queues(app):
+    app.config.update(JOB_QUEUES='default=2,reports=1', JOB_LEASE_SECONDS=60, JOB_RETRY_BASE_SECONDS=30)
+    CALLS.clear()
+    with app.app_context():
+        yield app
+
+
+def _enqueue(task_name, count=1, **kwargs):
+    created = [enqueue(task_name, **kwargs) for _ in range(count)]
+    db.session.commit()
+    return [job.id for job in created]
+
+
+def _job(job_id):
+    db.session.expire_all()
+    return db.session.get(BackgroundJob, job_id)
+
+
+def test_claims_respect_queue_limits_across_workers(queues):
+    default_ids = _enqueue('tests.record', 3)
+    report_ids = _enqueue('tests.record', 2, queue='reports')
+    first, second = Worker(queues, processes=10), Worker(queues, processes=10)
+
+    claimed = first._claim(10)
+    assert sorted(claimed) == default_ids[:2] + report_ids[:1] # Oldest first, capped per queue
+    assert second._claim(10) == [] # Limits count running rows from every worker
+    assert first._claim(10) == [] # Already-running jobs are not handed out again
+    for job_id in claimed:
+        job = _job(job_id)
+        assert (job.status, job.claim_token, job.attempts) == ('running', first.token, 1)
+
+    execute_job(claimed[0], first.token)
+    assert second._claim(10) == [default_ids[2]] # A finished job frees its slot
+
+
+def test_claim_skips_jobs_not_yet_due_and_respects_free_slots(queues):
+    later, = _enqueue('tests.record', run_at=datetime.utcnow() + timedelta(hours=1))
+    now_ids = _enqueue('tests.record', 2)
+    assert Worker(queues)._claim(1) == now_ids[:1]
+    assert _job(later).status == 'queued'
+
+
+def test_success_records_the_result_and_clears_the_claim(queues):
+    job_id, = _enqueue('tests.record', payload={"value": 7})
+    worker = Worker(queues)
+    worker._claim(1)
+    execute_job(job_id, worker.token)
+    job = _job(job_id)
+    assert CALLS == [(job_id, 1, 7)]
+    assert (job.status, job.result, job.progress, job.claim_token) == ('succeeded', '{"value": 7}', 1.0, None)
+
+
+def test_failures_back_off_then_give_up(queues):
+    job_id, = _enqueue('tests.fail')
+    worker = Worker(queues)
+    worker._claim(1)
+    execute_job(job_id, worker.token)
+    job = _job(job_id)
+    assert (job.status, job.attempts, job.claim_token) == ('queued', 1, None)
+    assert job.last_error == "RuntimeError: boom"
+    assert timedelta(seconds=25) < job.run_at - datetime.utcnow() <= timedelta(seconds=30)
+
+    assert worker._claim(1) == [] # Not due yet
+    job.run_at = datetime.utcnow(); db.session.commit()
+    assert worker._claim(1) == [job_id]
+    execute_job(job_id, worker.token)
+    job = _job(job_id)
+    assert (job.status, job.attempts) == ('failed', 2)
+
+
+def test_expired_lease_is_retried_and_the_old_claim_is_ignored(queues):
+    job_id, = _enqueue('tests.record')
+    crashed, survivor = Worker(queues), Worker(queues)
+    crashed._claim(1)
+    survivor._heartbeat()
+    assert _job(job_id).status == 'running' # Lease still fresh
+
+    job = _job(job_id)
+    job.heartbeat_at = datetime.utcnow() - timedelta(seconds=61); db.session.commit()
+    survivor._heartbeat()
+    job = _job(job_id)
+    assert (job.status, job.attempts, job.claim_token) == ('queued', 1, None)
+    assert job.last_error.startswith(f"Worker {crashed.name} stopped responding")
+
+    job.run_at = datetime.utcnow(); db.session.commit()
+    assert survivor._claim(1) == [job_id]
+    execute_job(job_id, crashed.token) # The original worker waking up must not run it again
+    assert CALLS == []
+    execute_job(job_id, survivor.token)
+    assert [call[:2] for call in CALLS] == [(job_id, 2)]
+    assert _job(job_id).status == 'succeeded'
+
+
+def test_heartbeat_keeps_running_jobs_alive(queues):
+    job_id, = _enqueue('tests.record')
+    worker = Worker(queues)
+    worker._claim(1)
+    worker.running = {object(): job_id}
+    job = _job(job_id)
+    job.heartbeat_at = datetime.utcnow() - timedelta(seconds=61); db.session.commit()
+    worker._heartbeat() # Renews before checking for expired leases
+    job = _job(job_id)
+    assert job.status == 'running' and job.heartbeat_at > datetime.utcnow() - timedelta(seconds=5)
+
+
+def test_result_is_dropped_when_the_claim_was_taken_over(queues):
+    job_id, = _enqueue('tests.lose_claim')
+    worker = Worker(queues)
+    worker._claim(1)
+    execute_job(job_id, worker.token)
+    job = _job(job_id)
+    assert (job.status, job.result, job.claim_token) == ('running', None, 'other-worker')
+
+
+def test_cancel_only_applies_to_queued_jobs(queues):
+    running, queued = _enqueue('tests.record', 2)
+    Worker(queues)._claim(1)
+    assert jobs.cancel(_job(running)) is False
+    assert jobs.cancel(_job(queued)) is True
+    db.session.commit()
+    assert (_job(running).status, _job(queued).status) == ('running', 'cancelled')
+    assert Worker(queues)._claim(2) == []
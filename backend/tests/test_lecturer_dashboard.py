@@ -0,0 +1,38 @@
+# backend/tests/test_lecturer_dashboard.py
+from conftest import auth_headers, count_statements
+from extensions import db
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.student import Student
+
+
+def _lecturer_with_advisees(number, count, degrees):
+    lecturer = Lecturer(first_name='Lecturer', last_name=str(number), email=f'lecturer{number}@example.com', password_hash='x')
+    db.session.add(lecturer); db.session.flush()
+    db.session.add_all(Student(
+        first_name='Student', last_name=f'{number}-{i}', email=f's{number}-{i}@example.com', matric_number=f'M/{number}/{i}',
+        password_hash='x', advisor_id=lecturer.id, degree_id=degrees[i % len(degrees)].id if i % 5 else None # Some without a degree
+    ) for i in range(count))
+    db.session.commit()
+    return lecturer
+
+
+def test_dashboard_query_count_does_not_grow_with_advisees(app, client):
+    with app.app_context():
+        degrees = [Degree(name=f'Degree {i}', faculty='Science') for i in range(7)]
+        db.session.add_all(degrees); db.session.commit()
+        warm_up, few, many = (_lecturer_with_advisees(number, count, degrees) for number, count in ((0, 1), (1, 2), (2, 200)))
+        headers = {count: auth_headers(lecturer, 'lecturer') for count, lecturer in ((1, warm_up), (2, few), (200, many))}
+        engine = db.engine
+    assert client.get('/api/lecturer/data', headers=headers[1]).status_code == 200 # Fills the process-wide caches
+
+    counts = {}
+    for expected in (2, 200):
+        with count_statements(engine) as statements:
+            response = client.get('/api/lecturer/data', headers=headers[expected])
+        assert response.status_code == 200
+        advisees = response.get_json()['advisees']
+        assert len(advisees) == expected
+        assert sum(advisee['degree'] == 'N/A' for advisee in advisees) == len(range(0, expected, 5))
+        counts[expected] = len(statements)
+    assert counts[2] == counts[200], counts
@@ -0,0 +1,46 @@
+# backend/tests/test_mail_queue.py
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+import mail_queue
+from extensions import db
+from mail_queue import enqueue_email
+
+
+def _committed(engine, sql):
+    with engine.connect() as connection: # Sees only what the dispatcher has committed
+        return connection.execute(text(sql)).all()
+
+
+def test_each_email_is_committed_and_the_claim_renewed_as_it_goes(app, monkeypatch):
+    with app.app_context():
+        for i in range(4): enqueue_email(f"Message {i}", [f"guardian{i}@example.com"], body="Hello")
+        db.session.commit()
+        engine, dispatcher = db.engine, app.extensions['mail_dispatcher']
+    delivered, observed = [], []
+
+    class Connection:
+        def send(self, message):
+            observed.append(_committed(engine, "SELECT subject, status, claimed_at FROM email_outbox ORDER BY id"))
+            delivered.append(message.subject)
+            if message.subject == 'Message 0':
+                # Age every claim past the lease, as if the batch had been slow, then let another dispatcher take Message 2
+                with engine.begin() as connection:
+                    connection.execute(text("UPDATE email_outbox SET claimed_at = :old WHERE status = 'sending'"), {"old": datetime.utcnow() - timedelta(hours=1)})
+                    connection.execute(text("UPDATE email_outbox SET claim_token = 'other-dispatcher' WHERE subject = 'Message 2'"))
+
+    @contextmanager
+    def connect():
+        yield Connection()
+    monkeypatch.setattr(mail_queue.mail, 'connect', connect)
+
+    assert dispatcher.dispatch_once() == 4
+    assert delivered == ['Message 0', 'Message 1', 'Message 3'] # Message 2 belongs to the other dispatcher now
+    # Before Message 1 went out, Message 0 was already recorded as sent and the remaining claims renewed
+    statuses = {subject: (status, claimed_at) for subject, status, claimed_at in observed[1]}
+    assert statuses['Message 0'][0] == 'sent'
+    assert datetime.fromisoformat(str(statuses['Message 3'][1])) > datetime.utcnow() - mail_queue.CLAIM_LEASE
+    final = dict(_committed(engine, "SELECT subject, status FROM email_outbox"))
+    assert final == {'Message 0': 'sent', 'Message 1': 'sent', 'Message 2': 'sending', 'Message 3': 'sent'}
@@ -0,0 +1,97 @@
+# backend/tests/test_pagination.py
+from datetime import datetime
+
+import pytest
+
+from conftest import auth_headers
+from extensions import db
+from models.course import Course
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.student import Student
+from pagination import InvalidPageRequest, decode_cursor, encode_cursor, split_page
+
+SAME_TIME = datetime(2024, 3, 1, 9, 30)
+
+
+@pytest.fixture
+def advising(app):
+    """A lecturer and their advisee with 5 notes (3 sharing one created_at) and 5 results."""
+    with app.app_context():
+        lecturer = Lecturer(first_name='Ada', last_name='Obi', email='ada@example.com', password_hash='x')
+        db.session.add(lecturer); db.session.flush()
+        student = Student(first_name='Tolu', last_name='Ade', email='tolu@example.com', matric_number='CST/001', password_hash='x', advisor_id=lecturer.id)
+        db.session.add(student); db.session.flush()
+        created = [datetime(2024, 3, 2), SAME_TIME, SAME_TIME, SAME_TIME, datetime(2024, 2, 1)]
+        db.session.add_all(AdvisingNote(content=f'Note {i}', created_at=at, updated_at=at, student_id=student.id, lecturer_id=lecturer.id) for i, at in enumerate(created))
+        courses = [Course(code=f'CSC{100 + i}', title=f'Course {i}', units=3) for i in range(3)]
+        db.session.add_all(courses); db.session.flush()
+        db.session.add_all(Result(student_id=student.id, course_id=course.id, grade='A', gpa=5.0, semester=semester)
+                           for semester in ('2023/2024 First', '2023/2024 Second') for course in courses[:3 if semester.endswith('First') else 2])
+        db.session.commit()
+        return {"student": student.id, "lecturer": lecturer.id, "student_headers": auth_headers(student, 'student'), "lecturer_headers": auth_headers(lecturer, 'lecturer')}
+
+
+def _walk(client, url, headers, key, limit):
+    """Follows next_cursor to the end; returns the pages."""
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, headers=headers, query_string={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        pages.append(body[key])
+        cursor = body['next_cursor']
+        if cursor is None: return pages
+        assert len(pages) < 10
+
+
+def test_notes_pages_break_created_at_ties_by_id(client, advising):
+    url = f"/api/students/{advising['student']}/notes"
+    everything = client.get(url, headers=advising['lecturer_headers']).get_json()['notes']
+    pages = _walk(client, url, advising['lecturer_headers'], 'notes', 2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    paged = [note['id'] for page in pages for note in page]
+    assert paged == [note['id'] for note in everything] # No note skipped or repeated across the tied timestamps
+    tied = [note['id'] for note in everything if note['created_at'] == SAME_TIME.isoformat()]
+    assert len(tied) == 3 and tied == sorted(tied, reverse=True)
+
+
+def test_last_page_has_no_next_cursor(client, advising):
+    url = f"/api/students/{advising['student']}/notes"
+    assert [len(page) for page in _walk(client, url, advising['lecturer_headers'], 'notes', 5)] == [5] # Exactly one full page
+    results = _walk(client, '/api/student/results', advising['student_headers'], 'results', 2)
+    assert [len(page) for page in results] == [2, 2, 1]
+    keys = [(result['semester'], result['course_code']) for page in results for result in page]
+    assert keys == [('2023/2024 Second', 'CSC100'), ('2023/2024 Second', 'CSC101'), # Semester DESC, code ASC
+                    ('2023/2024 First', 'CSC100'), ('2023/2024 First', 'CSC101'), ('2023/2024 First', 'CSC102')]
+    advisees = _walk(client, '/api/lecturer/data', advising['lecturer_headers'], 'advisees', 1)
+    assert [len(page) for page in advisees] == [1]
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor([1]), encode_cursor(['x', 'y', 'z']), encode_cursor(['yesterday', 1])])
+def test_malformed_cursor_is_a_400(client, advising, cursor):
+    response = client.get(f"/api/students/{advising['student']}/notes", headers=advising['lecturer_headers'], query_string={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Invalid pagination cursor."
+
+
+def test_malformed_cursor_on_results_and_advisees_is_a_400(client, advising):
+    for url, headers in (('/api/student/results', advising['student_headers']), ('/api/lecturer/data', advising['lecturer_headers'])):
+        response = client.get(url, headers=headers, query_string={"cursor": "%%%"})
+        assert response.status_code == 400, url
+    response = client.get('/api/lecturer/data', headers=advising['lecturer_headers'], query_string={"cursor": encode_cursor(['seven'])})
+    assert response.status_code == 400
+    response = client.get('/api/student/results', headers=advising['student_headers'], query_string={"limit": "ten"})
+    assert response.status_code == 400
+
+
+def test_cursor_helpers():
+    assert decode_cursor(encode_cursor(['2024-03-01T09:30:00', 7]), 2) == ['2024-03-01T09:30:00', 7]
+    for token, size in (('', 1), ('!!', 1), (encode_cursor([1, 2]), 1), (encode_cursor(['x'])[:-2], 1)):
+        with pytest.raises(InvalidPageRequest):
+            decode_cursor(token, size)
+    assert split_page([1, 2, 3], 2, lambda row: (row,)) == ([1, 2], encode_cursor([2]))
+    assert split_page([1, 2], 2, lambda row: (row,)) == ([1, 2], None)
+    assert split_page([], 2, lambda row: (row,)) == ([], None)
@@ -0,0 +1,39 @@
+# backend/tests/test_profiler.py
+import json
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import profiler
+from app import create_app
+from conftest import count_statements
+from extensions import db
+
+TOKEN = 'let-me-profile'
+
+
+def _engine_listener_counts():
+    """Listeners registered on the Engine class (SQLAlchemy keeps no public count)."""
+    return tuple(len(getattr(Engine.dispatch, name)._clslevel[Engine]) for name in ('before_cursor_execute', 'after_cursor_execute'))
+
+
+def test_sql_listeners_are_registered_once_for_many_apps(app, client, tmp_path, monkeypatch):
+    monkeypatch.setenv('PROFILER_TOKEN', TOKEN)
+    monkeypatch.setenv('PROFILER_DIR', str(tmp_path / 'profiles'))
+    create_app('development')
+    registered = _engine_listener_counts()
+    profiled = [create_app('development') for _ in range(2)][-1] # e.g. test and CLI apps next to the web app
+    assert _engine_listener_counts() == registered
+    assert event.contains(Engine, 'before_cursor_execute', profiler._mark_sql_start)
+
+    with profiled.app_context():
+        engine = db.engine
+    with count_statements(engine) as statements:
+        response = profiled.test_client().get('/api/resources', headers={profiler.PROFILE_HEADER: TOKEN})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    with open(tmp_path / 'profiles' / f'{profile_id}.json') as handle:
+        summary = json.load(handle)
+    assert summary['sql_count'] == len(statements) > 0 # Each statement recorded once, not once per create_app()
+
+    assert 'X-Profile-Id' not in profiled.test_client().get('/api/resources').headers
@@ -0,0 +1,51 @@
+# backend/tests/test_repositories.py
+import pytest
+
+from conftest import auth_headers
+from extensions import db
+from firestore_cdc import build_writes
+from firestore_memory import InMemoryFirestore
+from firestore_sync import commit_batch
+from identity import invalidate_identity
+from models.advising_resource import AdvisingResource
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.student import Student
+from repositories import create_repository
+
+
+@pytest.fixture
+def firestore_app(app):
+    """DATA_BACKEND=firestore on an in-memory client holding a copy of every row, and no shipper."""
+    invalidate_identity()
+    with app.app_context():
+        degree = Degree(name='Computer Science', faculty='Science')
+        lecturer = Lecturer(first_name='Ada', last_name='Obi', email='ada@example.com', password_hash='x', office_location='Block A')
+        resource = AdvisingResource(title='Handbook', url='https://example.com/handbook', category='Guides')
+        db.session.add_all([degree, lecturer, resource]); db.session.flush()
+        student = Student(first_name='Tolu', last_name='Ade', email='tolu@example.com', matric_number='CST/001', password_hash='x', degree_id=degree.id, advisor_id=lecturer.id)
+        db.session.add(student); db.session.commit()
+        client = InMemoryFirestore()
+        commit_batch(client, build_writes({('degrees', degree.id), ('lecturers', lecturer.id), ('students', student.id), ('advising_resources', resource.id)}))
+        app.extensions['repository'] = create_repository(app, 'firestore', client=client)
+        ids = {"lecturer": lecturer.id, "resource": resource.id, "student_headers": auth_headers(student, 'student')}
+    yield ids
+    invalidate_identity()
+
+
+def test_lecturer_and_resource_edits_show_without_a_sync(app, client, firestore_app):
+    before = client.get('/api/student/data', headers=firestore_app['student_headers']).get_json()
+    assert before['advisor_info']['office'] == 'Block A' and [res['title'] for res in before['resources']] == ['Handbook']
+
+    with app.app_context():
+        db.session.get(Lecturer, firestore_app['lecturer']).office_location = 'Block C'
+        db.session.get(AdvisingResource, firestore_app['resource']).title = 'Student Handbook'
+        db.session.add(AdvisingResource(title='Calendar', url='https://example.com/calendar', category='Dates'))
+        db.session.commit()
+
+    after = client.get('/api/student/data', headers=firestore_app['student_headers']).get_json()
+    assert after['advisor_info']['office'] == 'Block C'
+    assert [res['title'] for res in after['resources']] == ['Calendar', 'Student Handbook']
+    assert after['student_info']['degree']['name'] == 'Computer Science' # Still read from the Firestore copy
+    listed = client.get('/api/resources').get_json()['resources']
+    assert [res['title'] for res in listed] == ['Calendar', 'Student Handbook']
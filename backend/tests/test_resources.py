@@ -0,0 +1,28 @@
+# backend/tests/test_resources.py
+import hashlib
+
+import resource_cache
+from extensions import db
+from models.advising_resource import AdvisingResource
+
+
+def test_resources_etag_matches_the_body_it_is_served_with(app, client, monkeypatch):
+    with app.app_context():
+        db.session.add(AdvisingResource(title='Handbook', url='#', category='Policy')); db.session.commit()
+    first = client.get('/api/resources')
+    assert first.status_code == 200
+    etag = first.headers['ETag'].removeprefix('W/').strip('"')
+    assert etag == hashlib.sha1(first.get_data()).hexdigest()[:20]
+    assert client.get('/api/resources', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # A commit that lands between reading the ETag and the body must not mix the two versions
+    real_load = resource_cache._load
+    def load_then_change(ordering):
+        loaded = real_load(ordering)
+        db.session.add(AdvisingResource(title=f'Added during load {resource_cache.catalog_version()}', url='#', category='Guide')); db.session.commit()
+        return loaded
+    monkeypatch.setattr(resource_cache, '_load', load_then_change)
+    resource_cache.invalidate_resource_cache()
+    changed = client.get('/api/resources')
+    assert changed.status_code == 200
+    assert changed.headers['ETag'].removeprefix('W/').strip('"') == hashlib.sha1(changed.get_data()).hexdigest()[:20]
@@ -0,0 +1,67 @@
+# backend/tests/test_seed_bulk.py
+import json
+
+import pytest
+
+from conftest import auth_headers
+from extensions import db
+from identity import get_identity, invalidate_identity
+from models.lecturer import Lecturer
+from models.student import Student
+from seed_bulk import seed_from_dataset
+
+LECTURERS = [{"email": "ada@example.com", "first_name": "Ada", "last_name": "Obi", "password": "secret1"},
+             {"email": "bola@example.com", "first_name": "Bola", "last_name": "Eze", "password": "secret2"}]
+
+
+def _dataset(tmp_path, name, advisor_email, first_name='Tolu'):
+    """Degrees, lecturers and one student; no results, so nothing gets rebuilt."""
+    path = tmp_path / name
+    path.write_text(json.dumps({
+        "degrees": [{"name": "Computer Science", "faculty": "Science"}],
+        "lecturers": LECTURERS,
+        "students": [{"matric_number": "CST/001", "email": "tolu@example.com", "first_name": first_name, "last_name": "Ade",
+                      "password": "secret3", "degree": "Computer Science", "advisor_email": advisor_email}],
+    }))
+    return str(path)
+
+
+def _seed(app, path):
+    with app.app_context():
+        seed_from_dataset(path, 'pbkdf2:sha256:1000', 1, lambda message: None)
+
+
+@pytest.fixture
+def seeded(app, tmp_path):
+    invalidate_identity()
+    _seed(app, _dataset(tmp_path, 'first.json', 'ada@example.com'))
+    with app.app_context():
+        student = Student.query.filter_by(matric_number='CST/001').one()
+        lecturers = {lecturer.email: lecturer for lecturer in Lecturer.query}
+        seeded = {"student": student.id, "ada": lecturers['ada@example.com'].id, "bola": lecturers['bola@example.com'].id,
+                  "student_headers": auth_headers(student, 'student')}
+    yield seeded
+    invalidate_identity()
+
+
+def test_reseed_without_results_changes_etags(app, client, tmp_path, seeded):
+    first = client.get('/api/student/data', headers=seeded['student_headers'])
+    assert first.status_code == 200 and first.get_json()['student_info']['name'] == 'Tolu Ade'
+    etag, _ = first.get_etag()
+    assert client.get('/api/student/data', headers={**seeded['student_headers'], "If-None-Match": f'W/"{etag}"'}).status_code == 304
+
+    _seed(app, _dataset(tmp_path, 'second.json', 'bola@example.com', first_name='Tolulope'))
+    response = client.get('/api/student/data', headers={**seeded['student_headers'], "If-None-Match": f'W/"{etag}"'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['student_info']['name'] == 'Tolulope Ade' and body['advisor_info']['name'] == 'Bola Eze'
+
+
+def test_reseed_clears_the_identity_cache(app, tmp_path, seeded):
+    with app.app_context():
+        snapshot = get_identity('student', seeded['student'])
+        assert (snapshot.first_name, snapshot.advisor_id) == ('Tolu', seeded['ada'])
+    _seed(app, _dataset(tmp_path, 'second.json', 'bola@example.com', first_name='Tolulope'))
+    with app.app_context():
+        snapshot = get_identity('student', seeded['student'])
+        assert (snapshot.first_name, snapshot.advisor_id) == ('Tolulope', seeded['bola'])
@@ -0,0 +1,109 @@
+# backend/tests/test_snapshot.py
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from extensions import db
+from gpa_engine import rebuild_gpa
+from identity import get_identity, invalidate_identity
+from models.advising_resource import AdvisingResource
+from models.course import Course
+from models.degree import Degree
+from models.enrollment import Enrollment
+from models.grade_scale import GradeScale, GradeScaleEntry
+from models.lecturer import Lecturer
+from models.note import AdvisingNote
+from models.result import Result
+from models.semester_gpa import StudentSemesterGpa
+from models.student import Student
+from snapshot import SNAPSHOT_MODELS, SnapshotError, export_snapshot, import_snapshot, import_snapshot_command
+
+
+def _populate():
+    degree = Degree(name='BSc Computer Science', faculty='Natural Sciences')
+    lecturer = Lecturer(first_name='Ada', last_name='Lovelace', email='ada@example.com', department='Computing', password_hash='pbkdf2:sha256$x')
+    scale = GradeScale(name='Five point', is_default=True, updated_at=datetime(2024, 1, 2, 3, 4, 5, 678000))
+    db.session.add_all([degree, lecturer, scale]); db.session.flush()
+    db.session.add_all(GradeScaleEntry(scale_id=scale.id, grade=grade, points=points) for grade, points in (('A', 5.0), ('B', 4.0), ('DEX', None)))
+    courses = [Course(code=f'CSC{100 + i}', title=f'Course {i}', units=1 + i % 3, level=100, semester=1 + i % 2) for i in range(4)]
+    students = [Student(first_name='Chidi', last_name=f'Ọlá {i}', email=f's{i}@example.com', matric_number=f'CST/{i:03d}', password_hash='x',
+                        degree_id=degree.id if i % 3 else None, advisor_id=lecturer.id, guardian_name=None if i % 2 else 'Parent') for i in range(7)]
+    db.session.add_all(courses + students); db.session.flush()
+    for i, student in enumerate(students):
+        for j, course in enumerate(courses[:1 + i % 4]):
+            db.session.add(Enrollment(student_id=student.id, course_id=course.id, academic_year='2023/2024', semester=1))
+            grade = 'AB'[j % 2] if (i + j) % 5 else 'DEX'
+            db.session.add(Result(student_id=student.id, course_id=course.id, grade=grade, semester='2023/2024 - Semester 1', gpa={'A': 5.0, 'B': 4.0}.get(grade)))
+        db.session.add(AdvisingNote(content=f'Note "{i}"\nline two', student_id=student.id, lecturer_id=lecturer.id))
+    db.session.add(AdvisingResource(title='Handbook', description=None, url='#', category='Policy'))
+    db.session.flush(); rebuild_gpa() # As in a live database, where the sums follow the results
+    db.session.commit()
+
+
+def _dump():
+    db.session.expire_all()
+    return {model.__table__.name: [tuple(row) for row in db.session.execute(select(model.__table__).order_by(model.__table__.c.id))] for model in SNAPSHOT_MODELS}
+
+
+def test_export_then_replace_restores_every_row(app, tmp_path):
+    path = str(tmp_path / 'advising.snap')
+    with app.app_context():
+        _populate()
+        before = _dump()
+        counts = export_snapshot(path, chunk_size=4, echo=lambda message: None) # Several chunks per table
+        assert counts == {table: len(rows) for table, rows in before.items()}
+
+        # Diverge from the snapshot, then restore it over the top
+        Student.query.update({Student.first_name: 'Changed'}); Result.query.filter(Result.id % 2 == 0).delete()
+        db.session.add(AdvisingResource(title='Added later')); db.session.commit()
+        import_snapshot(path, replace=True, echo=lambda message: None)
+        db.session.commit()
+
+        assert _dump() == before
+        # Derived tables are rebuilt from the restored results
+        student = Student.query.filter_by(matric_number='CST/003').one()
+        assert StudentSemesterGpa.query.filter_by(student_id=student.id).count() == 1
+        assert (student.gpa, student.total_units) == (round((5.0 * 1 + 4.0 * 2 + 4.0 * 1) / 4, 2), 4) # The DEX course carries no weight
+
+
+def test_import_refuses_a_populated_database_without_replace(app, tmp_path):
+    path = str(tmp_path / 'advising.snap')
+    with app.app_context():
+        _populate()
+        export_snapshot(path, echo=lambda message: None)
+        with pytest.raises(SnapshotError, match='not empty'):
+            import_snapshot(path, echo=lambda message: None)
+        db.session.rollback()
+
+
+def test_truncated_or_foreign_files_are_rejected(app, tmp_path):
+    path, truncated, foreign = (str(tmp_path / name) for name in ('advising.snap', 'truncated.snap', 'foreign.snap'))
+    with app.app_context():
+        _populate()
+        export_snapshot(path, echo=lambda message: None)
+        with open(path, 'rb') as handle: data = handle.read()
+        with open(truncated, 'wb') as handle: handle.write(data[:len(data) // 2])
+        with open(foreign, 'wb') as handle: handle.write(b'PK\x03\x04' + data[8:])
+        for bad_file, message in ((truncated, 'truncated'), (foreign, 'not an advising snapshot')):
+            with pytest.raises(SnapshotError, match=message):
+                import_snapshot(bad_file, replace=True, echo=lambda message: None)
+            db.session.rollback()
+        assert Student.query.count() == 7 # Nothing was committed
+
+
+def test_import_command_clears_the_identity_cache(app, tmp_path):
+    path = str(tmp_path / 'advising.snap')
+    invalidate_identity()
+    with app.app_context():
+        _populate()
+        export_snapshot(path, echo=lambda message: None)
+        student = Student.query.filter_by(matric_number='CST/001').one()
+        student.first_name = 'Changed'; db.session.commit()
+        assert get_identity('student', student.id).first_name == 'Changed'
+        student_id = student.id
+    result = app.test_cli_runner().invoke(import_snapshot_command, [path, '--replace'])
+    assert result.exit_code == 0 and '!!!' not in result.output, result.output
+    with app.app_context():
+        assert get_identity('student', student_id).first_name == 'Chidi'
+    invalidate_identity()
@@ -0,0 +1,196 @@
+# backend/transcript_export.py
+import csv
+import io
+import json
+import sys
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from extensions import db
+from models.course import Course
+from models.degree import Degree
+from models.lecturer import Lecturer
+from models.result import Result
+from models.student import Student
+
+# Streaming transcript and cohort report exports (CSV or NDJSON). Over HTTP a lecturer exports
+# their own advisees only (advisor_id is filled in and checked by app.py); the CLI commands
+# and background jobs take any filter.
+# Each export is one query run with stream_results + yield_per, so PostgreSQL reads it
+# through a server-side cursor and only one chunk of rows is in memory at a time. The
+# generators yield one encoded chunk per partition: the HTTP endpoints wrap them in a
+# streamed Response (the CSV header goes out before the query runs) and the CLI commands
+# write them to a file. Rows are ordered by student, so an NDJSON transcript (one line per
+# student with all their results) only ever holds a single student's results.
+#
+# Filters: degree_id, faculty, advisor_id, and for transcripts level (Course.level; only
+# results for courses at that level are included). Students have no level of their own.
+
+FORMATS = ('csv', 'ndjson')
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_CHUNK_SIZE = 2000
+
+TRANSCRIPT_COLUMNS = ('student_id', 'matric_number', 'first_name', 'last_name', 'degree', 'cgpa',
+                      'course_code', 'course_title', 'units', 'level', 'semester', 'grade', 'grade_points')
+STUDENT_COLUMNS = TRANSCRIPT_COLUMNS[:6]
+COHORT_COLUMNS = ('student_id', 'matric_number', 'first_name', 'last_name', 'email', 'degree', 'faculty',
+                  'advisor', 'cgpa', 'total_units', 'total_quality_points')
+
+
+class ExportError(ValueError):
+    """Raised for invalid export parameters; endpoints answer it with a 400."""
+
+
+def parse_export_args(args, allow_level=True, default_advisor_id=None):
+    """Reads format and filters from request.args (or any mapping). Requires at least one filter;
+    default_advisor_id is used when advisor_id is not given."""
+    export_format = (args.get('format') or 'csv').lower()
+    if export_format not in FORMATS:
+        raise ExportError(f"format must be one of: {', '.join(FORMATS)}.")
+    filters = {}
+    try:
+        for name in ('degree_id', 'advisor_id', 'level') if allow_level else ('degree_id', 'advisor_id'):
+            if args.get(name) not in (None, ''): filters[name] = int(args.get(name))
+    except (TypeError, ValueError):
+        raise ExportError("degree_id, advisor_id and level must be integers.")
+    if args.get('faculty'): filters['faculty'] = args.get('faculty')
+    if default_advisor_id is not None: filters.setdefault('advisor_id', default_advisor_id)
+    if not filters:
+        raise ExportError("Provide at least one of degree_id, faculty, advisor_id" + (" or level." if allow_level else "."))
+    return export_format, filters
+
+
+def _filter_students(statement, filters):
+    if 'degree_id' in filters: statement = statement.where(Student.degree_id == filters['degree_id'])
+    if 'advisor_id' in filters: statement = statement.where(Student.advisor_id == filters['advisor_id'])
+    if 'faculty' in filters: statement = statement.where(Degree.faculty == filters['faculty'])
+    return statement
+
+
+def _stream(statement, chunk_size):
+    """Yields lists of row tuples, one per server-side chunk."""
+    result = db.session.execute(statement.execution_options(stream_results=True, yield_per=chunk_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def transcript_statement(filters):
+    statement = select(
+        Student.id, Student.matric_number, Student.first_name, Student.last_name, Degree.name, Student.gpa,
+        Course.code, Course.title, Course.units, Course.level, Result.semester, Result.grade, Result.gpa
+    ).select_from(Result).join(Student, Result.student_id == Student.id).join(Course, Result.course_id == Course.id) \
+     .outerjoin(Degree, Student.degree_id == Degree.id)
+    if 'level' in filters: statement = statement.where(Course.level == filters['level'])
+    return _filter_students(statement, filters).order_by(Student.id, Result.semester, Course.code, Result.id)
+
+
+def cohort_statement(filters):
+    statement = select(
+        Student.id, Student.matric_number, Student.first_name, Student.last_name, Student.email, Degree.name, Degree.faculty,
+        (Lecturer.first_name + " " + Lecturer.last_name), Student.gpa, Student.total_units, Student.total_quality_points
+    ).select_from(Student).outerjoin(Degree, Student.degree_id == Degree.id).outerjoin(Lecturer, Student.advisor_id == Lecturer.id)
+    return _filter_students(statement, filters).order_by(Student.id)
+
+
+def _csv_chunks(columns, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue() # Sent before the query runs
+    for rows in partitions:
+        buffer.seek(0); buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def _transcript_ndjson_chunks(partitions):
+    """One JSON line per student: the student's fields plus their results, in transcript order."""
+    current, lines = None, []
+    for rows in partitions:
+        for row in rows:
+            if current is None or current['student_id'] != row[0]:
+                if current is not None: lines.append(json.dumps(current))
+                current = dict(zip(STUDENT_COLUMNS, row[:6]), results=[])
+            current['results'].append(dict(zip(TRANSCRIPT_COLUMNS[6:], row[6:])))
+        if lines:
+            yield "\n".join(lines) + "\n"; lines = []
+    if current is not None: yield json.dumps(current) + "\n"
+
+
+def _ndjson_chunks(columns, partitions):
+    for rows in partitions:
+        yield "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+def generate_transcripts(export_format, filters, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the transcript export as text chunks. Must run inside an app context."""
+    partitions = _stream(transcript_statement(filters), chunk_size)
+    if export_format == 'csv': return _csv_chunks(TRANSCRIPT_COLUMNS, partitions)
+    return _transcript_ndjson_chunks(partitions)
+
+
+def generate_cohort_report(export_format, filters, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the cohort report (one row per student) as text chunks. Must run inside an app context."""
+    partitions = _stream(cohort_statement(filters), chunk_size)
+    if export_format == 'csv': return _csv_chunks(COHORT_COLUMNS, partitions)
+    return _ndjson_chunks(COHORT_COLUMNS, partitions)
+
+
+def export_filename(report, export_format, filters):
+    parts = [report] + [f"{name}-{value}" for name, value in sorted(filters.items())]
+    return "_".join(str(part).replace(" ", "-") for part in parts) + "." + export_format
+
+
+def _write_export(chunks, output):
+    started, size = time.perf_counter(), 0
+    handle = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+    try:
+        for chunk in chunks:
+            handle.write(chunk); size += len(chunk)
+    finally:
+        if handle is not sys.stdout: handle.close()
+    db.session.rollback() # End the read transaction
+    if output != '-': click.echo(f"Wrote {size / 1e6:.1f} MB to {output} in {time.perf_counter() - started:.1f}s.", err=True)
+
+
+def _export_options(command):
+    command = click.option('--format', 'export_format', type=click.Choice(FORMATS), default='csv', show_default=True)(command)
+    command = click.option('--faculty', default=None)(command)
+    command = click.option('--advisor-id', type=int, default=None)(command)
+    command = click.option('--degree-id', type=int, default=None)(command)
+    return click.argument('output', type=click.Path(dir_okay=False, allow_dash=True))(command)
+
+
+@click.command('export-transcripts')
+@_export_options
+@click.option('--level', type=int, default=None, help='Only results for courses at this level (e.g. 300).')
+@with_appcontext
+def export_transcripts_command(output, degree_id, advisor_id, faculty, export_format, level):
+    """Streams transcripts for a degree, faculty, advisor and/or course level to OUTPUT ('-' for stdout)."""
+    try:
+        _, filters = parse_export_args({'format': export_format, 'degree_id': degree_id, 'advisor_id': advisor_id, 'faculty': faculty, 'level': level})
+        _write_export(generate_transcripts(export_format, filters), output)
+    except ExportError as e:
+        click.echo(f"!!! {e}", err=True)
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error exporting transcripts: {e}", err=True)
+
+
+@click.command('export-cohort-report')
+@_export_options
+@with_appcontext
+def export_cohort_report_command(output, degree_id, advisor_id, faculty, export_format):
+    """Streams a one-row-per-student cohort report for a degree, faculty and/or advisor to OUTPUT."""
+    try:
+        _, filters = parse_export_args({'format': export_format, 'degree_id': degree_id, 'advisor_id': advisor_id, 'faculty': faculty}, allow_level=False)
+        _write_export(generate_cohort_report(export_format, filters), output)
+    except ExportError as e:
+        click.echo(f"!!! {e}", err=True)
+    except Exception as e:
+        db.session.rollback(); click.echo(f"!!! Error exporting cohort report: {e}", err=True)
@@ -0,0 +1,28 @@
+# backend/wsgi.py
+import os
+
+from app import create_app
+from extensions import db
+
+# Production entry point:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#   uwsgi --master --processes 4 --module wsgi:app
+# The app is built once here; with preloading (gunicorn's preload_app, uWSGI's default) the
+# workers are forked from this process and share its imported code copy-on-write. No
+# connection may cross the fork, so each worker drops the pool it inherited and opens its own
+# (gunicorn.conf.py's post_fork, or the uWSGI postfork hook below). Background threads (mail
+# dispatcher, Firestore shipper) start with each worker's first request, never in the master.
+
+app = create_app(os.getenv('APP_PROFILE', 'production'))
+
+
+def reset_connections_after_fork():
+    """Forgets pooled connections inherited from the master without closing them (they still belong to it)."""
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+try:
+    from uwsgidecorators import postfork # Only importable under uWSGI
+except ImportError: postfork = None
+if postfork is not None: postfork(reset_connections_after_fork)